@@ -0,0 +1,252 @@
+"""Online backups of the NekoBudget database.
+
+Backups use SQLite's online backup API, a few pages at a time with a
+short sleep between steps, so the app keeps reading and writing while a
+backup runs and never sees a torn copy. Each backup is a folder in the
+backup directory holding the database and its archived years (see
+Database.archive_year), checked with ``PRAGMA integrity_check`` before
+it counts. Only the newest ``keep`` backups are kept::
+
+    python backup.py             # back up now, settings from nekobudget.json
+    python backup.py --if-due    # only if the last backup is old enough
+    python backup.py --list
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Optional
+
+from config import CONFIG_PATH, load_config
+
+# Backup folders are named <database stem>-<STAMP>
+STAMP = "%Y%m%d-%H%M%S"
+
+# Half-written backups get this suffix until they pass verification
+PARTIAL = ".partial"
+
+# A write between steps restarts the copy; after this many restarts the
+# rest is copied in one step, which still doesn't block writers in WAL
+MAX_RESTARTS = 3
+
+
+class BackupError(Exception):
+    """A backup couldn't be made or failed verification."""
+
+
+class _Abort(Exception):
+    """Raised from the progress callback to stop a stepped copy."""
+
+
+def list_backups(db_path: str, directory: str) -> list:
+    """(time, path) of each finished backup of ``db_path``, newest first."""
+    prefix = f"{Path(db_path).stem}-"
+    backups = []
+    if not os.path.isdir(directory):
+        return backups
+    for name in os.listdir(directory):
+        if not name.startswith(prefix):
+            continue
+        try:
+            when = datetime.strptime(name[len(prefix):], STAMP)
+        except ValueError:
+            continue  # Someone else's file, or a partial backup
+        backups.append((when, os.path.join(directory, name)))
+    return sorted(backups, reverse=True)
+
+
+def is_due(db_path: str, directory: str, interval_hours: float) -> bool:
+    """Whether the newest backup is at least ``interval_hours`` old."""
+    backups = list_backups(db_path, directory)
+    return not backups or datetime.now() - backups[0][0] >= timedelta(hours=interval_hours)
+
+
+def verify(path: str):
+    """Raise BackupError unless the database at ``path`` passes integrity_check."""
+    conn = sqlite3.connect(Path(path).absolute().as_uri() + "?mode=ro", uri=True)
+    try:
+        problems = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    except sqlite3.Error as e:
+        raise BackupError(f"{path} can't be checked: {e}") from e
+    finally:
+        conn.close()
+    if problems != ["ok"]:
+        raise BackupError(f"{path} is damaged: {'; '.join(problems[:5])}")
+
+
+def copy_database(source: str, target: str, pages_per_step: int = 128,
+                  step_sleep_ms: float = 10,
+                  progress: Optional[Callable[[int, int], None]] = None,
+                  cancelled: Optional[Callable[[], bool]] = None) -> bool:
+    """Copy the live database at ``source`` to a new file at ``target``.
+
+    ``progress(done, total)`` is called with page counts after each step.
+    Returns False (leaving ``target`` incomplete) if ``cancelled()``
+    became true, otherwise True.
+    """
+    src = sqlite3.connect(source, timeout=30)
+    dest = sqlite3.connect(target)
+    state = {"remaining": None, "restarts": 0}
+
+    def step(status, remaining, total):
+        if cancelled and cancelled():
+            raise _Abort
+        if state["remaining"] is not None and remaining > state["remaining"]:
+            state["restarts"] += 1  # Another connection wrote; SQLite started over
+            if state["restarts"] > MAX_RESTARTS:
+                raise _Abort
+        state["remaining"] = remaining
+        if progress:
+            progress(total - remaining, total)
+        if remaining:
+            time.sleep(step_sleep_ms / 1000)
+
+    try:
+        try:
+            src.backup(dest, pages=pages_per_step, progress=step)
+        except _Abort:
+            if cancelled and cancelled():
+                return False
+            src.backup(dest)
+        # A backup should be one self-contained file, not a WAL database
+        dest.execute("PRAGMA journal_mode = DELETE").fetchall()
+    except sqlite3.Error as e:
+        raise BackupError(f"Couldn't copy {source}: {e}") from e
+    finally:
+        dest.close()
+        src.close()
+    return True
+
+
+def _copy_archive(source: str, target: str, previous: Optional[str]):
+    """Copy an archive file, hard-linking the previous backup's copy if unchanged.
+
+    Archives only change by being restored and archived again, so the
+    same size and modification time mean the same file.
+    """
+    if previous and os.path.exists(previous):
+        old, new = os.stat(previous), os.stat(source)
+        if (old.st_size, old.st_mtime_ns) == (new.st_size, new.st_mtime_ns):
+            try:
+                os.link(previous, target)
+                return
+            except OSError:
+                pass  # No hard links here (e.g. FAT); copy instead
+    shutil.copy2(source, target)
+    verify(target)
+
+
+def prune(db_path: str, directory: str, keep: int) -> list:
+    """Delete all but the newest ``keep`` backups. Returns the removed paths."""
+    removed = [path for _, path in list_backups(db_path, directory)[max(keep, 1):]]
+    for path in removed:
+        shutil.rmtree(path, ignore_errors=True)
+    return removed
+
+
+def backup(db_path: str, directory: str = "backups", keep: int = 7,
+           pages_per_step: int = 128, step_sleep_ms: float = 10,
+           progress: Optional[Callable[[int, int], None]] = None,
+           cancelled: Optional[Callable[[], bool]] = None) -> Optional[str]:
+    """Back up ``db_path`` and its archives into a new folder in ``directory``.
+
+    Returns the new backup's path, or None if ``cancelled()`` stopped it.
+    Older backups beyond ``keep`` are deleted once the new one is verified.
+    """
+    if db_path == ":memory:":
+        raise BackupError("An in-memory database can't be backed up")
+    if not os.path.exists(db_path):
+        raise BackupError(f"{db_path} doesn't exist")
+
+    stem = Path(db_path).stem
+    os.makedirs(directory, exist_ok=True)
+    # Leftovers of backups that crashed or were cancelled
+    for entry in os.listdir(directory):
+        if entry.startswith(f"{stem}-") and entry.endswith(PARTIAL):
+            shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+    when = datetime.now()
+    final = os.path.join(directory, f"{stem}-{when.strftime(STAMP)}")
+    while os.path.exists(final):  # Two backups within a second
+        when += timedelta(seconds=1)
+        final = os.path.join(directory, f"{stem}-{when.strftime(STAMP)}")
+    partial = final + PARTIAL
+
+    os.makedirs(partial)
+    try:
+        copy = os.path.join(partial, os.path.basename(db_path))
+        if not copy_database(db_path, copy, pages_per_step, step_sleep_ms, progress, cancelled):
+            shutil.rmtree(partial, ignore_errors=True)
+            return None
+        verify(copy)
+
+        # The copy says which archives belong with it; they're only written
+        # before being recorded, so each one listed is complete
+        conn = sqlite3.connect(copy)
+        try:
+            archives = [row[0] for row in conn.execute("SELECT file FROM archived_years")]
+        except sqlite3.OperationalError:
+            archives = []  # A database from before archiving existed
+        finally:
+            conn.close()
+        backups = list_backups(db_path, directory)
+        previous = backups[0][1] if backups else None
+        folder = os.path.dirname(os.path.abspath(db_path))
+        for file in archives:
+            source = os.path.join(folder, file)
+            if not os.path.exists(source):
+                raise BackupError(f"{file} was restored during the backup; try again")
+            _copy_archive(source, os.path.join(partial, file),
+                          previous and os.path.join(previous, file))
+
+        os.replace(partial, final)
+    except BaseException:
+        shutil.rmtree(partial, ignore_errors=True)
+        raise
+    prune(db_path, directory, keep)
+    return final
+
+
+def backup_from_config(config: dict, **kwargs) -> Optional[str]:
+    """Run backup() with the paths and settings in ``config``."""
+    settings = config["backup"]
+    return backup(config["database"]["path"], settings["directory"], settings["keep"],
+                  settings["pages_per_step"], settings["step_sleep_ms"], **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Back up the NekoBudget database")
+    parser.add_argument("--config", default=CONFIG_PATH,
+                        help=f"settings file (default: {CONFIG_PATH})")
+    parser.add_argument("--if-due", action="store_true",
+                        help="only back up if the interval since the last backup has passed")
+    parser.add_argument("--list", action="store_true", help="list existing backups and exit")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    db_path = config["database"]["path"]
+    settings = config["backup"]
+
+    if args.list:
+        for when, path in list_backups(db_path, settings["directory"]):
+            print(f"{when:%Y-%m-%d %H:%M:%S}  {path}")
+        return
+    if args.if_due and not is_due(db_path, settings["directory"], settings["interval_hours"]):
+        print("The last backup is recent enough; nothing to do")
+        return
+
+    started = time.perf_counter()
+    try:
+        path = backup_from_config(config)
+    except (BackupError, OSError) as e:
+        print(f"Backup failed: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Backed up to {path} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,654 @@
+"""Benchmarks for the NekoBudget database layer."""
+
+import argparse
+import copy
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sqlite3
+import tempfile
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timezone
+from functools import partial
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Not on Windows; peak memory isn't reported there
+
+import datagen
+from database import Database, row_to_dict
+
+# Suite data always ends here, so results from different releases compare
+# the same rows
+SUITE_END = date(2025, 12, 31)
+
+# Database methods the suite leaves out: connection and cache plumbing,
+# and transaction(), which only times the caller's with block
+SUITE_SKIPPED = {"close", "connect", "transaction", "cache_stats", "clear_cache",
+                 "create_tables", "read_conn"}
+
+
+def sample_purchases(count: int) -> list:
+    """Build ``count`` purchase dicts spread over a few years."""
+    categories = ["🛒 Groceries", "🍽️ Dining", "🚗 Transportation", "🛍️ Shopping"]
+    return [
+        {
+            "name": f"Purchase {i}",
+            "amount": round(1 + (i % 9000) / 100, 2),
+            "date": f"{2020 + i % 5}-{1 + i % 12:02d}-{1 + i % 28:02d}",
+            "category": categories[i % len(categories)],
+            "notes": None,
+        }
+        for i in range(count)
+    ]
+
+
+def bench_inserts(rows: int):
+    """Compare per-row add_purchase against batched add_purchases_many."""
+    print("=" * 50)
+    print(f"Insert throughput ({rows:,} purchases)")
+    print("=" * 50)
+
+    purchases = sample_purchases(rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "per_row.db"))
+        start = time.perf_counter()
+        for p in purchases:
+            db.add_purchase(p["name"], p["amount"], p["date"], p["category"], None, p["notes"])
+        per_row = time.perf_counter() - start
+        db.close()
+
+        db = Database(os.path.join(tmp, "batched.db"))
+        start = time.perf_counter()
+        db.add_purchases_many(purchases)
+        batched = time.perf_counter() - start
+        db.close()
+
+    print(f"Per-row:  {per_row:8.2f}s  ({rows / per_row:12,.0f} rows/s)")
+    print(f"Batched:  {batched:8.2f}s  ({rows / batched:12,.0f} rows/s)")
+    print(f"Speedup:  {per_row / batched:8.1f}x")
+
+
+def percentile(samples: list, pct: float) -> float:
+    """Return the ``pct`` percentile of ``samples`` (nearest rank)."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def bench_commit_latency(commits: int):
+    """Compare single-row commit latency with default and tuned pragmas."""
+    print("=" * 50)
+    print(f"Commit latency ({commits:,} single-row commits)")
+    print("=" * 50)
+
+    configs = {
+        "rollback journal": {"journal_mode": "DELETE", "synchronous": "FULL"},
+        "WAL + tuned": {},
+    }
+    purchases = sample_purchases(commits)
+    with tempfile.TemporaryDirectory() as tmp:
+        for index, (label, pragmas) in enumerate(configs.items()):
+            db = Database(os.path.join(tmp, f"commits_{index}.db"), pragmas)
+            samples = []
+            for p in purchases:
+                start = time.perf_counter()
+                db.add_purchase(p["name"], p["amount"], p["date"], p["category"], None, p["notes"])
+                samples.append(time.perf_counter() - start)
+            db.close()
+            mean = sum(samples) / len(samples)
+            print(f"{label:<18} mean {mean * 1000:7.3f} ms   "
+                  f"p95 {percentile(samples, 95) * 1000:7.3f} ms")
+
+
+def bench_row_memory(purchases: int):
+    """Compare memory for dict rows against slotted Purchase records."""
+    print("=" * 50)
+    print(f"Row memory ({purchases:,} purchases)")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "memory.db"))
+        db.add_purchases_many(sample_purchases(purchases))
+
+        results = {}
+        loaders = {
+            "dict rows": lambda: [row_to_dict(row) for row in
+                                  db.read_conn.execute("SELECT * FROM purchases ORDER BY date DESC")],
+            "records": db.get_purchases,
+        }
+        for label, load in loaders.items():
+            # Time without tracing, since tracemalloc slows allocation down
+            start = time.perf_counter()
+            rows = load()
+            elapsed = time.perf_counter() - start
+            del rows
+
+            tracemalloc.start()
+            rows = load()
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results[label] = current
+            print(f"{label:<10} {current / 1024 / 1024:8.1f} MiB  "
+                  f"({current / len(rows):6.0f} B/row)  {elapsed:6.2f}s")
+            del rows
+        db.close()
+
+    print(f"Saving:    {1 - results['records'] / results['dict rows']:8.0%}")
+
+
+def bench_query_cache(refreshes: int):
+    """Time repeated dashboard refreshes with and without the query cache."""
+    print("=" * 50)
+    print(f"Query cache ({refreshes:,} dashboard refreshes)")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.db")
+        db = Database(path)
+        db.add_purchases_many(sample_purchases(100_000))
+        for day in range(1, 21):
+            db.add_monthly_bill(f"Bill {day}", 10 * day, day)
+        db.close()
+
+        for label, cache_size in (("uncached", 0), ("cached", 256)):
+            db = Database(path, cache_size=cache_size)
+            start = time.perf_counter()
+            for i in range(refreshes):
+                # Same calls the dashboard and bill account tabs make
+                db.get_dashboard_snapshot(2024, 1 + i % 3)
+                db.get_monthly_bills()
+                db.get_total_monthly_bills()
+            elapsed = time.perf_counter() - start
+            stats = db.cache_stats()
+            db.close()
+            print(f"{label:<10} {elapsed * 1000 / refreshes:8.3f} ms/refresh  "
+                  f"(hit rate {stats['hit_rate']:.0%})")
+
+
+def bench_search(purchases: int):
+    """Time search_purchases queries from broad prefixes to exact names."""
+    print("=" * 50)
+    print(f"Purchase search ({purchases:,} purchases)")
+    print("=" * 50)
+
+    queries = ["gr", "groceries", "dining 12", f"purchase {purchases // 2}"]
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "search.db"), cache_size=0)
+        db.add_purchases_many(sample_purchases(purchases))
+        for query in queries:
+            samples = []
+            for _ in range(20):
+                start = time.perf_counter()
+                results = db.search_purchases(query)
+                samples.append(time.perf_counter() - start)
+            print(f"{query!r:<20} {len(results):4} results   "
+                  f"p50 {percentile(samples, 50) * 1000:7.2f} ms   "
+                  f"p95 {percentile(samples, 95) * 1000:7.2f} ms")
+        db.close()
+
+
+def bench_concurrent_reads(rows: int):
+    """Compare read throughput from one thread and from several pool threads."""
+    print("=" * 50)
+    print(f"Concurrent reads ({rows:,} purchases)")
+    print("=" * 50)
+
+    queries = 200
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "readers.db"), cache_size=0)
+        db.add_purchases_many(sample_purchases(rows))
+
+        def read(count):
+            for i in range(count):
+                db.page_purchases(limit=200, year=2020 + i % 5, month=1 + i % 12)
+
+        for threads in (1, 2, 4, 8):
+            workers = [threading.Thread(target=read, args=(queries // threads,))
+                       for _ in range(threads)]
+            start = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - start
+            print(f"{threads} thread(s)  {queries / elapsed:10,.0f} pages/s")
+        db.close()
+
+
+def suite_cases(db: Database) -> dict:
+    """Build the suite's cases for a database of generated data.
+
+    Each case maps a name to a function taking the iteration number and
+    returning the call to time, so any setup it needs (such as adding the
+    row a delete removes) stays out of the measurement. Reads walk the
+    last twelve months of data.
+    """
+    months = [(SUITE_END.year - (12 - m) // 12, (SUITE_END.month - 1 + m) % 12 + 1)
+              for m in range(1, 13)]
+    bill_id = db.get_monthly_bills()[0].id
+    savings_id = db.get_savings_accounts()[0].id
+    day = SUITE_END.isoformat()
+
+    def purchase(i):
+        return {"name": f"Bench {i}", "amount": 12.5, "date": day,
+                "category": "🛒 Groceries", "notes": None}
+
+    def drain(iterator):
+        for _ in iterator:
+            pass
+
+    def pending_receipt(i):
+        source = f"bench-{i}.jpg"
+        db.add_purchase(f"Bench {i}", 1.0, day, receipt_pending=source)
+        return source
+
+    oldest = int(db.get_paychecks()[-1].date[:4])
+
+    def archive(i):
+        if oldest in db.get_archived_years():
+            db.restore_year(oldest)
+        return partial(db.archive_year, oldest, vacuum=False)
+
+    def restore(i):
+        if oldest not in db.get_archived_years():
+            db.archive_year(oldest, vacuum=False)
+        return partial(db.restore_year, oldest)
+
+    return {
+        # Reads
+        "get_monthly_bills": lambda i: db.get_monthly_bills,
+        "get_total_monthly_bills": lambda i: db.get_total_monthly_bills,
+        "is_bill_paid": lambda i: partial(db.is_bill_paid, bill_id, *months[i % 12]),
+        "get_paid_bill_ids": lambda i: partial(db.get_paid_bill_ids, *months[i % 12]),
+        "get_unpaid_bills_total": lambda i: partial(db.get_unpaid_bills_total, *months[i % 12]),
+        "get_bill_account_balance": lambda i: db.get_bill_account_balance,
+        "get_bill_account_transactions": lambda i: db.get_bill_account_transactions,
+        "get_paychecks[month]": lambda i: partial(db.get_paychecks, *months[i % 12]),
+        "get_paychecks[all]": lambda i: db.get_paychecks,
+        "get_purchases[month]": lambda i: partial(db.get_purchases, *months[i % 12]),
+        "get_purchases[all]": lambda i: db.get_purchases,
+        "page_purchases": lambda i: partial(db.page_purchases, limit=500),
+        "page_purchases[month]": lambda i: partial(db.page_purchases, limit=500,
+                                                   year=months[i % 12][0],
+                                                   month=months[i % 12][1]),
+        "get_purchases_total[month]": lambda i: partial(db.get_purchases_total, *months[i % 12]),
+        "get_purchases_total[all]": lambda i: db.get_purchases_total,
+        "search_purchases": lambda i: partial(db.search_purchases, ("gr", "sushi", "kitty mart")[i % 3]),
+        "get_savings_accounts": lambda i: db.get_savings_accounts,
+        "get_savings_transactions": lambda i: partial(db.get_savings_transactions, savings_id),
+        "page_savings_transactions": lambda i: partial(db.page_savings_transactions, savings_id),
+        "get_total_savings": lambda i: db.get_total_savings,
+        "get_monthly_summary": lambda i: partial(db.get_monthly_summary, *months[i % 12]),
+        "get_dashboard_snapshot": lambda i: partial(db.get_dashboard_snapshot, *months[i % 12]),
+        "iter_purchases[year]": lambda i: partial(drain, db.iter_purchases(year=SUITE_END.year)),
+        "iter_paychecks": lambda i: partial(drain, db.iter_paychecks()),
+        "iter_savings_transactions": lambda i: partial(drain, db.iter_savings_transactions()),
+        "iter_bill_account_transactions": lambda i: partial(
+            drain, db.iter_bill_account_transactions()),
+        "iter_monthly_bills": lambda i: partial(drain, db.iter_monthly_bills()),
+        "count_rows[purchases]": lambda i: partial(db.count_rows, "purchases"),
+        "get_or_create_monthly_page": lambda i: partial(db.get_or_create_monthly_page,
+                                                        *months[i % 12]),
+        "run_migrations": lambda i: db.run_migrations,
+        "get_archived_years": lambda i: db.get_archived_years,
+        "get_receipt_keys": lambda i: db.get_receipt_keys,
+        "get_receipt_stats": lambda i: db.get_receipt_stats,
+        "get_legacy_receipt_paths": lambda i: db.get_legacy_receipt_paths,
+        "get_pending_receipts": lambda i: db.get_pending_receipts,
+        "get_uncompressed_receipts": lambda i: db.get_uncompressed_receipts,
+        "archive_path": lambda i: partial(db.archive_path, oldest),
+        # Inserts and updates
+        "add_purchase": lambda i: partial(db.add_purchase, f"Bench {i}", 12.5, day,
+                                          "🛒 Groceries"),
+        "add_purchases_many[100]": lambda i: partial(db.add_purchases_many,
+                                                     [purchase(i) for _ in range(100)]),
+        "add_paycheck": lambda i: partial(db.add_paycheck, 2000, day, "Bench"),
+        "add_paychecks_many[100]": lambda i: partial(
+            db.add_paychecks_many, [{"amount": 2000, "date": day}] * 100),
+        "add_paycheck_with_split": lambda i: partial(db.add_paycheck_with_split, 2000, day,
+                                                     "Bench", None, 800, {savings_id: 200}),
+        "add_bill_account_transaction": lambda i: partial(db.add_bill_account_transaction,
+                                                          50, "deposit", day),
+        "add_bill_account_transactions_many[100]": lambda i: partial(
+            db.add_bill_account_transactions_many,
+            [{"amount": 50, "transaction_type": "deposit", "date": day}] * 100),
+        "set_bill_account_balance": lambda i: partial(db.set_bill_account_balance, 1000 + i),
+        "add_savings_transaction": lambda i: partial(db.add_savings_transaction, savings_id,
+                                                     25, "deposit", day),
+        "add_savings_transactions_many[100]": lambda i: partial(
+            db.add_savings_transactions_many,
+            [{"savings_id": savings_id, "amount": 25, "transaction_type": "deposit",
+              "date": day}] * 100),
+        "add_monthly_bill": lambda i: partial(db.add_monthly_bill, f"Bench {i}", 10, 1 + i % 28),
+        "update_monthly_bill": lambda i: partial(db.update_monthly_bill, bill_id, "Rent",
+                                                 1450 + i % 2, 1),
+        "mark_bill_paid": lambda i: partial(db.mark_bill_paid, bill_id, *months[i % 12], day),
+        "mark_bill_unpaid": lambda i: partial(db.mark_bill_unpaid, bill_id, *months[i % 12]),
+        "add_savings_account": lambda i: partial(db.add_savings_account, f"Bench {i}", 0, 100),
+        "update_savings_account": lambda i: partial(db.update_savings_account, savings_id,
+                                                    f"Bench {i}", 100),
+        "run_batch[10]": lambda i: partial(db.run_batch, [
+            lambda db, n=n: db.add_purchase(f"Batch {n}", 1.0, day) for n in range(10)]),
+        "rebuild_rollups": lambda i: db.rebuild_rollups,
+        "add_receipt": lambda i: partial(db.add_receipt, f"{i:064x}.jpg", 250_000),
+        "set_receipt_compressed": lambda i: partial(db.set_receipt_compressed, f"{i:064x}.jpg",
+                                                    90_000, 250_000),
+        "replace_receipt_path": lambda i: partial(db.replace_receipt_path, f"bench-{i}.jpg",
+                                                  f"bench-{i + 1}.jpg"),
+        "collect_orphan_receipts": lambda i: partial(db.collect_orphan_receipts, 0),
+        "finish_pending_receipt": lambda i: partial(db.finish_pending_receipt, pending_receipt(i),
+                                                    f"{i:064x}.jpg"),
+        # Deletes, each of a row added untimed just before
+        "delete_purchase": lambda i: partial(db.delete_purchase,
+                                             db.add_purchase(f"Bench {i}", 1.0, day)),
+        "delete_paycheck": lambda i: partial(db.delete_paycheck, db.add_paycheck(1.0, day)),
+        "delete_monthly_bill": lambda i: partial(db.delete_monthly_bill,
+                                                 db.add_monthly_bill(f"Bench {i}", 1.0)),
+        "delete_savings_account": lambda i: partial(db.delete_savings_account,
+                                                    db.add_savings_account(f"Bench {i}")),
+        # Archiving, last so the other cases see every year in place
+        "archive_year": archive,
+        "restore_year": restore,
+    }
+
+
+def time_case(case, min_time: float, max_repeats: int) -> list:
+    """Call ``case`` until ``min_time`` seconds have been timed.
+
+    Cheap calls are repeated up to ``max_repeats`` times; slow ones at
+    least three times, unless one call alone takes longer than min_time.
+    """
+    samples = []
+    while len(samples) < max_repeats:
+        call = case(len(samples))
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+        if sum(samples) >= min_time and (len(samples) >= 3 or samples[0] >= min_time):
+            break
+    return samples
+
+
+def table_counts(path: str) -> dict:
+    """Row count of every table in the database at ``path``."""
+    conn = sqlite3.connect(path)
+    try:
+        tables = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE '%fts%'"
+            " AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+        return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in tables}
+    finally:
+        conn.close()
+
+
+def suite_data(scale: str, data_dir: str, seed: int) -> str:
+    """Path of the generated database for ``scale``, generating it if needed."""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"{scale}-seed{seed}.db")
+    if not os.path.exists(path):
+        print(f"Generating {path}...")
+        datagen.generate(path, scale, seed, SUITE_END)
+    return path
+
+
+def run_metadata(seed: int, **settings) -> dict:
+    """What a results file needs to be compared with another one."""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "seed": seed,
+        "end": SUITE_END.isoformat(),
+        **settings,
+        "scales": {},
+    }
+
+
+def bench_suite(scales: list, data_dir: str, seed: int, output: str, min_time: float):
+    """Time every public Database method at each scale and save JSON results."""
+    print("=" * 50)
+    print(f"Database suite ({', '.join(scales)})")
+    print("=" * 50)
+
+    results = {"metadata": run_metadata(seed, min_time_s=min_time), "results": {}}
+    for scale in scales:
+        source = suite_data(scale, data_dir, seed)
+        results["metadata"]["scales"][scale] = table_counts(source)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            # Writes would change the generated data, so time a copy
+            path = os.path.join(tmp, "suite.db")
+            shutil.copyfile(source, path)
+            db = Database(path, cache_size=0)
+            cases = suite_cases(db)
+            covered = {name.split("[")[0] for name in cases}
+            missing = sorted(name for name in dir(Database)
+                             if not name.startswith("_") and name not in SUITE_SKIPPED
+                             and name not in covered)
+            if missing:
+                print(f"Not covered by the suite: {', '.join(missing)}")
+
+            scale_results = results["results"][scale] = {}
+            for name, case in cases.items():
+                samples = time_case(case, min_time, max_repeats=1000)
+                scale_results[name] = {
+                    "calls": len(samples),
+                    "mean_ms": sum(samples) / len(samples) * 1000,
+                    "min_ms": min(samples) * 1000,
+                    "p50_ms": percentile(samples, 50) * 1000,
+                    "p95_ms": percentile(samples, 95) * 1000,
+                    "max_ms": max(samples) * 1000,
+                }
+                print(f"{scale:<4} {name:<40} {len(samples):5} calls   "
+                      f"p50 {scale_results[name]['p50_ms']:9.3f} ms   "
+                      f"p95 {scale_results[name]['p95_ms']:9.3f} ms")
+            db.close()
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+
+def peak_rss_mib() -> float:
+    """Peak resident memory of this process so far, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def summarize(samples: list) -> dict:
+    """First, p50 and p95 of ``samples`` (seconds) in milliseconds."""
+    return {
+        "calls": len(samples),
+        "first_ms": samples[0] * 1000,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+    }
+
+
+def ui_run(db_path: str, repeats: int) -> dict:
+    """Build MainWindow offscreen over ``db_path`` and time its refreshes.
+
+    Runs in its own process (see bench_ui), so Qt gets a fresh
+    QApplication and the peak memory belongs to this database alone.
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+
+    import main
+    from config import DEFAULTS
+
+    app = QApplication([])
+    main.apply_theme(app)
+    baseline = peak_rss_mib()
+
+    def timed(action) -> float:
+        # Includes the layout and painting the action triggers
+        start = time.perf_counter()
+        action()
+        app.processEvents()
+        return time.perf_counter() - start
+
+    config = copy.deepcopy(DEFAULTS)
+    config["database"]["path"] = db_path
+    config["backup"]["enabled"] = False  # A backup mid-run would skew the timings
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)  # The receipt store lives here
+        try:
+            window = None
+
+            def start():
+                nonlocal window
+                window = main.MainWindow(config)
+                window.show()
+            results["startup"] = summarize([timed(start)])
+
+            tabs = {
+                "dashboard": (window.dashboard_tab, window.dashboard_tab.refresh),
+                "bills": (window.bills_tab, window.bills_tab.load_bills),
+                "bill_account": (window.bill_account_tab, window.bill_account_tab.refresh),
+                "paychecks": (window.paycheck_tab, window.paycheck_tab.load_paychecks),
+                "purchases": (window.purchases_tab, window.purchases_tab.load_purchases),
+                "savings": (window.savings_tab, window.savings_tab.load_savings),
+            }
+            for name, (tab, load) in tabs.items():
+                window.tabs.setCurrentWidget(tab)
+                app.processEvents()
+                results[f"load:{name}"] = summarize([timed(load) for _ in range(repeats)])
+
+            switches = {name: [] for name in tabs}
+            for _ in range(repeats):
+                for name, (tab, _) in tabs.items():
+                    switches[name].append(timed(partial(window.tabs.setCurrentWidget, tab)))
+            for name, samples in switches.items():
+                results[f"switch_tab:{name}"] = summarize(samples)
+
+            # Walk the months each selector offers that have generated data
+            selectors = {
+                "dashboard": (window.dashboard_tab, window.dashboard_tab.month_selector),
+                "paychecks": (window.paycheck_tab, window.paycheck_tab.month_filter),
+                "purchases": (window.purchases_tab, window.purchases_tab.month_filter),
+            }
+            last_month = (SUITE_END.year, SUITE_END.month)
+            for name, (tab, selector) in selectors.items():
+                window.tabs.setCurrentWidget(tab)
+                app.processEvents()
+                indexes = [i for i in range(selector.count())
+                           if selector.itemData(i) and selector.itemData(i) <= last_month]
+                indexes = indexes[:12] or list(range(selector.count()))
+                samples = []
+                for r in range(repeats):
+                    for index in indexes:
+                        if index != selector.currentIndex():
+                            samples.append(timed(partial(selector.setCurrentIndex, index)))
+                results[f"switch_month:{name}"] = summarize(samples)
+
+            window.close()
+        finally:
+            os.chdir(cwd)
+    return {"timings": results, "baseline_rss_mib": baseline, "peak_rss_mib": peak_rss_mib()}
+
+
+def bench_ui(scales: list, data_dir: str, seed: int, output: str, repeats: int):
+    """Time MainWindow's tab loads and switches over generated databases."""
+    print("=" * 50)
+    print(f"UI refreshes, offscreen ({', '.join(scales)})")
+    print("=" * 50)
+
+    results = {"metadata": run_metadata(seed, repeats=repeats), "results": {}}
+    spawn = multiprocessing.get_context("spawn")
+    for scale in scales:
+        source = suite_data(scale, data_dir, seed)
+        results["metadata"]["scales"][scale] = table_counts(source)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ui.db")
+            shutil.copyfile(source, path)
+            with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+                run = pool.submit(ui_run, path, repeats).result()
+        results["results"][scale] = run
+
+        for name, timing in run["timings"].items():
+            print(f"{scale:<4} {name:<28} first {timing['first_ms']:9.2f} ms   "
+                  f"p50 {timing['p50_ms']:9.2f} ms   p95 {timing['p95_ms']:9.2f} ms")
+        if run["peak_rss_mib"] is not None:
+            print(f"{scale:<4} peak memory {run['peak_rss_mib']:8.1f} MiB "
+                  f"({run['baseline_rss_mib']:.1f} MiB before the window)")
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+
+BENCHMARKS = {
+    "inserts": lambda args: bench_inserts(args.rows),
+    "commits": lambda args: bench_commit_latency(args.commits),
+    "memory": lambda args: bench_row_memory(args.purchases),
+    "cache": lambda args: bench_query_cache(args.refreshes),
+    "search": lambda args: bench_search(args.purchases),
+    "readers": lambda args: bench_concurrent_reads(args.rows),
+    "suite": lambda args: bench_suite(args.scales.split(","), args.data_dir, args.seed,
+                                      args.output, args.min_time),
+    "ui": lambda args: bench_ui(args.scales.split(","), args.data_dir, args.seed,
+                                args.ui_output, args.ui_repeats),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NekoBudget database benchmarks")
+    parser.add_argument("benchmarks", nargs="*", metavar="benchmark",
+                        help=f"benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument("--rows", type=int, default=100_000,
+                        help="number of rows to insert (default: 100000)")
+    parser.add_argument("--commits", type=int, default=1000,
+                        help="number of single-row commits to time (default: 1000)")
+    parser.add_argument("--purchases", type=int, default=1_000_000,
+                        help="purchases loaded by the memory and search benchmarks "
+                             "(default: 1000000)")
+    parser.add_argument("--refreshes", type=int, default=1000,
+                        help="dashboard refreshes timed by the cache benchmark (default: 1000)")
+    parser.add_argument("--scales", default=",".join(datagen.SCALES),
+                        help="comma-separated datagen scales the suite runs at "
+                             f"(default: {','.join(datagen.SCALES)})")
+    parser.add_argument("--data-dir", default="bench-data",
+                        help="where the suite keeps generated databases (default: bench-data)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed for the suite's generated data (default: 0)")
+    parser.add_argument("--min-time", type=float, default=0.5,
+                        help="seconds the suite spends timing each method (default: 0.5)")
+    parser.add_argument("--output", default="bench-data/suite.json",
+                        help="JSON file the suite writes its results to "
+                             "(default: bench-data/suite.json)")
+    parser.add_argument("--ui-repeats", type=int, default=20,
+                        help="times the ui benchmark repeats each load and switch (default: 20)")
+    parser.add_argument("--ui-output", default="bench-data/ui.json",
+                        help="JSON file the ui benchmark writes its results to "
+                             "(default: bench-data/ui.json)")
+    args = parser.parse_args()
+
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+    unknown = set(args.scales.split(",")) - set(datagen.SCALES)
+    if unknown:
+        parser.error(f"unknown scale(s): {', '.join(sorted(unknown))}")
+
+    for name in args.benchmarks or BENCHMARKS:
+        BENCHMARKS[name](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""User-overridable settings for NekoBudget.
+
+Settings live in an optional ``nekobudget.json`` next to the database.
+Anything missing from the file falls back to the defaults below, so the
+file only needs to contain the values being changed, e.g.::
+
+    {"database": {"pragmas": {"synchronous": "FULL"}}}
+"""
+
+import copy
+import json
+import os
+import sys
+
+CONFIG_PATH = "nekobudget.json"
+
+DEFAULTS = {
+    "database": {
+        "path": "nekobudget.db",
+        # Applied in order when a connection is opened; see Database.connect
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "cache_size": -16000,       # negative = KiB, so ~16 MB
+            "mmap_size": 268435456,     # 256 MB
+            "busy_timeout": 5000,       # ms
+            "foreign_keys": "ON",
+            "temp_store": "MEMORY",
+        },
+        # Number of query results Database keeps cached (0 disables)
+        "query_cache_size": 256,
+        # Most threads that can read at once, each with its own connection
+        "read_connections": 8,
+    },
+    # Query timing (see instrumentation.py); off unless enabled here
+    "diagnostics": {
+        "enabled": False,
+        "slow_query_ms": 50,
+        "slow_query_log": "nekobudget-slow.log",
+    },
+    # Content-addressed receipt files (see receipts.py)
+    "receipts": {
+        "directory": "receipts",
+        # Shrink photos as they're attached (needs Pillow): scaled down to
+        # fit max_dimension pixels and re-encoded at quality (JPEG/WebP).
+        # PDFs and other files are stored as they are.
+        "compress": False,
+        "max_dimension": 2400,
+        "quality": 82,
+    },
+    # Online backups (see backup.py), made in the background while the app
+    # is open once the newest one is interval_hours old
+    "backup": {
+        "enabled": True,
+        "directory": "backups",
+        "interval_hours": 24,
+        "keep": 7,                      # newest backups kept; older ones are deleted
+        "pages_per_step": 128,          # database pages copied per step...
+        "step_sleep_ms": 10,            # ...with this pause between steps
+    },
+}
+
+
+def _merge(base: dict, overrides: dict) -> dict:
+    """Recursively merge ``overrides`` into a copy of ``base``."""
+    merged = copy.deepcopy(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_config(path: str = CONFIG_PATH) -> dict:
+    """Load settings from ``path`` merged over the defaults."""
+    if not os.path.exists(path):
+        return copy.deepcopy(DEFAULTS)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            overrides = json.load(f)
+    except (OSError, ValueError) as e:
+        # A broken config file shouldn't keep the app from starting
+        print(f"Ignoring unreadable config {path}: {e}", file=sys.stderr)
+        return copy.deepcopy(DEFAULTS)
+    return _merge(DEFAULTS, overrides)
@@ -1,132 +1,767 @@
 """Database module for NekoBudget application."""
 
+import functools
 import sqlite3
 import os
+import threading
+import time
+import weakref
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
 from datetime import datetime
+from pathlib import Path
 from typing import Optional
 
+from config import DEFAULTS
+from records import Bill, Paycheck, Purchase, SavingsAccount, Transaction
+
+DEFAULT_PRAGMAS = DEFAULTS["database"]["pragmas"]
+
+# Pragmas that only make sense on (or can only be set by) the write connection
+WRITE_ONLY_PRAGMAS = {"journal_mode", "synchronous", "foreign_keys"}
+
+
+# Column definitions for every table. Money is stored as INTEGER cents;
+# see to_cents/from_cents for the conversion at the API edges.
+SCHEMA = {
+    # Monthly recurring bills
+    "monthly_bills": """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        amount INTEGER NOT NULL,
+        due_day INTEGER,
+        category TEXT,
+        is_active INTEGER DEFAULT 1,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    """,
+    # Paychecks
+    "paychecks": """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        amount INTEGER NOT NULL,
+        date TEXT NOT NULL,
+        source TEXT,
+        notes TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    """,
+    # Purchases
+    "purchases": """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        amount INTEGER NOT NULL,
+        date TEXT NOT NULL,
+        category TEXT,
+        receipt_path TEXT,
+        notes TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    """,
+    # Savings
+    "savings": """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        current_amount INTEGER DEFAULT 0,
+        goal_amount INTEGER,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    """,
+    # Savings transactions
+    "savings_transactions": """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        savings_id INTEGER NOT NULL,
+        amount INTEGER NOT NULL,
+        transaction_type TEXT NOT NULL,
+        date TEXT NOT NULL,
+        notes TEXT,
+        FOREIGN KEY (savings_id) REFERENCES savings(id)
+    """,
+    # Monthly pages/budgets
+    "monthly_pages": """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        year INTEGER NOT NULL,
+        month INTEGER NOT NULL,
+        notes TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(year, month)
+    """,
+    # Paid bills tracking (per month)
+    "paid_bills": """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        bill_id INTEGER NOT NULL,
+        year INTEGER NOT NULL,
+        month INTEGER NOT NULL,
+        paid_date TEXT NOT NULL,
+        FOREIGN KEY (bill_id) REFERENCES monthly_bills(id),
+        UNIQUE(bill_id, year, month)
+    """,
+    # Bill Account (separate from savings, for bill money)
+    "bill_account": """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        balance INTEGER DEFAULT 0,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    """,
+    # Bill Account transactions
+    "bill_account_transactions": """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        amount INTEGER NOT NULL,
+        transaction_type TEXT NOT NULL,
+        date TEXT NOT NULL,
+        notes TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    """,
+    # Per-month totals maintained by the ROLLUP_TRIGGERS below. kind is
+    # 'purchase', 'paycheck' or 'bill_paid'; category is '' when unset.
+    # Archived years have no 'bill_paid' rows (see archive_year).
+    "monthly_rollups": """
+        year INTEGER NOT NULL,
+        month INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        category TEXT NOT NULL DEFAULT '',
+        total INTEGER NOT NULL DEFAULT 0,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (year, month, kind, category)
+    """,
+    # Receipt files in the content-addressed store (see receipts.py). key
+    # is the file's sha256 plus extension, as stored in
+    # purchases.receipt_path; refs counts the purchases using it, archived
+    # ones included, and is kept up to date by RECEIPT_TRIGGERS.
+    # original_size is the size of the file as attached when the stored
+    # copy went through compression (NULL if it's stored as attached).
+    "receipts": """
+        key TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        original_size INTEGER,
+        refs INTEGER NOT NULL DEFAULT 0,
+        added_at TEXT DEFAULT CURRENT_TIMESTAMP
+    """,
+    # Purchases whose receipt is still being copied into the store, with
+    # the file being copied; see add_purchase(receipt_pending=...)
+    "pending_receipts": """
+        purchase_id INTEGER PRIMARY KEY,
+        source TEXT NOT NULL,
+        FOREIGN KEY (purchase_id) REFERENCES purchases(id) ON DELETE CASCADE
+    """,
+    # Closed years moved out to archive files by Database.archive_year;
+    # file is relative to the database's folder
+    "archived_years": """
+        year INTEGER PRIMARY KEY,
+        file TEXT NOT NULL,
+        archived_at TEXT DEFAULT CURRENT_TIMESTAMP
+    """,
+}
+
+# Indexes backing the month filters and history views, as name: table(columns)
+INDEXES = {
+    "idx_purchases_date": "purchases(date)",
+    "idx_paychecks_date": "paychecks(date)",
+    "idx_savings_transactions_savings_date": "savings_transactions(savings_id, date)",
+    "idx_bill_account_transactions_date_id": "bill_account_transactions(date, id)",
+    "idx_paid_bills_year_month": "paid_bills(year, month)",
+    "idx_purchases_receipt": "purchases(receipt_path) WHERE receipt_path IS NOT NULL",
+}
+
+# Tables whose rows archive_year moves out of the hot database. All but
+# paid_bills (which has year and month columns) are filtered on date.
+ARCHIVED_TABLES = ("purchases", "paychecks", "savings_transactions",
+                   "bill_account_transactions", "paid_bills")
+
+
+def _rollup_upsert(rows: str) -> str:
+    """SQL adding ``rows`` (VALUES or SELECT) into monthly_rollups."""
+    return f"""
+        INSERT INTO monthly_rollups (year, month, kind, category, total, count)
+        {rows}
+        ON CONFLICT(year, month, kind, category) DO UPDATE SET
+            total = total + excluded.total,
+            count = count + excluded.count;
+    """
+
+
+def _dated_rollup(kind: str, row: str, category: str, sign: str) -> str:
+    """Rollup delta for a purchase or paycheck row (NEW or OLD)."""
+    return _rollup_upsert(f"""
+        VALUES (CAST(substr({row}.date, 1, 4) AS INTEGER),
+                CAST(substr({row}.date, 6, 2) AS INTEGER),
+                '{kind}', {category}, {sign}{row}.amount, {sign}1)
+    """)
+
+
+def _paid_bill_rollup(row: str, sign: str) -> str:
+    """Rollup delta for a paid_bills row (NEW or OLD), priced at the bill."""
+    return _rollup_upsert(f"""
+        SELECT {row}.year, {row}.month, 'bill_paid', COALESCE(b.category, ''),
+               {sign}b.amount, {sign}1
+        FROM monthly_bills b WHERE b.id = {row}.bill_id AND b.is_active = 1
+    """)
+
+
+def _bill_change_rollup(row: str, sign: str) -> str:
+    """Rollup delta for every paid month of a monthly_bills row (NEW or OLD)."""
+    return _rollup_upsert(f"""
+        SELECT pb.year, pb.month, 'bill_paid', COALESCE({row}.category, ''),
+               {sign}{row}.amount, {sign}1
+        FROM paid_bills pb WHERE pb.bill_id = {row}.id AND {row}.is_active = 1
+    """)
+
+
+# Triggers keeping monthly_rollups in step with the rows it summarizes
+ROLLUP_TRIGGERS = {
+    "purchases_rollup_insert": f"""
+        AFTER INSERT ON purchases BEGIN
+            {_dated_rollup('purchase', 'NEW', "COALESCE(NEW.category, '')", '')}
+        END""",
+    "purchases_rollup_delete": f"""
+        AFTER DELETE ON purchases BEGIN
+            {_dated_rollup('purchase', 'OLD', "COALESCE(OLD.category, '')", '-')}
+        END""",
+    "purchases_rollup_update": f"""
+        AFTER UPDATE OF amount, date, category ON purchases BEGIN
+            {_dated_rollup('purchase', 'OLD', "COALESCE(OLD.category, '')", '-')}
+            {_dated_rollup('purchase', 'NEW', "COALESCE(NEW.category, '')", '')}
+        END""",
+    "paychecks_rollup_insert": f"""
+        AFTER INSERT ON paychecks BEGIN
+            {_dated_rollup('paycheck', 'NEW', "''", '')}
+        END""",
+    "paychecks_rollup_delete": f"""
+        AFTER DELETE ON paychecks BEGIN
+            {_dated_rollup('paycheck', 'OLD', "''", '-')}
+        END""",
+    "paychecks_rollup_update": f"""
+        AFTER UPDATE OF amount, date ON paychecks BEGIN
+            {_dated_rollup('paycheck', 'OLD', "''", '-')}
+            {_dated_rollup('paycheck', 'NEW', "''", '')}
+        END""",
+    "paid_bills_rollup_insert": f"""
+        AFTER INSERT ON paid_bills BEGIN
+            {_paid_bill_rollup('NEW', '')}
+        END""",
+    "paid_bills_rollup_delete": f"""
+        AFTER DELETE ON paid_bills BEGIN
+            {_paid_bill_rollup('OLD', '-')}
+        END""",
+    "paid_bills_rollup_update": f"""
+        AFTER UPDATE OF bill_id, year, month ON paid_bills BEGIN
+            {_paid_bill_rollup('OLD', '-')}
+            {_paid_bill_rollup('NEW', '')}
+        END""",
+    "monthly_bills_rollup_update": f"""
+        AFTER UPDATE OF amount, category, is_active ON monthly_bills BEGIN
+            {_bill_change_rollup('OLD', '-')}
+            {_bill_change_rollup('NEW', '')}
+        END""",
+}
+
+# Triggers keeping receipts.refs in step with purchases.receipt_path.
+# Paths that aren't receipt store keys (receipts from before the store)
+# match no row and are left alone.
+RECEIPT_TRIGGERS = {
+    "purchases_receipt_insert": """
+        AFTER INSERT ON purchases WHEN NEW.receipt_path IS NOT NULL BEGIN
+            UPDATE receipts SET refs = refs + 1 WHERE key = NEW.receipt_path;
+        END""",
+    "purchases_receipt_delete": """
+        AFTER DELETE ON purchases WHEN OLD.receipt_path IS NOT NULL BEGIN
+            UPDATE receipts SET refs = refs - 1 WHERE key = OLD.receipt_path;
+        END""",
+    "purchases_receipt_update": """
+        AFTER UPDATE OF receipt_path ON purchases
+        WHEN OLD.receipt_path IS NOT NEW.receipt_path BEGIN
+            UPDATE receipts SET refs = refs - 1 WHERE key = OLD.receipt_path;
+            UPDATE receipts SET refs = refs + 1 WHERE key = NEW.receipt_path;
+        END""",
+}
+
+# Adds ({sign} "+") or takes away ({sign} "-") the receipt references of
+# the purchases in {schema}.purchases matching {where}, for archive_year
+# and restore_year, which move purchases without losing their references
+RECEIPT_REFS_UPDATE = """
+    UPDATE main.receipts SET refs = refs {sign} used.count
+    FROM (SELECT receipt_path, COUNT(*) AS count FROM {schema}.purchases
+          WHERE receipt_path IS NOT NULL AND {where} GROUP BY receipt_path) AS used
+    WHERE receipts.key = used.receipt_path
+"""
+
+
+
+def _fts5_available() -> bool:
+    """Check whether this sqlite3 build was compiled with FTS5."""
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute("CREATE VIRTUAL TABLE fts_probe USING fts5(text)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
+
+
+HAS_FTS5 = _fts5_available()
+
+# Full-text index over purchase names, notes and categories. It's an
+# external-content table, so the text is only stored once (in purchases)
+# and SEARCH_TRIGGERS keep the index in step with it.
+PURCHASES_FTS = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS {schema}.purchases_fts USING fts5(
+        name, notes, category,
+        content='purchases', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+"""
+
+_FTS_DELETE_OLD = """
+    INSERT INTO purchases_fts (purchases_fts, rowid, name, notes, category)
+    VALUES ('delete', OLD.id, OLD.name, OLD.notes, OLD.category);
+"""
+_FTS_INSERT_NEW = """
+    INSERT INTO purchases_fts (rowid, name, notes, category)
+    VALUES (NEW.id, NEW.name, NEW.notes, NEW.category);
+"""
+
+SEARCH_TRIGGERS = {
+    "purchases_search_insert": f"AFTER INSERT ON purchases BEGIN {_FTS_INSERT_NEW} END",
+    "purchases_search_delete": f"AFTER DELETE ON purchases BEGIN {_FTS_DELETE_OLD} END",
+    "purchases_search_update": f"""
+        AFTER UPDATE OF name, notes, category ON purchases BEGIN
+            {_FTS_DELETE_OLD}
+            {_FTS_INSERT_NEW}
+        END""",
+}
+
+# Column weights for bm25 ranking, in PURCHASES_FTS column order
+SEARCH_WEIGHTS = (10.0, 2.0, 5.0)
+
+# How many of the newest matches search_purchases ranks
+SEARCH_CANDIDATES = 2000
+
+# Money columns per table, stored as INTEGER cents
+MONEY_COLUMNS = {
+    "monthly_bills": ["amount"],
+    "paychecks": ["amount"],
+    "purchases": ["amount"],
+    "savings": ["current_amount", "goal_amount"],
+    "savings_transactions": ["amount"],
+    "bill_account": ["balance"],
+    "bill_account_transactions": ["amount"],
+}
+
+# Result column names that hold cents and are converted back to dollars
+MONEY_FIELDS = {"amount", "current_amount", "goal_amount", "balance", "total"}
+
+# Text columns with few distinct values, shared between records
+SHARED_TEXT_FIELDS = {"date", "category", "created_at", "transaction_type", "source"}
+
+# Rows copied per transaction when a migration rewrites a table
+MIGRATION_BATCH_SIZE = 5000
+
+# Tables that ROLLUP_TRIGGERS write to when the key table changes; cached
+# reads of them must be invalidated along with the table itself
+DERIVED_TABLES = {
+    "purchases": ("monthly_rollups",),
+    "paychecks": ("monthly_rollups",),
+    "paid_bills": ("monthly_rollups",),
+    "monthly_bills": ("monthly_rollups",),
+}
+
+
+def to_cents(amount: Optional[float]) -> Optional[int]:
+    """Convert a dollar amount to integer cents."""
+    if amount is None:
+        return None
+    return int(round(amount * 100))
+
+
+def from_cents(cents: Optional[int]) -> Optional[float]:
+    """Convert integer cents back to a dollar amount."""
+    if cents is None:
+        return None
+    return cents / 100
+
+
+def row_to_dict(row: sqlite3.Row) -> dict:
+    """Turn a result row into a dict, converting money columns to dollars."""
+    record = dict(row)
+    for key in MONEY_FIELDS.intersection(record):
+        record[key] = from_cents(record[key])
+    return record
+
+
+def record_factory(record_type):
+    """Build a sqlite3 row factory that produces ``record_type`` records.
+
+    Columns are matched to record fields by name (the mapping is worked out
+    once per result set) and money columns are converted to dollars.
+    Columns the record doesn't declare are ignored. Low-cardinality text
+    such as dates and categories is shared between records instead of
+    being a fresh string per row.
+    """
+    fields = record_type.__slots__
+    plan = {"description": None}
+    shared = {}
+
+    def factory(cursor, row):
+        description = cursor.description
+        if description is not plan["description"]:
+            columns = [column[0] for column in description]
+            plan["description"] = description
+            # None means the columns already line up with the fields
+            plan["indexes"] = None
+            if columns[:len(fields)] != list(fields):
+                # Fields missing from the result read the None appended below
+                plan["indexes"] = [columns.index(name) if name in columns else -1
+                                   for name in fields]
+            plan["money"] = [position for position, name in enumerate(fields)
+                             if name in MONEY_FIELDS and name in columns]
+            plan["shared"] = [position for position, name in enumerate(fields)
+                              if name in SHARED_TEXT_FIELDS and name in columns]
+
+        indexes = plan["indexes"]
+        if indexes is None:
+            values = list(row[:len(fields)])
+        else:
+            values = [*row, None]
+            values = [values[index] for index in indexes]
+        for position in plan["money"]:
+            if values[position] is not None:
+                values[position] /= 100
+        for position in plan["shared"]:
+            value = values[position]
+            values[position] = shared.setdefault(value, value)
+        return record_type(*values)
+
+    return factory
+
+
+def fetch_records(cursor: sqlite3.Cursor, record_type) -> list:
+    """Fetch the rest of ``cursor`` as a list of ``record_type`` records."""
+    cursor.row_factory = record_factory(record_type)
+    return cursor.fetchall()
+
+
+def cached_query(*tables: str):
+    """Memoize a Database read method until one of ``tables`` is written.
+
+    Results are keyed on the call arguments and the version counters of
+    ``tables``; write methods bump those counters through Database._touch,
+    so a stale entry is never returned. See Database._cached_call.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            return self._cached_call(method, tables, args, kwargs)
+        return wrapper
+    return decorator
+
+
+def serialized_write(method):
+    """Run a Database write method while holding the write lock.
+
+    Every thread shares the one write connection, so writes (and whole
+    transaction() blocks) take turns. The lock is reentrant, so write
+    methods can call each other.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.pool.write_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _copy_result(result):
+    """Shallow-copy a cached result so callers can't mutate the cache.
+
+    The records inside are frozen, so sharing them is safe.
+    """
+    if isinstance(result, (list, dict, set)):
+        return result.copy()
+    if isinstance(result, tuple):
+        return tuple(_copy_result(item) for item in result)
+    return result
+
+
+def fts_query(text: str) -> str:
+    """Turn search box input into an FTS5 MATCH expression.
+
+    Every word must match, and the last one matches as a prefix so results
+    update as the user types. Returns "" if there is nothing to search for.
+    """
+    words = ["".join(ch for ch in word if ch.isalnum()) for word in text.split()]
+    words = [word for word in words if word]
+    if not words:
+        return ""
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def month_bounds(year: int, month: int) -> tuple:
+    """Return the half-open [start, end) ISO date range covering a month."""
+    start = f"{year:04d}-{month:02d}-01"
+    if month == 12:
+        end = f"{year + 1:04d}-01-01"
+    else:
+        end = f"{year:04d}-{month + 1:02d}-01"
+    return start, end
+
+
+def date_filters(year: Optional[int] = None, month: Optional[int] = None,
+                 start: Optional[str] = None, end: Optional[str] = None,
+                 category: Optional[str] = None) -> tuple:
+    """Build WHERE clauses and parameters for the common list filters.
+
+    ``year``/``month`` select one month; ``start`` (inclusive) and ``end``
+    (exclusive) are ISO dates bounding the range. Returns (clauses, params).
+    """
+    clauses, params = [], []
+    if year and month:
+        clauses.append("date >= ? AND date < ?")
+        params.extend(month_bounds(year, month))
+    if start:
+        clauses.append("date >= ?")
+        params.append(start)
+    if end:
+        clauses.append("date < ?")
+        params.append(end)
+    if category is not None:
+        clauses.append("category = ?")
+        params.append(category)
+    return clauses, params
+
+
+def date_range(year: Optional[int] = None, month: Optional[int] = None,
+               start: Optional[str] = None, end: Optional[str] = None) -> tuple:
+    """Narrowest [start, end) covering the same filters as ``date_filters``.
+
+    Either bound is None when the range is open on that side.
+    """
+    low, high = month_bounds(year, month) if year and month else (None, None)
+    if start and (low is None or start > low):
+        low = start
+    if end and (high is None or end < high):
+        high = end
+    return low, high
+
+
+def archive_columns(table: str) -> str:
+    """``table``'s SCHEMA columns without foreign keys.
+
+    The referenced tables stay in the hot database, which an archive file
+    can't point at.
+    """
+    return ",".join(part for part in SCHEMA[table].split(",") if "FOREIGN KEY" not in part)
+
+
+class PoolExhaustedError(sqlite3.OperationalError):
+    """Raised when no read connection frees up within the pool timeout."""
+
+
+class ArchivedYearError(ValueError):
+    """Raised when a write falls in a year that has been archived."""
+
+
+class _Lease:
+    """A thread's read connection, returned to the pool when the thread ends.
+
+    Leases live in a threading.local, which Python clears when its thread
+    exits; the finalizer then closes the connection and frees the slot.
+    """
+
+    __slots__ = ("conn", "last_checked", "close", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection, on_close):
+        self.conn = conn
+        self.last_checked = time.monotonic()
+        # Runs at most once: when called directly or when the lease is freed
+        self.close = weakref.finalize(self, on_close, conn)
+
+
+class ConnectionPool:
+    """Per-thread read connections plus one serialized write connection.
+
+    sqlite3 connections shouldn't be used from two threads at once, so each
+    thread that reads gets a connection of its own (at most ``max_readers``
+    at a time; others wait up to ``timeout`` seconds for one to free up).
+    All threads share the single write connection behind ``write_lock``.
+    Idle connections are checked with a trivial query before reuse and
+    reopened if they have gone bad.
+    """
+
+    HEALTH_CHECK_INTERVAL = 30.0  # seconds
+
+    def __init__(self, connect, max_readers: int = 8, timeout: float = 30.0):
+        self._connect = connect
+        self.max_readers = max_readers
+        self.timeout = timeout
+        self.write_lock = threading.RLock()
+        self.writer = connect(read_only=False)
+        self._slots = threading.BoundedSemaphore(max_readers)
+        self._local = threading.local()
+        self._readers = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def reader(self) -> sqlite3.Connection:
+        """Return the calling thread's read connection, opening it if needed."""
+        lease = getattr(self._local, "lease", None)
+        if lease is not None:
+            if time.monotonic() - lease.last_checked < self.HEALTH_CHECK_INTERVAL:
+                return lease.conn
+            if self._healthy(lease.conn):
+                lease.last_checked = time.monotonic()
+                return lease.conn
+            self._release(lease)
+            self._local.lease = None
+        return self._open_reader()
+
+    def _open_reader(self) -> sqlite3.Connection:
+        if self._closed:
+            raise sqlite3.ProgrammingError("Cannot use a closed connection pool")
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolExhaustedError(
+                f"No read connection free after {self.timeout}s "
+                f"({self.max_readers} in use)"
+            )
+        try:
+            conn = self._connect(read_only=True)
+        except BaseException:
+            self._slots.release()
+            raise
+        lease = _Lease(conn, self._close_reader)
+        with self._lock:
+            self._readers.add(lease)
+        self._local.lease = lease
+        return conn
+
+    def _close_reader(self, conn: sqlite3.Connection):
+        if conn is not self.writer:
+            conn.close()
+        self._slots.release()
+
+    def _release(self, lease: _Lease):
+        with self._lock:
+            self._readers.discard(lease)
+        lease.close()
+
+    @staticmethod
+    def _healthy(conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def check(self) -> dict:
+        """Check every open connection; returns counts of healthy and bad ones."""
+        with self._lock:
+            leases = list(self._readers)
+        healthy = sum(self._healthy(lease.conn) for lease in leases)
+        with self.write_lock:
+            writer_ok = self._healthy(self.writer)
+        return {"readers": len(leases), "healthy_readers": healthy, "writer_ok": writer_ok}
+
+    def close_all(self):
+        """Close every connection; later reads and writes raise."""
+        self._closed = True
+        with self._lock:
+            leases = list(self._readers)
+            self._readers.clear()
+        for lease in leases:
+            lease.close()
+        self._local = threading.local()
+        with self.write_lock:
+            self.writer.close()
+
 
 class Database:
     """Handle all database operations for the budget app."""
 
-    def __init__(self, db_path: str = "nekobudget.db"):
+    def __init__(self, db_path: str = "nekobudget.db", pragmas: Optional[dict] = None,
+                 cache_size: int = DEFAULTS["database"]["query_cache_size"],
+                 read_connections: int = DEFAULTS["database"]["read_connections"],
+                 profiler=None):
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path)
-        self.conn.row_factory = sqlite3.Row
+        self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+        # Optional instrumentation.QueryProfiler; see connect()
+        self.profiler = profiler
+        # Query result cache; see cached_query. A size of 0 disables it.
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._table_versions = {}
+        self._cache_stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        self._cache_lock = threading.Lock()
+        # Open transaction() blocks; write methods only commit outside them
+        self._transaction_depth = 0
+        # Tables written since the last commit or rollback; see _touch
+        self._uncommitted_tables = set()
+        self._transaction_thread = None
+        # Archived year -> archive file; see archive_year. The generation
+        # goes up whenever that changes, so threads drop old attachments.
+        self._archives = {}
+        self._archive_generation = 0
+        self._attachments = threading.local()
+        # Reads go through per-thread connections so they never queue behind
+        # a write (WAL lets readers run alongside) and so worker threads can
+        # query too; writes share one connection. See ConnectionPool.
+        self.pool = ConnectionPool(self.connect, read_connections)
+        self.conn = self.pool.writer
+        self._data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
         self.create_tables()
+        self.run_migrations()
+        self._load_archives(self.conn)
+        if profiler:
+            profiler.install(self)
 
-    def create_tables(self):
-        """Create all necessary tables."""
-        cursor = self.conn.cursor()
+    @property
+    def read_conn(self) -> sqlite3.Connection:
+        """The calling thread's read connection.
 
-        # Monthly recurring bills
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS monthly_bills (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                amount REAL NOT NULL,
-                due_day INTEGER,
-                category TEXT,
-                is_active INTEGER DEFAULT 1,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        Inside the calling thread's transaction() block that's the write
+        connection, so reads see the block's uncommitted writes.
+        """
+        if self._in_transaction():
+            return self.conn
+        return self.pool.reader()
 
-        # Paychecks
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS paychecks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                amount REAL NOT NULL,
-                date TEXT NOT NULL,
-                source TEXT,
-                notes TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+    def _in_transaction(self) -> bool:
+        """Whether the calling thread is inside a transaction() block."""
+        return bool(self._transaction_depth) and self._transaction_thread == threading.get_ident()
 
-        # Purchases
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS purchases (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                amount REAL NOT NULL,
-                date TEXT NOT NULL,
-                category TEXT,
-                receipt_path TEXT,
-                notes TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        # Savings
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS savings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                current_amount REAL DEFAULT 0,
-                goal_amount REAL,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+    def connect(self, read_only: bool = False) -> sqlite3.Connection:
+        """Open a connection to the database with the configured pragmas."""
+        if read_only and self.db_path == ":memory:":
+            # Each in-memory connection is its own database, so share ours
+            return self.conn
+        # Only profiled databases pay for instrumented connections
+        options = {"check_same_thread": False}
+        if self.profiler:
+            options["factory"] = self.profiler.connection_class
+        if read_only:
+            uri = Path(self.db_path).absolute().as_uri() + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, **options)
+        else:
+            conn = sqlite3.connect(self.db_path, **options)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            if read_only and name in WRITE_ONLY_PRAGMAS:
+                continue
+            conn.execute(f"PRAGMA {name} = {value}").fetchall()
+        return conn
 
-        # Savings transactions
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS savings_transactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                savings_id INTEGER NOT NULL,
-                amount REAL NOT NULL,
-                transaction_type TEXT NOT NULL,
-                date TEXT NOT NULL,
-                notes TEXT,
-                FOREIGN KEY (savings_id) REFERENCES savings(id)
-            )
-        """)
+    def create_tables(self):
+        """Create all necessary tables and indexes."""
+        cursor = self.conn.cursor()
 
-        # Monthly pages/budgets
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS monthly_pages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                year INTEGER NOT NULL,
-                month INTEGER NOT NULL,
-                notes TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(year, month)
-            )
-        """)
+        for table, columns in SCHEMA.items():
+            cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} ({columns})")
 
-        # Paid bills tracking (per month)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS paid_bills (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                bill_id INTEGER NOT NULL,
-                year INTEGER NOT NULL,
-                month INTEGER NOT NULL,
-                paid_date TEXT NOT NULL,
-                FOREIGN KEY (bill_id) REFERENCES monthly_bills(id),
-                UNIQUE(bill_id, year, month)
-            )
-        """)
+        for name, columns in INDEXES.items():
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {columns}")
 
-        # Bill Account (separate from savings, for bill money)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS bill_account (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                balance REAL DEFAULT 0,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        for name, body in {**ROLLUP_TRIGGERS, **RECEIPT_TRIGGERS}.items():
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
 
-        # Bill Account transactions
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS bill_account_transactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                amount REAL NOT NULL,
-                transaction_type TEXT NOT NULL,
-                date TEXT NOT NULL,
-                notes TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        if HAS_FTS5:
+            cursor.execute(PURCHASES_FTS.format(schema="main"))
+            for name, body in SEARCH_TRIGGERS.items():
+                cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
 
         # Ensure bill account exists (single row)
         cursor.execute("SELECT COUNT(*) FROM bill_account")
@@ -135,258 +770,1070 @@ class Database:
 
         self.conn.commit()
 
+    def run_migrations(self) -> int:
+        """Bring an existing database up to the current schema version.
+
+        The schema version is kept in ``PRAGMA user_version``; each entry of
+        ``MIGRATIONS`` upgrades the database by one version. Returns the
+        number of migrations applied.
+        """
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        pending = MIGRATIONS[version:]
+        if not pending:
+            return 0
+
+        # Migrations rebuild tables, which foreign key checks would block and
+        # which triggers on other tables would break. Every trigger comes from
+        # create_tables, so they are simply recreated afterwards.
+        self.conn.commit()
+        self.conn.execute("PRAGMA foreign_keys = OFF")
+        triggers = self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        for (name,) in triggers.fetchall():
+            self.conn.execute(f"DROP TRIGGER {name}")
+        try:
+            for number, migration in enumerate(pending, start=version + 1):
+                migration(self)
+                self.conn.execute(f"PRAGMA user_version = {number}")
+                self.conn.commit()
+        finally:
+            self.conn.execute(f"PRAGMA foreign_keys = {self.pragmas.get('foreign_keys', 'OFF')}")
+
+        # Rebuilt tables lose their indexes, so recreate anything missing
+        self.create_tables()
+        return len(pending)
+
+    def _commit(self):
+        """Commit a write method's changes, unless a transaction() will."""
+        if not self._transaction_depth:
+            self.conn.commit()
+            self._touch_uncommitted()
+
+    def _rollback(self):
+        """Undo a failed write method, unless a transaction() will."""
+        if not self._transaction_depth:
+            self.conn.rollback()
+            self._touch_uncommitted()
+
+    @contextmanager
+    def transaction(self):
+        """Group write methods into one atomic unit with a single commit.
+
+        Write methods called inside the block don't commit; everything is
+        committed when the outermost block exits and rolled back if it
+        raises. Blocks nest: an inner block is a savepoint, so catching its
+        exception undoes only the inner block's writes. Reads in the block
+        see its writes and skip the query cache; they can't reach archived
+        years, which the write connection can't attach mid-transaction::
+
+            with db.transaction():
+                db.add_paycheck(...)
+                db.add_savings_transaction(...)
+        """
+        # Other threads' writes wait until the whole block is done
+        self.pool.write_lock.acquire()
+        depth = self._transaction_depth
+        savepoint = f"transaction_{depth}"
+        try:
+            if depth == 0:
+                # Finish any implicit transaction so BEGIN starts a fresh one
+                self.conn.commit()
+                self.conn.execute("BEGIN IMMEDIATE")
+                self._transaction_thread = threading.get_ident()
+            else:
+                self.conn.execute(f"SAVEPOINT {savepoint}")
+            self._transaction_depth += 1
+            try:
+                yield self
+            except BaseException:
+                if depth == 0:
+                    self.conn.rollback()
+                else:
+                    self.conn.execute(f"ROLLBACK TO {savepoint}")
+                    self.conn.execute(f"RELEASE {savepoint}")
+                raise
+            else:
+                if depth == 0:
+                    self.conn.commit()
+                else:
+                    self.conn.execute(f"RELEASE {savepoint}")
+            finally:
+                self._transaction_depth = depth
+                if depth == 0:
+                    self._transaction_thread = None
+                    self._touch_uncommitted()
+        finally:
+            self.pool.write_lock.release()
+
+    def run_batch(self, operations) -> list:
+        """Apply several writes in one transaction with a single commit.
+
+        ``operations`` are callables taking this Database, e.g.
+        ``lambda db: db.add_purchase(...)``. Each runs in its own savepoint,
+        so one that fails is rolled back without losing the others. Returns
+        a (result, error) pair per operation; error is None on success.
+        """
+        results = []
+        with self.transaction():
+            for operation in operations:
+                try:
+                    with self.transaction():
+                        result = operation(self)
+                except Exception as e:
+                    results.append((None, e))
+                else:
+                    results.append((result, None))
+        return results
+
+    def _touch(self, *tables: str):
+        """Invalidate cached reads of ``tables`` after writing to them.
+
+        Other threads read through their own connections, which don't see
+        the write until it's committed; one that reads in between caches
+        the old rows under the new versions. So the tables are bumped once
+        more by _touch_uncommitted after the commit (or rollback).
+        """
+        self._bump_versions(tables)
+        self._uncommitted_tables.update(tables)
+
+    def _touch_uncommitted(self):
+        """Invalidate cached reads of the tables written since the last commit."""
+        self._bump_versions(self._uncommitted_tables)
+        self._uncommitted_tables.clear()
+
+    def _bump_versions(self, tables):
+        for table in tables:
+            for name in (table, *DERIVED_TABLES.get(table, ())):
+                self._table_versions[name] = self._table_versions.get(name, 0) + 1
+
+    def _cached_call(self, method, tables: tuple, args: tuple, kwargs: dict):
+        """Return ``method(*args, **kwargs)``, from the cache when still valid."""
+        if not self.cache_size or self._in_transaction():
+            # Uncommitted results mustn't reach other threads through the cache
+            return method(self, *args, **kwargs)
+
+        # data_version changes when another connection (the statement
+        # importer, another app instance) commits, which _touch can't see.
+        # It's read without the write lock: the write connection is safe to
+        # share (check_same_thread=False), and a long write shouldn't hold
+        # up cached reads.
+        data_version = self._read_data_version()
+        if data_version != self._data_version:
+            self._data_version = data_version
+            self.clear_cache()
+
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        # Read the versions before querying, so a write that lands while the
+        # query runs makes this entry stale rather than wrongly current
+        versions = (data_version, *(self._table_versions.get(table, 0) for table in tables))
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] == versions:
+                self._cache.move_to_end(key)
+                self._cache_stats["hits"] += 1
+                return _copy_result(entry[1])
+            self._cache_stats["misses"] += 1
+
+        result = method(self, *args, **kwargs)
+        if self._read_data_version() != data_version:
+            # Another connection committed mid-query; the result may predate it
+            return _copy_result(result)
+        with self._cache_lock:
+            self._cache[key] = (versions, result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+                self._cache_stats["evictions"] += 1
+        return _copy_result(result)
+
+    def _read_data_version(self) -> int:
+        """The write connection's data_version, which only other connections' commits change."""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def clear_cache(self):
+        """Drop every cached query result."""
+        with self._cache_lock:
+            self._cache.clear()
+            self._cache_stats["invalidations"] += 1
+
+    def cache_stats(self) -> dict:
+        """Return query cache hit/miss counts and the current entry count."""
+        lookups = self._cache_stats["hits"] + self._cache_stats["misses"]
+        return {
+            **self._cache_stats,
+            "size": len(self._cache),
+            "max_size": self.cache_size,
+            "hit_rate": self._cache_stats["hits"] / lookups if lookups else 0.0,
+        }
+
+    def _load_archives(self, conn: sqlite3.Connection):
+        """Re-read which years are archived if another connection committed since.
+
+        Another Database (the background writer, the statement importer,
+        another app instance) may have archived or restored a year.
+        data_version is per connection, so each thread tracks the one of
+        its read connection and of the write connection separately.
+        """
+        key = "writer_version" if conn is self.conn else "reader_version"
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if getattr(self._attachments, key, None) == data_version:
+            return
+        setattr(self._attachments, key, data_version)
+        rows = conn.execute("SELECT year, file FROM archived_years").fetchall()
+        archives = {year: file for year, file in rows}
+        if archives != self._archives:
+            self._archives = archives
+            self._archive_generation += 1
+
+    def _check_open(self, dates):
+        """Raise ArchivedYearError if any of ``dates`` (ISO dates or years) is archived."""
+        self._load_archives(self.conn)
+        if not self._archives:
+            return
+        for value in dates:
+            year = int(str(value)[:4])
+            if year in self._archives:
+                raise ArchivedYearError(
+                    f"{year} is archived; restore it before changing it"
+                )
+
+    def _check_row_open(self, table: str, row_id: int):
+        """Raise ArchivedYearError if row ``row_id`` of ``table`` was archived.
+
+        Archived rows keep their ids, so a row missing from the hot database
+        is looked up in each archive. The archives are opened on their own
+        connections, since the write connection can't ATTACH mid-transaction.
+        """
+        if self.conn.execute(f"SELECT 1 FROM main.{table} WHERE id = ?", (row_id,)).fetchone():
+            return
+        self._load_archives(self.conn)
+        for year, file in sorted(self._archives.items()):
+            path = Path(self.db_path).absolute().with_name(file)
+            conn = sqlite3.connect(path.as_uri() + "?mode=ro", uri=True)
+            try:
+                found = conn.execute(f"SELECT 1 FROM {table} WHERE id = ?", (row_id,)).fetchone()
+            finally:
+                conn.close()
+            if found:
+                self._check_open([year])
+
+    def _attach(self, conn: sqlite3.Connection, year: int) -> str:
+        """Attach ``year``'s archive to ``conn`` if needed; returns its schema name."""
+        attached = [row[1] for row in conn.execute("PRAGMA database_list")]
+        archives = [name for name in attached if name.startswith("archive_")]
+        if getattr(self._attachments, "generation", None) != self._archive_generation:
+            # An archive was added or restored since this thread attached its
+            # archives, so they may point at files that have been replaced
+            for name in archives:
+                try:
+                    conn.execute(f"DETACH DATABASE {name}")
+                except sqlite3.OperationalError:
+                    pass  # Still being read; it's dropped next time round
+            attached = [row[1] for row in conn.execute("PRAGMA database_list")]
+            archives = [name for name in attached if name.startswith("archive_")]
+            self._attachments.generation = self._archive_generation
+
+        schema = f"archive_{year}"
+        if schema in attached:
+            return schema
+        if conn is self.conn and conn.in_transaction:
+            raise sqlite3.ProgrammingError(
+                f"{year} is archived and can't be read inside transaction()")
+        if len(archives) >= conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED):
+            for name in archives:
+                try:
+                    conn.execute(f"DETACH DATABASE {name}")
+                    break
+                except sqlite3.OperationalError:
+                    continue  # A cursor is still reading it
+        path = Path(self.db_path).absolute().with_name(self._archives[year])
+        if conn is not self.conn:
+            # Read connections open archives read-only, like the database
+            path = path.as_uri() + "?mode=ro"
+        conn.execute(f"ATTACH DATABASE ? AS {schema}", (str(path),))
+        return schema
+
+    def _table(self, conn: sqlite3.Connection, table: str, year: int) -> str:
+        """Qualified name of ``table`` holding ``year``'s rows, in the hot database or an archive."""
+        self._load_archives(conn)
+        if year in self._archives:
+            return f"{self._attach(conn, year)}.{table}"
+        return f"main.{table}"
+
+    def _segments(self, conn: sqlite3.Connection, start: Optional[str], end: Optional[str],
+                  newest_first: bool) -> list:
+        """Split [start, end) into runs held by the hot database or by one archive.
+
+        Returns (year, low, high) triples in date order: year is the
+        archived year or None for the hot database, whose runs are bounded
+        by [low, high) so they stay out of archived years. Without
+        archives in range this is just the hot database, unbounded.
+        """
+        self._load_archives(conn)
+        years = sorted(year for year in self._archives
+                       if (start is None or start < f"{year + 1:04d}-01-01")
+                       and (end is None or f"{year:04d}-01-01" < end))
+        if not years:
+            return [(None, None, None)]
+        segments = []
+        low = None
+        for year in years:
+            first = f"{year:04d}-01-01"
+            if (low is None or low < first) and (start is None or start < first):
+                segments.append((None, low, first))
+            segments.append((year, None, None))
+            low = f"{year + 1:04d}-01-01"
+        if end is None or low < end:
+            segments.append((None, low, None))
+        return segments[::-1] if newest_first else segments
+
+    def _ranged_selects(self, conn: sqlite3.Connection, table: str, clauses: list,
+                        params: list, start: Optional[str], end: Optional[str],
+                        order: str, limit: bool = False):
+        """Yield (sql, params) reading ``table`` from every place [start, end) is stored.
+
+        Archived years never overlap the hot database, so running the
+        statements in turn and concatenating their rows gives ``order``
+        (newest first if it sorts date descending) over the whole range.
+        Archives are attached as their statement comes up. With ``limit``,
+        each statement ends in a LIMIT placeholder for the caller to fill.
+        """
+        newest_first = order.split(",")[0].strip().upper().endswith("DESC")
+        for year, low, high in self._segments(conn, start, end, newest_first):
+            schema = "main" if year is None else self._attach(conn, year)
+            segment_clauses, segment_params = list(clauses), list(params)
+            if low:
+                segment_clauses.append("date >= ?")
+                segment_params.append(low)
+            if high:
+                segment_clauses.append("date < ?")
+                segment_params.append(high)
+            where = f"WHERE {' AND '.join(segment_clauses)}" if segment_clauses else ""
+            tail = " LIMIT ?" if limit else ""
+            yield f"SELECT * FROM {schema}.{table} {where} ORDER BY {order}{tail}", segment_params
+
+    def _fetch_ranged(self, record_type, table: str, clauses: list, params: list, order: str,
+                      start: Optional[str] = None, end: Optional[str] = None,
+                      limit: Optional[int] = None) -> list:
+        """Fetch ``table`` rows as records across the hot database and archives.
+
+        See _ranged_selects; ``limit`` caps the total number of rows.
+        """
+        conn = self.read_conn
+        cursor = conn.cursor()
+        rows = []
+        for sql, args in self._ranged_selects(conn, table, clauses, params, start, end,
+                                              order, limit is not None):
+            if limit is not None:
+                args.append(limit - len(rows))
+            cursor.execute(sql, args)
+            batch = fetch_records(cursor, record_type)
+            if rows:
+                rows.extend(batch)
+            else:
+                rows = batch
+            if limit is not None and len(rows) >= limit:
+                break
+        return rows
+
+    def _inserted_ids(self, cursor, count: int) -> list:
+        """Return the ids of the last ``count`` rows inserted by executemany.
+
+        Rows inserted in one transaction on this connection get consecutive
+        ids, so they can be derived from ``last_insert_rowid()``.
+        """
+        cursor.execute("SELECT last_insert_rowid()")
+        last_id = cursor.fetchone()[0]
+        return list(range(last_id - count + 1, last_id + 1))
+
+    def _iter_rows(self, sql: str, params, chunk_size: int, row_type: str):
+        """Stream a query's rows in ``chunk_size`` batches.
+
+        ``row_type`` is "dict", "tuple", "namedtuple" or a record class from
+        records.py; money columns are converted to dollars whichever shape
+        is used.
+        """
+        if isinstance(row_type, type):
+            cursor = self.read_conn.cursor()
+            cursor.execute(sql, params)
+            cursor.row_factory = record_factory(row_type)
+            try:
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield from rows
+            finally:
+                cursor.close()
+            return
+
+        if row_type not in ("dict", "tuple", "namedtuple"):
+            raise ValueError(f"Unknown row type: {row_type}")
+
+        cursor = self.read_conn.cursor()
+        if row_type != "dict":
+            cursor.row_factory = None  # plain tuples, no sqlite3.Row wrapper
+        cursor.execute(sql, params)
+
+        columns = [column[0] for column in cursor.description]
+        money = [index for index, name in enumerate(columns) if name in MONEY_FIELDS]
+        make_row = None
+        if row_type == "namedtuple":
+            make_row = namedtuple("Row", columns)._make
+
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    if row_type == "dict":
+                        yield row_to_dict(row)
+                        continue
+                    if money:
+                        row = list(row)
+                        for index in money:
+                            row[index] = from_cents(row[index])
+                        row = tuple(row)
+                    yield make_row(row) if make_row else row
+        finally:
+            cursor.close()
+
+    def _iter_ranged(self, table: str, clauses: list, params: list, bounds: tuple,
+                     chunk_size: int, row_type: str):
+        """Stream ``table`` oldest first over the hot database and any archives in ``bounds``."""
+        conn = self.read_conn
+        for sql, args in self._ranged_selects(conn, table, clauses, params, *bounds, "date, id"):
+            # Each statement's cursor is closed before the next archive is attached
+            yield from self._iter_rows(sql, args, chunk_size, row_type)
+
+    def iter_purchases(self, year: Optional[int] = None, month: Optional[int] = None,
+                       start: Optional[str] = None, end: Optional[str] = None,
+                       category: Optional[str] = None, chunk_size: int = 1000,
+                       row_type: str = "dict"):
+        """Yield purchases oldest first without loading them all at once.
+
+        Filters work like ``date_filters``; see ``_iter_rows`` for row_type.
+        """
+        clauses, params = date_filters(year, month, start, end, category)
+        return self._iter_ranged("purchases", clauses, params, date_range(year, month, start, end),
+                                 chunk_size, row_type)
+
+    def iter_paychecks(self, year: Optional[int] = None, month: Optional[int] = None,
+                       start: Optional[str] = None, end: Optional[str] = None,
+                       chunk_size: int = 1000, row_type: str = "dict"):
+        """Yield paychecks oldest first without loading them all at once."""
+        clauses, params = date_filters(year, month, start, end)
+        return self._iter_ranged("paychecks", clauses, params, date_range(year, month, start, end),
+                                 chunk_size, row_type)
+
+    def iter_savings_transactions(self, savings_id: Optional[int] = None,
+                                  start: Optional[str] = None, end: Optional[str] = None,
+                                  chunk_size: int = 1000, row_type: str = "dict"):
+        """Yield savings transactions oldest first, for one or all accounts."""
+        clauses, params = date_filters(start=start, end=end)
+        if savings_id is not None:
+            clauses.insert(0, "savings_id = ?")
+            params.insert(0, savings_id)
+        return self._iter_ranged("savings_transactions", clauses, params,
+                                 date_range(start=start, end=end), chunk_size, row_type)
+
+    def iter_bill_account_transactions(self, start: Optional[str] = None,
+                                       end: Optional[str] = None, chunk_size: int = 1000,
+                                       row_type: str = "dict"):
+        """Yield bill account transactions oldest first without loading them all at once."""
+        clauses, params = date_filters(start=start, end=end)
+        return self._iter_ranged("bill_account_transactions", clauses, params,
+                                 date_range(start=start, end=end), chunk_size, row_type)
+
+    def iter_monthly_bills(self, category: Optional[str] = None, chunk_size: int = 1000,
+                           row_type: str = "dict"):
+        """Yield every monthly bill, inactive ones included, in the order they were added."""
+        clauses, params = date_filters(category=category)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._iter_rows(f"SELECT * FROM monthly_bills {where} ORDER BY id", params,
+                               chunk_size, row_type)
+
+    def count_rows(self, table: str, start: Optional[str] = None, end: Optional[str] = None,
+                   category: Optional[str] = None) -> int:
+        """Number of rows the matching iter_* method yields, archived years included.
+
+        ``start`` and ``end`` are ignored for monthly_bills, which aren't dated.
+        """
+        if table not in SCHEMA:
+            raise ValueError(f"Unknown table: {table}")
+        conn = self.read_conn
+        if table == "monthly_bills":
+            clauses, params = date_filters(category=category)
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            selects = [(f"SELECT * FROM monthly_bills {where}", params)]
+        else:
+            clauses, params = date_filters(start=start, end=end, category=category)
+            selects = self._ranged_selects(conn, table, clauses, params,
+                                           *date_range(start=start, end=end), "date")
+        return sum(conn.execute(f"SELECT COUNT(*) FROM ({sql})", args).fetchone()[0]
+                   for sql, args in selects)
+
     # Monthly Bills Methods
+    @serialized_write
     def add_monthly_bill(self, name: str, amount: float, due_day: Optional[int] = None,
                          category: Optional[str] = None) -> int:
         cursor = self.conn.cursor()
         cursor.execute("""
             INSERT INTO monthly_bills (name, amount, due_day, category)
             VALUES (?, ?, ?, ?)
-        """, (name, amount, due_day, category))
-        self.conn.commit()
+        """, (name, to_cents(amount), due_day, category))
+        self._touch("monthly_bills")
+        self._commit()
         return cursor.lastrowid
 
+    @cached_query("monthly_bills")
     def get_monthly_bills(self, active_only: bool = True) -> list:
-        cursor = self.conn.cursor()
+        cursor = self.read_conn.cursor()
         if active_only:
             cursor.execute("SELECT * FROM monthly_bills WHERE is_active = 1 ORDER BY due_day")
         else:
             cursor.execute("SELECT * FROM monthly_bills ORDER BY due_day")
-        return [dict(row) for row in cursor.fetchall()]
+        return fetch_records(cursor, Bill)
 
+    @serialized_write
     def update_monthly_bill(self, bill_id: int, name: str, amount: float,
                             due_day: Optional[int] = None, category: Optional[str] = None):
         cursor = self.conn.cursor()
         cursor.execute("""
             UPDATE monthly_bills SET name = ?, amount = ?, due_day = ?, category = ?
             WHERE id = ?
-        """, (name, amount, due_day, category, bill_id))
-        self.conn.commit()
+        """, (name, to_cents(amount), due_day, category, bill_id))
+        self._touch("monthly_bills")
+        self._commit()
 
+    @serialized_write
     def delete_monthly_bill(self, bill_id: int):
         cursor = self.conn.cursor()
         cursor.execute("UPDATE monthly_bills SET is_active = 0 WHERE id = ?", (bill_id,))
-        self.conn.commit()
+        self._touch("monthly_bills")
+        self._commit()
 
+    @cached_query("monthly_bills")
     def get_total_monthly_bills(self) -> float:
-        cursor = self.conn.cursor()
+        cursor = self.read_conn.cursor()
         cursor.execute("SELECT SUM(amount) FROM monthly_bills WHERE is_active = 1")
         result = cursor.fetchone()[0]
-        return result if result else 0.0
+        return from_cents(result) if result else 0.0
 
     # Paid Bills Methods
+    @serialized_write
     def mark_bill_paid(self, bill_id: int, year: int, month: int, paid_date: str):
         """Mark a bill as paid for a specific month."""
+        self._check_open([year])
         cursor = self.conn.cursor()
         cursor.execute("""
-            INSERT OR REPLACE INTO paid_bills (bill_id, year, month, paid_date)
+            INSERT INTO paid_bills (bill_id, year, month, paid_date)
             VALUES (?, ?, ?, ?)
+            ON CONFLICT(bill_id, year, month) DO UPDATE SET paid_date = excluded.paid_date
         """, (bill_id, year, month, paid_date))
-        self.conn.commit()
+        self._touch("paid_bills")
+        self._commit()
 
+    @serialized_write
     def mark_bill_unpaid(self, bill_id: int, year: int, month: int):
         """Mark a bill as unpaid for a specific month."""
+        self._check_open([year])
         cursor = self.conn.cursor()
         cursor.execute("""
             DELETE FROM paid_bills WHERE bill_id = ? AND year = ? AND month = ?
         """, (bill_id, year, month))
-        self.conn.commit()
+        self._touch("paid_bills")
+        self._commit()
 
+    @cached_query("paid_bills")
     def is_bill_paid(self, bill_id: int, year: int, month: int) -> bool:
         """Check if a bill is paid for a specific month."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT 1 FROM paid_bills WHERE bill_id = ? AND year = ? AND month = ?
+        conn = self.read_conn
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT 1 FROM {self._table(conn, "paid_bills", year)}
+            WHERE bill_id = ? AND year = ? AND month = ?
         """, (bill_id, year, month))
         return cursor.fetchone() is not None
 
+    @cached_query("paid_bills")
     def get_paid_bill_ids(self, year: int, month: int) -> set:
         """Get set of bill IDs that are paid for a specific month."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT bill_id FROM paid_bills WHERE year = ? AND month = ?
+        conn = self.read_conn
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT bill_id FROM {self._table(conn, "paid_bills", year)} WHERE year = ? AND month = ?
         """, (year, month))
         return {row[0] for row in cursor.fetchall()}
 
+    @cached_query("monthly_bills", "paid_bills")
     def get_unpaid_bills_total(self, year: int, month: int) -> float:
         """Get total amount of unpaid bills for a specific month."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
+        conn = self.read_conn
+        cursor = conn.cursor()
+        cursor.execute(f"""
             SELECT SUM(amount) FROM monthly_bills
             WHERE is_active = 1 AND id NOT IN (
-                SELECT bill_id FROM paid_bills WHERE year = ? AND month = ?
+                SELECT bill_id FROM {self._table(conn, "paid_bills", year)}
+                WHERE year = ? AND month = ?
             )
         """, (year, month))
         result = cursor.fetchone()[0]
-        return result if result else 0.0
+        return from_cents(result) if result else 0.0
 
     # Bill Account Methods
+    @cached_query("bill_account")
     def get_bill_account_balance(self) -> float:
         """Get the current bill account balance."""
-        cursor = self.conn.cursor()
+        cursor = self.read_conn.cursor()
         cursor.execute("SELECT balance FROM bill_account LIMIT 1")
         result = cursor.fetchone()
-        return result[0] if result else 0.0
+        return from_cents(result[0]) if result else 0.0
 
+    @serialized_write
     def add_bill_account_transaction(self, amount: float, transaction_type: str,
                                       date: str, notes: Optional[str] = None) -> int:
         """Add a transaction to the bill account."""
+        self._check_open([date])
         cursor = self.conn.cursor()
 
         # Add transaction record
         cursor.execute("""
             INSERT INTO bill_account_transactions (amount, transaction_type, date, notes)
             VALUES (?, ?, ?, ?)
-        """, (amount, transaction_type, date, notes))
+        """, (to_cents(amount), transaction_type, date, notes))
 
         # Update balance
         if transaction_type == "deposit":
-            cursor.execute("UPDATE bill_account SET balance = balance + ?", (amount,))
+            cursor.execute("UPDATE bill_account SET balance = balance + ?", (to_cents(amount),))
         else:  # withdraw
-            cursor.execute("UPDATE bill_account SET balance = balance - ?", (amount,))
+            cursor.execute("UPDATE bill_account SET balance = balance - ?", (to_cents(amount),))
 
-        self.conn.commit()
+        self._touch("bill_account_transactions", "bill_account")
+        self._commit()
         return cursor.lastrowid
 
+    @serialized_write
+    def add_bill_account_transactions_many(self, transactions) -> list:
+        """Insert many bill account transactions and update the balance once.
+
+        Each item is a dict with the same keys as
+        ``add_bill_account_transaction`` takes.
+        """
+        rows = [(to_cents(t["amount"]), t["transaction_type"], t["date"], t.get("notes"))
+                for t in transactions]
+        if not rows:
+            return []
+        self._check_open(row[2] for row in rows)
+        delta = sum(amount if trans_type == "deposit" else -amount
+                    for amount, trans_type, _, _ in rows)
+        cursor = self.conn.cursor()
+        self._touch("bill_account_transactions", "bill_account")
+        try:
+            cursor.executemany("""
+                INSERT INTO bill_account_transactions (amount, transaction_type, date, notes)
+                VALUES (?, ?, ?, ?)
+            """, rows)
+            ids = self._inserted_ids(cursor, len(rows))
+            cursor.execute("UPDATE bill_account SET balance = balance + ?", (delta,))
+        except Exception:
+            self._rollback()
+            raise
+        self._commit()
+        return ids
+
+    @cached_query("bill_account_transactions")
     def get_bill_account_transactions(self, limit: int = 50) -> list:
         """Get bill account transaction history."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT * FROM bill_account_transactions
-            ORDER BY date DESC, id DESC
-            LIMIT ?
-        """, (limit,))
-        return [dict(row) for row in cursor.fetchall()]
+        return self._fetch_ranged(Transaction, "bill_account_transactions", [], [],
+                                  "date DESC, id DESC", limit=limit)
 
+    @serialized_write
     def set_bill_account_balance(self, balance: float):
         """Set the bill account balance directly (for corrections)."""
         cursor = self.conn.cursor()
-        cursor.execute("UPDATE bill_account SET balance = ?", (balance,))
-        self.conn.commit()
+        cursor.execute("UPDATE bill_account SET balance = ?", (to_cents(balance),))
+        self._touch("bill_account")
+        self._commit()
 
     # Paycheck Methods
+    @serialized_write
     def add_paycheck(self, amount: float, date: str, source: Optional[str] = None,
                      notes: Optional[str] = None) -> int:
+        self._check_open([date])
         cursor = self.conn.cursor()
         cursor.execute("""
             INSERT INTO paychecks (amount, date, source, notes)
             VALUES (?, ?, ?, ?)
-        """, (amount, date, source, notes))
-        self.conn.commit()
+        """, (to_cents(amount), date, source, notes))
+        self._touch("paychecks")
+        self._commit()
         return cursor.lastrowid
 
-    def get_paychecks(self, year: Optional[int] = None, month: Optional[int] = None) -> list:
+    @serialized_write
+    def add_paychecks_many(self, paychecks) -> list:
+        """Insert many paychecks in one transaction and return their ids.
+
+        Each item is a dict with the same keys as ``add_paycheck`` takes.
+        """
+        rows = [(to_cents(p["amount"]), p["date"], p.get("source"), p.get("notes"))
+                for p in paychecks]
+        if not rows:
+            return []
+        self._check_open(row[1] for row in rows)
         cursor = self.conn.cursor()
-        if year and month:
-            cursor.execute("""
-                SELECT * FROM paychecks
-                WHERE strftime('%Y', date) = ? AND strftime('%m', date) = ?
-                ORDER BY date DESC
-            """, (str(year), f"{month:02d}"))
-        else:
-            cursor.execute("SELECT * FROM paychecks ORDER BY date DESC")
-        return [dict(row) for row in cursor.fetchall()]
+        self._touch("paychecks")
+        try:
+            cursor.executemany("""
+                INSERT INTO paychecks (amount, date, source, notes)
+                VALUES (?, ?, ?, ?)
+            """, rows)
+            ids = self._inserted_ids(cursor, len(rows))
+        except Exception:
+            self._rollback()
+            raise
+        self._commit()
+        return ids
+
+    def add_paycheck_with_split(self, amount: float, date: str, source: Optional[str] = None,
+                                notes: Optional[str] = None, bill_account: float = 0.0,
+                                savings: Optional[dict] = None) -> int:
+        """Add a paycheck and deposit parts of it in one transaction.
+
+        ``bill_account`` is deposited into the bill account and ``savings``
+        maps savings account ids to deposit amounts. Either everything is
+        saved or nothing is. Returns the new paycheck's id.
+        """
+        savings = {savings_id: share for savings_id, share in (savings or {}).items() if share}
+        allocated = to_cents(bill_account) + sum(to_cents(share) for share in savings.values())
+        if allocated > to_cents(amount):
+            raise ValueError("Paycheck split allocates more than the paycheck amount")
 
+        split_notes = f"From paycheck ({source})" if source else "From paycheck"
+        with self.transaction():
+            paycheck_id = self.add_paycheck(amount, date, source, notes)
+            if bill_account:
+                self.add_bill_account_transaction(bill_account, "deposit", date, split_notes)
+            for savings_id, share in savings.items():
+                self.add_savings_transaction(savings_id, share, "deposit", date, split_notes)
+        return paycheck_id
+
+    @cached_query("paychecks")
+    def get_paychecks(self, year: Optional[int] = None, month: Optional[int] = None) -> list:
+        clauses, params = date_filters(year, month)
+        return self._fetch_ranged(Paycheck, "paychecks", clauses, params, "date DESC",
+                                  *date_range(year, month))
+
+    @serialized_write
     def delete_paycheck(self, paycheck_id: int):
+        self._check_row_open("paychecks", paycheck_id)
         cursor = self.conn.cursor()
         cursor.execute("DELETE FROM paychecks WHERE id = ?", (paycheck_id,))
-        self.conn.commit()
+        self._touch("paychecks")
+        self._commit()
 
     # Purchase Methods
+    @serialized_write
     def add_purchase(self, name: str, amount: float, date: str, category: Optional[str] = None,
-                     receipt_path: Optional[str] = None, notes: Optional[str] = None) -> int:
+                     receipt_path: Optional[str] = None, notes: Optional[str] = None,
+                     receipt_pending: Optional[str] = None) -> int:
+        """Add a purchase and return its id.
+
+        ``receipt_pending`` is a receipt file still being copied into the
+        receipt store; finish_pending_receipt attaches it once it's there.
+        """
+        self._check_open([date])
         cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO purchases (name, amount, date, category, receipt_path, notes)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (name, amount, date, category, receipt_path, notes))
-        self.conn.commit()
-        return cursor.lastrowid
+        try:
+            cursor.execute("""
+                INSERT INTO purchases (name, amount, date, category, receipt_path, notes)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (name, to_cents(amount), date, category, receipt_path, notes))
+            purchase_id = cursor.lastrowid
+            if receipt_pending:
+                cursor.execute("INSERT INTO pending_receipts (purchase_id, source) VALUES (?, ?)",
+                               (purchase_id, receipt_pending))
+        except Exception:
+            self._rollback()
+            raise
+        self._touch("purchases")
+        self._commit()
+        return purchase_id
 
-    def get_purchases(self, year: Optional[int] = None, month: Optional[int] = None) -> list:
+    @serialized_write
+    def add_purchases_many(self, purchases) -> list:
+        """Insert many purchases in one transaction and return their ids.
+
+        Each item is a dict with the same keys as ``add_purchase`` takes.
+        """
+        purchases = list(purchases)
+        rows = [(p["name"], to_cents(p["amount"]), p["date"], p.get("category"),
+                 p.get("receipt_path"), p.get("notes")) for p in purchases]
+        if not rows:
+            return []
+        self._check_open(row[2] for row in rows)
         cursor = self.conn.cursor()
+        self._touch("purchases")
+        try:
+            cursor.executemany("""
+                INSERT INTO purchases (name, amount, date, category, receipt_path, notes)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+            ids = self._inserted_ids(cursor, len(rows))
+            pending = [(purchase_id, p["receipt_pending"])
+                       for purchase_id, p in zip(ids, purchases) if p.get("receipt_pending")]
+            if pending:
+                cursor.executemany(
+                    "INSERT INTO pending_receipts (purchase_id, source) VALUES (?, ?)", pending)
+        except Exception:
+            self._rollback()
+            raise
+        self._commit()
+        return ids
+
+    def get_purchases(self, year: Optional[int] = None, month: Optional[int] = None) -> list:
+        clauses, params = date_filters(year, month)
+        return self._fetch_ranged(Purchase, "purchases", clauses, params, "date DESC",
+                                  *date_range(year, month))
+
+    @cached_query("purchases")
+    def page_purchases(self, after: Optional[tuple] = None, limit: int = 500,
+                       year: Optional[int] = None, month: Optional[int] = None,
+                       category: Optional[str] = None) -> tuple:
+        """Get one page of purchases, newest first.
+
+        ``after`` is the continuation token returned with the previous page
+        (a (date, id) pair); pass None for the first page. Returns
+        (purchases, token), where token is None once there are no more pages.
+        Seeking past the token walks idx_purchases_date (which holds the id
+        as the rowid) instead of skipping rows with OFFSET.
+        """
+        clauses, params = date_filters(year, month, category=category)
+        low, high = date_range(year, month)
+        if after is not None:
+            clauses.append("(date, id) < (?, ?)")
+            params.extend(after)
+            # Archived years newer than the token have nothing left to page
+            token_end = f"{int(after[0][:4]) + 1:04d}-01-01"
+            high = min(high, token_end) if high else token_end
+
+        purchases = self._fetch_ranged(Purchase, "purchases", clauses, params,
+                                       "date DESC, id DESC", low, high, limit)
+        token = None
+        if len(purchases) == limit:
+            token = (purchases[-1]["date"], purchases[-1]["id"])
+        return purchases, token
+
+    @cached_query("monthly_rollups")
+    def get_purchases_total(self, year: Optional[int] = None,
+                            month: Optional[int] = None) -> float:
+        """Get the total spent on purchases for a month, or for all time."""
+        cursor = self.read_conn.cursor()
         if year and month:
             cursor.execute("""
-                SELECT * FROM purchases
-                WHERE strftime('%Y', date) = ? AND strftime('%m', date) = ?
-                ORDER BY date DESC
-            """, (str(year), f"{month:02d}"))
+                SELECT SUM(total) FROM monthly_rollups
+                WHERE year = ? AND month = ? AND kind = 'purchase'
+            """, (year, month))
         else:
-            cursor.execute("SELECT * FROM purchases ORDER BY date DESC")
-        return [dict(row) for row in cursor.fetchall()]
+            cursor.execute("SELECT SUM(total) FROM monthly_rollups WHERE kind = 'purchase'")
+        result = cursor.fetchone()[0]
+        return from_cents(result) if result else 0.0
+
+    @cached_query("purchases")
+    def search_purchases(self, query: str, limit: int = 50,
+                         year: Optional[int] = None, month: Optional[int] = None) -> list:
+        """Find purchases whose name, notes or category match ``query``.
+
+        Every word of ``query`` has to match (the last one as a prefix).
+        The newest SEARCH_CANDIDATES matches are ranked by relevance, name
+        matches first, then newest first. Matches from archived years
+        follow those from the hot database, newest year first. Without FTS5
+        this falls back to a much slower LIKE scan.
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        conn = self.read_conn
+        cursor = conn.cursor()
+        purchases = []
+        for archive_year, low, high in self._segments(conn, *date_range(year, month), True):
+            schema = "main" if archive_year is None else self._attach(conn, archive_year)
+            clauses, params = date_filters(year, month, low, high)
+            remaining = limit - len(purchases)
+            if HAS_FTS5:
+                # Scoring every match of a short prefix like "gr" takes most of
+                # a second over a million rows, so only the newest matches are
+                # ranked: walking the index in rowid order stops at the limit.
+                # CROSS JOIN keeps the index as the outer loop when filtering.
+                join = where = ""
+                if clauses:
+                    join = f"CROSS JOIN {schema}.purchases p ON p.id = purchases_fts.rowid"
+                    where = "".join(f" AND p.{clause}" for clause in clauses)
+                cursor.execute(f"""
+                    SELECT p.* FROM (
+                        SELECT purchases_fts.rowid AS id,
+                               bm25(purchases_fts, ?, ?, ?) AS score
+                        FROM {schema}.purchases_fts {join}
+                        WHERE purchases_fts MATCH ?{where}
+                        ORDER BY purchases_fts.rowid DESC
+                        LIMIT ?
+                    ) AS matches
+                    JOIN {schema}.purchases p ON p.id = matches.id
+                    ORDER BY matches.score, p.date DESC, p.id DESC
+                    LIMIT ?
+                """, (*SEARCH_WEIGHTS, match, *params, SEARCH_CANDIDATES, remaining))
+            else:
+                for word in query.split():
+                    clauses.append("(name LIKE ? OR notes LIKE ? OR category LIKE ?)")
+                    params.extend([f"%{word}%"] * 3)
+                cursor.execute(f"""
+                    SELECT * FROM {schema}.purchases WHERE {' AND '.join(clauses)}
+                    ORDER BY date DESC, id DESC
+                    LIMIT ?
+                """, (*params, remaining))
+            purchases.extend(fetch_records(cursor, Purchase))
+            if len(purchases) >= limit:
+                break
+        return purchases
 
+    @serialized_write
     def delete_purchase(self, purchase_id: int):
+        self._check_row_open("purchases", purchase_id)
         cursor = self.conn.cursor()
         cursor.execute("DELETE FROM purchases WHERE id = ?", (purchase_id,))
-        self.conn.commit()
+        self._touch("purchases")
+        self._commit()
 
     # Savings Methods
+    @serialized_write
     def add_savings_account(self, name: str, current_amount: float = 0,
                             goal_amount: Optional[float] = None) -> int:
         cursor = self.conn.cursor()
         cursor.execute("""
             INSERT INTO savings (name, current_amount, goal_amount)
             VALUES (?, ?, ?)
-        """, (name, current_amount, goal_amount))
-        self.conn.commit()
+        """, (name, to_cents(current_amount), to_cents(goal_amount)))
+        self._touch("savings")
+        self._commit()
         return cursor.lastrowid
 
+    @cached_query("savings")
     def get_savings_accounts(self) -> list:
-        cursor = self.conn.cursor()
+        cursor = self.read_conn.cursor()
         cursor.execute("SELECT * FROM savings ORDER BY name")
-        return [dict(row) for row in cursor.fetchall()]
+        return fetch_records(cursor, SavingsAccount)
 
+    @serialized_write
     def update_savings_account(self, savings_id: int, name: str,
                                goal_amount: Optional[float] = None):
         cursor = self.conn.cursor()
         cursor.execute("""
             UPDATE savings SET name = ?, goal_amount = ? WHERE id = ?
-        """, (name, goal_amount, savings_id))
-        self.conn.commit()
+        """, (name, to_cents(goal_amount), savings_id))
+        self._touch("savings")
+        self._commit()
 
+    @serialized_write
     def add_savings_transaction(self, savings_id: int, amount: float,
                                 transaction_type: str, date: str,
                                 notes: Optional[str] = None) -> int:
+        self._check_open([date])
         cursor = self.conn.cursor()
         # Add transaction
         cursor.execute("""
             INSERT INTO savings_transactions (savings_id, amount, transaction_type, date, notes)
             VALUES (?, ?, ?, ?, ?)
-        """, (savings_id, amount, transaction_type, date, notes))
+        """, (savings_id, to_cents(amount), transaction_type, date, notes))
 
         # Update current amount
         if transaction_type == "deposit":
             cursor.execute("""
                 UPDATE savings SET current_amount = current_amount + ? WHERE id = ?
-            """, (amount, savings_id))
+            """, (to_cents(amount), savings_id))
         else:
             cursor.execute("""
                 UPDATE savings SET current_amount = current_amount - ? WHERE id = ?
-            """, (amount, savings_id))
+            """, (to_cents(amount), savings_id))
 
-        self.conn.commit()
+        self._touch("savings_transactions", "savings")
+        self._commit()
         return cursor.lastrowid
 
-    def get_savings_transactions(self, savings_id: int) -> list:
+    @serialized_write
+    def add_savings_transactions_many(self, transactions) -> list:
+        """Insert many savings transactions and update each account once.
+
+        Each item is a dict with the same keys as ``add_savings_transaction``
+        takes.
+        """
+        rows = [(t["savings_id"], to_cents(t["amount"]), t["transaction_type"], t["date"],
+                 t.get("notes")) for t in transactions]
+        if not rows:
+            return []
+        self._check_open(row[3] for row in rows)
+        deltas = {}
+        for savings_id, amount, trans_type, _, _ in rows:
+            signed = amount if trans_type == "deposit" else -amount
+            deltas[savings_id] = deltas.get(savings_id, 0) + signed
         cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT * FROM savings_transactions WHERE savings_id = ? ORDER BY date DESC
-        """, (savings_id,))
-        return [dict(row) for row in cursor.fetchall()]
+        self._touch("savings_transactions", "savings")
+        try:
+            cursor.executemany("""
+                INSERT INTO savings_transactions (savings_id, amount, transaction_type, date, notes)
+                VALUES (?, ?, ?, ?, ?)
+            """, rows)
+            ids = self._inserted_ids(cursor, len(rows))
+            cursor.executemany("""
+                UPDATE savings SET current_amount = current_amount + ? WHERE id = ?
+            """, [(delta, savings_id) for savings_id, delta in deltas.items()])
+        except Exception:
+            self._rollback()
+            raise
+        self._commit()
+        return ids
 
+    def get_savings_transactions(self, savings_id: int) -> list:
+        return self._fetch_ranged(Transaction, "savings_transactions", ["savings_id = ?"],
+                                  [savings_id], "date DESC")
+
+    @cached_query("savings_transactions")
+    def page_savings_transactions(self, savings_id: int, after: Optional[tuple] = None,
+                                  limit: int = 500) -> tuple:
+        """Get one page of a savings account's transactions, newest first.
+
+        Works like ``page_purchases``: pass the returned (date, id) token as
+        ``after`` to fetch the next page; the token is None on the last page.
+        """
+        clauses, params = ["savings_id = ?"], [savings_id]
+        high = None
+        if after is not None:
+            clauses.append("(date, id) < (?, ?)")
+            params.extend(after)
+            high = f"{int(after[0][:4]) + 1:04d}-01-01"
+        transactions = self._fetch_ranged(Transaction, "savings_transactions", clauses, params,
+                                          "date DESC, id DESC", end=high, limit=limit)
+        token = None
+        if len(transactions) == limit:
+            token = (transactions[-1]["date"], transactions[-1]["id"])
+        return transactions, token
+
+    @cached_query("savings")
     def get_total_savings(self) -> float:
-        cursor = self.conn.cursor()
+        cursor = self.read_conn.cursor()
         cursor.execute("SELECT SUM(current_amount) FROM savings")
         result = cursor.fetchone()[0]
-        return result if result else 0.0
+        return from_cents(result) if result else 0.0
 
+    @serialized_write
     def delete_savings_account(self, savings_id: int):
         cursor = self.conn.cursor()
         cursor.execute("DELETE FROM savings_transactions WHERE savings_id = ?", (savings_id,))
         cursor.execute("DELETE FROM savings WHERE id = ?", (savings_id,))
-        self.conn.commit()
+        self._touch("savings_transactions", "savings")
+        self._commit()
 
     # Monthly Page Methods
+    @serialized_write
     def get_or_create_monthly_page(self, year: int, month: int) -> dict:
         cursor = self.conn.cursor()
         cursor.execute("""
@@ -394,23 +1841,31 @@ class Database:
         """, (year, month))
         row = cursor.fetchone()
         if row:
-            return dict(row)
+            return row_to_dict(row)
         else:
             cursor.execute("""
                 INSERT INTO monthly_pages (year, month) VALUES (?, ?)
             """, (year, month))
-            self.conn.commit()
+            self._touch("monthly_pages")
+            self._commit()
             return {"id": cursor.lastrowid, "year": year, "month": month, "notes": None}
 
+    @cached_query("monthly_rollups", "monthly_bills")
     def get_monthly_summary(self, year: int, month: int) -> dict:
         """Get a summary for a specific month."""
-        # Get paychecks for month
-        paychecks = self.get_paychecks(year, month)
-        total_income = sum(p["amount"] for p in paychecks)
+        cursor = self.read_conn.cursor()
+        cursor.execute("""
+            SELECT kind, SUM(total) AS total, SUM(count) AS count
+            FROM monthly_rollups
+            WHERE year = ? AND month = ? AND kind IN ('paycheck', 'purchase')
+            GROUP BY kind
+        """, (year, month))
+        rollups = {row["kind"]: row for row in cursor.fetchall()}
+        paychecks = rollups.get("paycheck")
+        purchases = rollups.get("purchase")
 
-        # Get purchases for month
-        purchases = self.get_purchases(year, month)
-        total_purchases = sum(p["amount"] for p in purchases)
+        total_income = from_cents(paychecks["total"]) if paychecks else 0.0
+        total_purchases = from_cents(purchases["total"]) if purchases else 0.0
 
         # Get monthly bills
         total_bills = self.get_total_monthly_bills()
@@ -420,9 +1875,504 @@ class Database:
             "total_purchases": total_purchases,
             "total_bills": total_bills,
             "remaining": total_income - total_purchases - total_bills,
-            "paycheck_count": len(paychecks),
-            "purchase_count": len(purchases)
+            "paycheck_count": paychecks["count"] if paychecks else 0,
+            "purchase_count": purchases["count"] if purchases else 0
         }
 
+    @serialized_write
+    def rebuild_rollups(self):
+        """Recompute monthly_rollups from scratch (for repair).
+
+        Archived years keep the purchase and paycheck rollups they had when
+        they were archived.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            DELETE FROM monthly_rollups WHERE year NOT IN (SELECT year FROM archived_years)
+        """)
+        cursor.execute("""
+            INSERT INTO monthly_rollups (year, month, kind, category, total, count)
+            SELECT CAST(substr(date, 1, 4) AS INTEGER), CAST(substr(date, 6, 2) AS INTEGER),
+                   'purchase', COALESCE(category, ''), SUM(amount), COUNT(*)
+            FROM purchases GROUP BY 1, 2, 4
+        """)
+        cursor.execute("""
+            INSERT INTO monthly_rollups (year, month, kind, category, total, count)
+            SELECT CAST(substr(date, 1, 4) AS INTEGER), CAST(substr(date, 6, 2) AS INTEGER),
+                   'paycheck', '', SUM(amount), COUNT(*)
+            FROM paychecks GROUP BY 1, 2
+        """)
+        cursor.execute("""
+            INSERT INTO monthly_rollups (year, month, kind, category, total, count)
+            SELECT pb.year, pb.month, 'bill_paid', COALESCE(b.category, ''),
+                   SUM(b.amount), COUNT(*)
+            FROM paid_bills pb JOIN monthly_bills b ON b.id = pb.bill_id
+            WHERE b.is_active = 1
+            GROUP BY 1, 2, 4
+        """)
+        self._touch("monthly_rollups")
+        self._commit()
+
+    @cached_query("monthly_bills", "paid_bills", "monthly_rollups", "paychecks",
+                  "savings", "bill_account")
+    def get_dashboard_snapshot(self, year: int, month: int) -> dict:
+        """Get everything the dashboard shows for a month, aggregated in SQL."""
+        start, end = month_bounds(year, month)
+        conn = self.read_conn
+        # Archives can't be attached once the read transaction has begun
+        paid_bills = self._table(conn, "paid_bills", year)
+        paychecks = self._table(conn, "paychecks", year)
+        cursor = conn.cursor()
+        # One read transaction so every figure comes from the same snapshot.
+        # On the write connection (":memory:", or inside transaction()) the
+        # transaction isn't ours to begin or commit; holding the write lock
+        # keeps other writes out instead.
+        shared = conn is self.conn
+        if shared:
+            self.pool.write_lock.acquire()
+        else:
+            cursor.execute("BEGIN")
+        try:
+            # Paid bills are summed from paid_bills, archived years included,
+            # at what the bills cost now
+            cursor.execute(f"""
+                SELECT
+                    (SELECT COALESCE(SUM(amount), 0) FROM monthly_bills
+                     WHERE is_active = 1) AS total_bills,
+                    (SELECT COALESCE(SUM(amount), 0) FROM monthly_bills
+                     WHERE is_active = 1 AND id IN (
+                         SELECT bill_id FROM {paid_bills}
+                         WHERE year = :year AND month = :month
+                     )) AS paid_bills_total,
+                    (SELECT COALESCE(SUM(total), 0) FROM monthly_rollups
+                     WHERE year = :year AND month = :month
+                       AND kind = 'paycheck') AS total_income,
+                    (SELECT COALESCE(SUM(count), 0) FROM monthly_rollups
+                     WHERE year = :year AND month = :month
+                       AND kind = 'paycheck') AS paycheck_count,
+                    (SELECT COALESCE(SUM(total), 0) FROM monthly_rollups
+                     WHERE year = :year AND month = :month
+                       AND kind = 'purchase') AS total_spending,
+                    (SELECT COALESCE(SUM(count), 0) FROM monthly_rollups
+                     WHERE year = :year AND month = :month
+                       AND kind = 'purchase') AS purchase_count,
+                    (SELECT COALESCE(SUM(current_amount), 0) FROM savings) AS total_savings,
+                    (SELECT COALESCE(MAX(balance), 0) FROM bill_account) AS bill_account_balance
+            """, {"year": year, "month": month})
+            snapshot = dict(cursor.fetchone())
+            snapshot["unpaid_bills_total"] = snapshot["total_bills"] - snapshot["paid_bills_total"]
+            for key in ("total_bills", "paid_bills_total", "unpaid_bills_total",
+                        "total_income", "total_spending", "total_savings",
+                        "bill_account_balance"):
+                snapshot[key] = from_cents(snapshot[key])
+
+            cursor.execute("""
+                SELECT NULLIF(category, '') AS category, total
+                FROM monthly_rollups
+                WHERE year = ? AND month = ? AND kind = 'purchase' AND count > 0
+                ORDER BY total DESC
+            """, (year, month))
+            snapshot["spending_by_category"] = [row_to_dict(row) for row in cursor.fetchall()]
+
+            cursor.execute(f"""
+                SELECT b.*, pb.id IS NOT NULL AS paid
+                FROM monthly_bills b
+                LEFT JOIN {paid_bills} pb
+                    ON pb.bill_id = b.id AND pb.year = ? AND pb.month = ?
+                WHERE b.is_active = 1
+                ORDER BY b.due_day
+            """, (year, month))
+            snapshot["bills"] = fetch_records(cursor, Bill)
+
+            cursor.execute(f"""
+                SELECT * FROM {paychecks}
+                WHERE date >= ? AND date < ?
+                ORDER BY date DESC
+            """, (start, end))
+            snapshot["paychecks"] = fetch_records(cursor, Paycheck)
+
+            cursor.execute("SELECT * FROM savings ORDER BY name")
+            snapshot["savings_accounts"] = fetch_records(cursor, SavingsAccount)
+        finally:
+            if shared:
+                self.pool.write_lock.release()
+            else:
+                conn.commit()
+
+        return snapshot
+
+    # Receipt Methods
+    @serialized_write
+    def add_receipt(self, key: str, size: int, original_size: Optional[int] = None):
+        """Record a file added to the receipt store under ``key``.
+
+        Adding a key that's already recorded updates its size (and its
+        original_size, if given) and marks it as freshly added, so
+        collect_orphan_receipts leaves it alone until a purchase has had
+        time to reference it.
+        """
+        self.conn.execute("""
+            INSERT INTO receipts (key, size, original_size) VALUES (?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET
+                size = excluded.size,
+                original_size = COALESCE(excluded.original_size, original_size),
+                added_at = CURRENT_TIMESTAMP
+        """, (key, size, original_size))
+        self._touch("receipts")
+        self._commit()
+
+    def get_receipt_keys(self) -> set:
+        """Keys of every receipt in the store."""
+        return {row[0] for row in self.read_conn.execute("SELECT key FROM receipts")}
+
+    def get_receipt_stats(self) -> dict:
+        """Receipt count, bytes stored, bytes as attached, and bytes the purchases' receipts add up to."""
+        row = self.read_conn.execute("""
+            SELECT COUNT(*), COALESCE(SUM(size), 0),
+                   COALESCE(SUM(COALESCE(original_size, size)), 0),
+                   COALESCE(SUM(size * refs), 0)
+            FROM receipts
+        """).fetchone()
+        return {"receipts": row[0], "stored_bytes": row[1], "original_bytes": row[2],
+                "referenced_bytes": row[3]}
+
+    def get_uncompressed_receipts(self) -> dict:
+        """Size by key of each receipt stored as attached, never compressed."""
+        return dict(self.read_conn.execute(
+            "SELECT key, size FROM receipts WHERE original_size IS NULL"))
+
+    @serialized_write
+    def set_receipt_compressed(self, key: str, size: int, original_size: int):
+        """Record that receipt ``key`` was compressed from ``original_size`` to ``size`` bytes."""
+        self.conn.execute("UPDATE receipts SET size = ?, original_size = ? WHERE key = ?",
+                          (size, original_size, key))
+        self._touch("receipts")
+        self._commit()
+
+    @serialized_write
+    def collect_orphan_receipts(self, grace_seconds: float = 3600) -> list:
+        """Forget receipts no purchase uses and return their keys.
+
+        Receipts added within the last ``grace_seconds`` are kept, since
+        the purchase they were added for may not be written yet. The
+        caller deletes the returned keys' files.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            DELETE FROM receipts
+            WHERE refs <= 0 AND added_at < datetime('now', ?)
+            RETURNING key
+        """, (f"-{grace_seconds} seconds",))
+        keys = [row[0] for row in cursor.fetchall()]
+        self._touch("receipts")
+        self._commit()
+        return keys
+
+    def get_pending_receipts(self) -> dict:
+        """Purchase id -> receipt file still waiting to be stored for it."""
+        return dict(self.read_conn.execute("SELECT purchase_id, source FROM pending_receipts"))
+
+    @serialized_write
+    def finish_pending_receipt(self, source: str, key: Optional[str]) -> int:
+        """Attach stored receipt ``key`` to the purchases waiting on ``source``.
+
+        A ``key`` of None (the copy failed or was cancelled) leaves them
+        without a receipt. Either way they stop waiting. Returns how many
+        purchases were waiting.
+        """
+        cursor = self.conn.cursor()
+        try:
+            if key:
+                cursor.execute("""
+                    UPDATE purchases SET receipt_path = ?
+                    WHERE id IN (SELECT purchase_id FROM pending_receipts WHERE source = ?)
+                """, (key, source))
+            cursor.execute("DELETE FROM pending_receipts WHERE source = ?", (source,))
+        except Exception:
+            self._rollback()
+            raise
+        self._touch("purchases", "pending_receipts")
+        self._commit()
+        return cursor.rowcount
+
+    def get_legacy_receipt_paths(self) -> dict:
+        """Receipt paths that aren't receipt store keys, from before the store.
+
+        Maps each path to whether an archived year's purchases use it, as
+        those can't be pointed at the store until the year is restored.
+        """
+        conn = self.read_conn
+        paths = {}
+        for year in [None, *sorted(self._archives)]:
+            table = self._table(conn, "purchases", year)
+            for (path,) in conn.execute(f"""
+                SELECT DISTINCT receipt_path FROM {table}
+                WHERE receipt_path IS NOT NULL
+                  AND receipt_path NOT IN (SELECT key FROM main.receipts)
+            """):
+                paths[path] = paths.get(path, False) or year is not None
+        return paths
+
+    @serialized_write
+    def replace_receipt_path(self, old: str, new: str) -> int:
+        """Point every purchase using receipt ``old`` at ``new``. Returns the count.
+
+        Archived purchases keep ``old``.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("UPDATE purchases SET receipt_path = ? WHERE receipt_path = ?",
+                       (new, old))
+        self._touch("purchases")
+        self._commit()
+        return cursor.rowcount
+
+    # Archive Methods
+    def archive_path(self, year: int) -> str:
+        """Path of the file ``year`` is archived to, next to the database."""
+        path = Path(self.db_path)
+        return str(path.with_name(f"{path.stem}-archive-{year}{path.suffix}"))
+
+    def get_archived_years(self) -> list:
+        """Archived years, oldest first."""
+        return sorted(self._archives)
+
+    def _columns(self, schema: str, table: str) -> str:
+        """Comma-separated column names of ``schema.table`` on the write connection."""
+        rows = self.conn.execute(f"PRAGMA {schema}.table_info({table})").fetchall()
+        return ", ".join(row[1] for row in rows)
+
+    @serialized_write
+    def archive_year(self, year: int, vacuum: bool = True) -> dict:
+        """Move a closed year's rows into an archive file of their own.
+
+        The year's purchases, paychecks, savings and bill account
+        transactions and paid bills are copied to ``archive_path(year)``
+        and deleted here; its purchase and paycheck monthly_rollups stay, so
+        totals don't change. Its paid bill rollups go: they're priced at the
+        bills' current amounts, which the triggers can't follow into the
+        archive.
+        Reads whose range reaches an archived year attach its file; writes
+        into it raise ArchivedYearError until restore_year brings it back.
+        ``vacuum`` shrinks the database file afterwards. Returns the number
+        of rows moved per table.
+        """
+        if self.db_path == ":memory:":
+            raise ValueError("An in-memory database can't be archived")
+        if year >= datetime.now().year:
+            raise ValueError(f"{year} isn't over yet, so it can't be archived")
+        if year in self._archives:
+            raise ValueError(f"{year} is already archived")
+        if self._transaction_depth:
+            raise sqlite3.ProgrammingError("archive_year can't run inside transaction()")
+
+        path = self.archive_path(year)
+        if os.path.exists(path):
+            # Left over from an interrupted archive_year or a restore_year
+            os.remove(path)
+        start, end = f"{year:04d}-01-01", f"{year + 1:04d}-01-01"
+        filters = {table: ("year = ?", (year,)) if table == "paid_bills"
+                   else ("date >= ? AND date < ?", (start, end))
+                   for table in ARCHIVED_TABLES}
+
+        # Fill the archive and commit it before touching the hot database:
+        # with WAL, a transaction over both files isn't atomic across them.
+        # If the app stops in between, the year isn't archived yet and the
+        # half-made file is replaced next time.
+        self.conn.commit()
+        self.conn.execute("ATTACH DATABASE ? AS archive_new", (path,))
+        counts = {}
+        try:
+            self.conn.execute("PRAGMA archive_new.journal_mode = DELETE").fetchall()
+            self.conn.execute("BEGIN IMMEDIATE")
+            for table in ARCHIVED_TABLES:
+                self.conn.execute(f"CREATE TABLE archive_new.{table} ({archive_columns(table)})")
+                columns = self._columns("archive_new", table)
+                where, params = filters[table]
+                cursor = self.conn.execute(f"""
+                    INSERT INTO archive_new.{table} ({columns})
+                    SELECT {columns} FROM main.{table} WHERE {where}
+                """, params)
+                counts[table] = cursor.rowcount
+            for name, columns in INDEXES.items():
+                if columns.split("(")[0] in ARCHIVED_TABLES:
+                    self.conn.execute(f"CREATE INDEX archive_new.{name} ON {columns}")
+            if HAS_FTS5:
+                self.conn.execute(PURCHASES_FTS.format(schema="archive_new"))
+                self.conn.execute("""
+                    INSERT INTO archive_new.purchases_fts (purchases_fts) VALUES ('rebuild')
+                """)
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        finally:
+            self.conn.execute("DETACH DATABASE archive_new")
+
+        archives = self._archives
+        with self.transaction():
+            # Deleting fires the rollup triggers, so put the year's rollups back
+            rollups = self.conn.execute(
+                "SELECT * FROM monthly_rollups WHERE year = ? AND kind != 'bill_paid'", (year,)
+            ).fetchall()
+            # Archived purchases still use their receipts, so the deletes
+            # below mustn't count those references as gone
+            where, params = filters["purchases"]
+            self.conn.execute(RECEIPT_REFS_UPDATE.format(sign="+", schema="main", where=where),
+                              params)
+            for table in ARCHIVED_TABLES:
+                where, params = filters[table]
+                self.conn.execute(f"DELETE FROM main.{table} WHERE {where}", params)
+            self.conn.execute("DELETE FROM monthly_rollups WHERE year = ?", (year,))
+            self.conn.executemany("""
+                INSERT INTO monthly_rollups (year, month, kind, category, total, count)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [tuple(row) for row in rollups])
+            self.conn.execute("INSERT INTO archived_years (year, file) VALUES (?, ?)",
+                              (year, os.path.basename(path)))
+            # Switched before the commit, so a read racing it finds the rows
+            # in the archive rather than nowhere
+            self._archives = {**archives, year: os.path.basename(path)}
+            self._archive_generation += 1
+            self._touch(*ARCHIVED_TABLES)
+        if vacuum:
+            self.conn.execute("VACUUM")
+        return counts
+
+    @serialized_write
+    def restore_year(self, year: int) -> dict:
+        """Move an archived year's rows back into the database.
+
+        The year's rollups are recomputed from the restored rows. Savings
+        transactions of accounts deleted since are dropped. The archive
+        file is deleted afterwards. Returns the number of rows restored per
+        table.
+        """
+        if year not in self._archives:
+            raise ValueError(f"{year} isn't archived")
+        if self._transaction_depth:
+            raise sqlite3.ProgrammingError("restore_year can't run inside transaction()")
+
+        path = str(Path(self.db_path).absolute().with_name(self._archives[year]))
+        orphans = {"savings_transactions": "WHERE savings_id IN (SELECT id FROM main.savings)"}
+        counts = {}
+        self.conn.commit()
+        self.conn.execute("ATTACH DATABASE ? AS archive_restore", (path,))
+        try:
+            with self.transaction():
+                # The inserts below add the year's rollups and receipt
+                # references back through the triggers
+                self.conn.execute("DELETE FROM monthly_rollups WHERE year = ?", (year,))
+                self.conn.execute(RECEIPT_REFS_UPDATE.format(
+                    sign="-", schema="archive_restore", where="1"))
+                for table in ARCHIVED_TABLES:
+                    # Older archives may lack columns added since; they get defaults
+                    columns = self._columns("archive_restore", table)
+                    cursor = self.conn.execute(f"""
+                        INSERT INTO main.{table} ({columns})
+                        SELECT {columns} FROM archive_restore.{table}
+                        {orphans.get(table, "")}
+                    """)
+                    counts[table] = cursor.rowcount
+                self.conn.execute("DELETE FROM archived_years WHERE year = ?", (year,))
+                self._touch(*ARCHIVED_TABLES)
+        finally:
+            self.conn.execute("DETACH DATABASE archive_restore")
+        self._archives = {key: value for key, value in self._archives.items() if key != year}
+        self._archive_generation += 1
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # Still open elsewhere; archive_year replaces it if needed
+        return counts
+
     def close(self):
-        self.conn.close()
+        self.pool.close_all()
+
+
+# Schema migrations. Entry N upgrades a database from user_version N to N + 1;
+# fresh databases are created with the current schema and run every
+# migration as a no-op.
+
+def _rebuild_table(db: Database, table: str, select_columns: dict):
+    """Rewrite ``table`` into the current SCHEMA definition in batches.
+
+    Rows are copied into ``<table>__new`` a batch per transaction so a large
+    table never holds the write lock for long; if the app is interrupted,
+    the next run resumes from the last copied id. The old table is swapped
+    out in one final transaction. ``select_columns`` maps each column to the
+    SQL expression that produces its new value.
+    """
+    new_table = f"{table}__new"
+    columns = ", ".join(select_columns)
+    expressions = ", ".join(select_columns.values())
+    cursor = db.conn.cursor()
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {new_table} ({SCHEMA[table]})")
+    db.conn.commit()
+
+    while True:
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {new_table}")
+        last_id = cursor.fetchone()[0]
+        cursor.execute(f"""
+            INSERT INTO {new_table} ({columns})
+            SELECT {expressions} FROM {table}
+            WHERE id > ? ORDER BY id LIMIT ?
+        """, (last_id, MIGRATION_BATCH_SIZE))
+        copied = cursor.rowcount
+        db.conn.commit()
+        if copied < MIGRATION_BATCH_SIZE:
+            break
+
+    cursor.execute("BEGIN")
+    cursor.execute(f"DROP TABLE {table}")
+    cursor.execute(f"ALTER TABLE {new_table} RENAME TO {table}")
+    db.conn.commit()
+
+
+def _migrate_money_to_cents(db: Database):
+    """Version 1: store every money column as INTEGER cents instead of REAL."""
+    for table, money_columns in MONEY_COLUMNS.items():
+        info = {row["name"]: row["type"].upper()
+                for row in db.conn.execute(f"PRAGMA table_info({table})")}
+        if all(info.get(column) != "REAL" for column in money_columns):
+            continue  # Missing or already created with INTEGER cents
+        select_columns = {
+            column: (f"CAST(ROUND({column} * 100) AS INTEGER)"
+                     if column in money_columns else column)
+            for column in info
+        }
+        _rebuild_table(db, table, select_columns)
+
+
+def _migrate_monthly_rollups(db: Database):
+    """Version 2: backfill monthly_rollups from existing rows."""
+    db.rebuild_rollups()
+
+
+def _migrate_purchase_search(db: Database):
+    """Version 3: index existing purchases for full-text search."""
+    if HAS_FTS5:
+        db.conn.execute("INSERT INTO purchases_fts (purchases_fts) VALUES ('rebuild')")
+
+
+def _migrate_receipt_original_size(db: Database):
+    """Version 4: add receipts.original_size for compressed receipts."""
+    columns = {row["name"] for row in db.conn.execute("PRAGMA table_info(receipts)")}
+    if "original_size" not in columns:
+        db.conn.execute("ALTER TABLE receipts ADD COLUMN original_size INTEGER")
+
+
+def _migrate_archived_bill_rollups(db: Database):
+    """Version 5: drop paid bill rollups of archived years, which go stale."""
+    db.conn.execute("""
+        DELETE FROM monthly_rollups
+        WHERE kind = 'bill_paid' AND year IN (SELECT year FROM archived_years)
+    """)
+
+
+MIGRATIONS = [
+    _migrate_money_to_cents,
+    _migrate_monthly_rollups,
+    _migrate_purchase_search,
+    _migrate_receipt_original_size,
+    _migrate_archived_bill_rollups,
+]
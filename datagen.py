@@ -0,0 +1,181 @@
+"""Synthetic NekoBudget databases for benchmarks and testing.
+
+Fills a database file with realistic-looking bills, paychecks, purchases,
+savings and bill account activity. The same seed, scale and end month
+always produce the same data::
+
+    python datagen.py bench-10y.db --scale 10y --seed 42
+"""
+
+import argparse
+import calendar
+import os
+import random
+import time
+from datetime import date, timedelta
+from typing import Optional
+
+from database import Database
+
+# years: how far back the data goes; purchases: total purchase count,
+# spread over those years (otherwise purchases_per_day on average)
+SCALES = {
+    "1y": {"years": 1, "purchases_per_day": 8},
+    "10y": {"years": 10, "purchases_per_day": 8},
+    "1m": {"years": 10, "purchases": 1_000_000},
+}
+
+# category: (merchants, typical amount, relative frequency)
+CATEGORIES = {
+    "🛒 Groceries": (["Whole Paws Market", "Kitty Mart", "Fresh Fish Co.", "Corner Grocer"], 45.0, 30),
+    "🍽️ Dining": (["Sushi Neko", "Taco Cat", "Cafe Purrista", "Noodle House", "Pizza Palace"], 22.0, 25),
+    "🚗 Transportation": (["Shell", "Metro Transit", "RideShare", "Parking Garage"], 35.0, 15),
+    "🎮 Entertainment": (["Steam", "Cinema 8", "Bookstore", "Concert Hall"], 30.0, 10),
+    "🛍️ Shopping": (["Amazon", "Target", "Thrift Shop", "Electronics Hub"], 60.0, 10),
+    "💊 Healthcare": (["Pharmacy", "Dental Clinic", "Vet Visit"], 55.0, 4),
+    "💅 Personal Care": (["Salon", "Spa Day", "Beauty Supply"], 40.0, 4),
+    "📦 Other": (["Post Office", "Hardware Store", "Gift Shop"], 25.0, 2),
+}
+
+NOTES = [None] * 8 + ["with friends", "birthday gift", "on sale!", "refund pending", "work trip"]
+
+BILLS = [
+    ("Rent", 1450.00, 1, "🏠 Housing"),
+    ("Electric", 85.00, 12, "💡 Utilities"),
+    ("Water", 40.00, 15, "💡 Utilities"),
+    ("Internet", 65.00, 20, "📶 Internet"),
+    ("Phone", 55.00, 22, "📱 Phone"),
+    ("Car Insurance", 120.00, 5, "🛡️ Insurance"),
+    ("Streaming", 15.99, 9, "📺 Subscriptions"),
+    ("Gym", 30.00, 3, "🏋️ Fitness"),
+    ("Student Loan", 210.00, 25, "💳 Loans"),
+]
+
+SAVINGS = [
+    ("Emergency Fund", 10000.00, 0.6),
+    ("Vacation", 3000.00, 0.25),
+    ("New Laptop", 1800.00, 0.15),
+]
+
+
+def _month_start(day: date, months_back: int) -> date:
+    month_index = day.year * 12 + day.month - 1 - months_back
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def generate(path: str, scale: str = "1y", seed: int = 0, end: Optional[date] = None,
+             batch_size: int = 50_000) -> dict:
+    """Fill a new database at ``path`` with generated data.
+
+    ``end`` is the last day with data (default: today). Returns the
+    number of rows generated per table.
+    """
+    if scale not in SCALES:
+        raise ValueError(f"Unknown scale: {scale}")
+    if os.path.exists(path):
+        raise FileExistsError(f"{path} already exists")
+
+    settings = SCALES[scale]
+    rng = random.Random(seed)
+    end = end or date.today()
+    start = _month_start(end, settings["years"] * 12 - 1)
+    days = (end - start).days + 1
+    counts = {}
+
+    db = Database(path, cache_size=0)
+    try:
+        with db.transaction():
+            bill_ids = [db.add_monthly_bill(name, amount, due_day, category)
+                        for name, amount, due_day, category in BILLS]
+            savings_ids = [db.add_savings_account(name, 0, goal) for name, goal, _ in SAVINGS]
+        counts["monthly_bills"] = len(bill_ids)
+        counts["savings"] = len(savings_ids)
+
+        # Biweekly paychecks, a share of each into savings and the bill account
+        paychecks, savings_transactions, bill_transactions = [], [], []
+        payday = start + timedelta(days=(4 - start.weekday()) % 7)  # first Friday
+        while payday <= end:
+            amount = round(rng.gauss(2100, 60), 2)
+            day = payday.isoformat()
+            paychecks.append({"amount": amount, "date": day, "source": "Main Job"})
+            bill_transactions.append({"amount": round(sum(b[1] for b in BILLS) / 2, 2),
+                                      "transaction_type": "deposit", "date": day,
+                                      "notes": "From paycheck (Main Job)"})
+            for savings_id, (_, _, share) in zip(savings_ids, SAVINGS):
+                savings_transactions.append({"savings_id": savings_id,
+                                             "amount": round(250 * share, 2),
+                                             "transaction_type": "deposit", "date": day,
+                                             "notes": "From paycheck (Main Job)"})
+            if rng.random() < 0.05:
+                savings_transactions.append({"savings_id": rng.choice(savings_ids),
+                                             "amount": round(rng.uniform(50, 400), 2),
+                                             "transaction_type": "withdraw", "date": day,
+                                             "notes": "oops, needed it"})
+            payday += timedelta(days=14)
+
+        # Every bill paid each month (most recent month only partly)
+        month = start
+        paid = []
+        while month <= end:
+            last_day = calendar.monthrange(month.year, month.month)[1]
+            for bill_id, (_, amount, due_day, _) in zip(bill_ids, BILLS):
+                due = date(month.year, month.month, min(due_day, last_day))
+                if due <= end:
+                    paid.append((bill_id, month.year, month.month, due.isoformat()))
+                    bill_transactions.append({"amount": amount, "transaction_type": "withdraw",
+                                              "date": due.isoformat(), "notes": "Bill payment"})
+            month = _month_start(month, -1)
+
+        counts["paychecks"] = len(db.add_paychecks_many(paychecks))
+        counts["savings_transactions"] = len(db.add_savings_transactions_many(savings_transactions))
+        counts["bill_account_transactions"] = len(
+            db.add_bill_account_transactions_many(bill_transactions))
+        with db.transaction():
+            for bill_id, year, month_number, paid_date in paid:
+                db.mark_bill_paid(bill_id, year, month_number, paid_date)
+        counts["paid_bills"] = len(paid)
+
+        # Purchases, written in batches so 1M rows never sit in memory
+        total = settings.get("purchases") or round(days * settings["purchases_per_day"])
+        categories = list(CATEGORIES)
+        weights = [CATEGORIES[category][2] for category in categories]
+        written = 0
+        while written < total:
+            batch = []
+            for _ in range(min(batch_size, total - written)):
+                category = rng.choices(categories, weights)[0]
+                merchants, typical, _ = CATEGORIES[category]
+                batch.append({
+                    "name": rng.choice(merchants),
+                    "amount": round(max(0.5, rng.lognormvariate(0, 0.6) * typical), 2),
+                    "date": (start + timedelta(days=rng.randrange(days))).isoformat(),
+                    "category": category,
+                    "notes": rng.choice(NOTES),
+                })
+            written += len(db.add_purchases_many(batch))
+        counts["purchases"] = written
+    finally:
+        db.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic NekoBudget database")
+    parser.add_argument("path", help="database file to create")
+    parser.add_argument("--scale", choices=list(SCALES), default="1y",
+                        help="how much data to generate (default: 1y)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    parser.add_argument("--end", type=date.fromisoformat, default=None,
+                        help="last day with data, YYYY-MM-DD (default: today)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = generate(args.path, args.scale, args.seed, args.end)
+    elapsed = time.perf_counter() - started
+    for table, rows in counts.items():
+        print(f"{table:<26} {rows:10,}")
+    print(f"Generated {args.path} in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Streaming export of NekoBudget data to CSV and JSON Lines.
+
+Rows are read from SQLite a chunk at a time and written to the file as
+they arrive, so exporting decades of history takes as little memory as
+exporting a month. Archived years are included::
+
+    python export.py purchases purchases.csv --start 2024-01-01 --end 2025-01-01
+    python export.py paychecks paychecks.jsonl
+    python export.py bills bills.csv --category "🏠 Housing"
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+from typing import Callable, Optional
+
+from config import CONFIG_PATH, load_config
+from database import MONEY_COLUMNS, Database
+
+FORMATS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+}
+
+# What can be exported, and the table each kind is read from
+KINDS = {
+    "purchases": "purchases",
+    "paychecks": "paychecks",
+    "bills": "monthly_bills",
+    "savings": "savings_transactions",
+    "bill_account": "bill_account_transactions",
+}
+
+# Kinds whose rows have a category to filter on
+CATEGORIZED = {"purchases", "bills"}
+
+# Unfinished exports get this suffix until the last row is written
+PARTIAL = ".partial"
+
+
+def detect_format(path: str) -> str:
+    """Pick the export format from the file extension."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"Unsupported export format: {ext or path} (use .csv or .jsonl)")
+    return FORMATS[ext]
+
+
+def columns(db: Database, kind: str) -> list:
+    """Column names of the rows ``iter_rows`` yields for ``kind``."""
+    names = [row["name"] for row in db.read_conn.execute(f"PRAGMA table_info({KINDS[kind]})")]
+    if kind == "savings":
+        names.append("account")
+    return names
+
+
+def iter_rows(db: Database, kind: str, start: Optional[str] = None, end: Optional[str] = None,
+              category: Optional[str] = None, chunk_size: int = 1000):
+    """Yield ``kind`` rows as tuples, oldest first, money in dollars.
+
+    ``start`` (inclusive) and ``end`` (exclusive) are ISO dates; bills
+    aren't dated and are all exported. Only purchases and bills have a
+    ``category``.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown export: {kind}")
+    if category is not None and kind not in CATEGORIZED:
+        raise ValueError(f"{kind} have no category to filter on")
+
+    options = {"chunk_size": chunk_size, "row_type": "tuple"}
+    if kind == "purchases":
+        return db.iter_purchases(start=start, end=end, category=category, **options)
+    if kind == "paychecks":
+        return db.iter_paychecks(start=start, end=end, **options)
+    if kind == "bills":
+        return db.iter_monthly_bills(category, **options)
+    if kind == "bill_account":
+        return db.iter_bill_account_transactions(start, end, **options)
+
+    # Savings transactions only store the account's id, so add its name
+    names = {account.id: account.name for account in db.get_savings_accounts()}
+    rows = db.iter_savings_transactions(start=start, end=end, **options)
+    savings_id = columns(db, kind).index("savings_id")
+    return (row + (names.get(row[savings_id]),) for row in rows)
+
+
+def _csv_writer(f, header: list, money: list) -> Callable[[list], None]:
+    writer = csv.writer(f)
+    writer.writerow(header)
+
+    def write(rows):
+        if money:
+            rows = [list(row) for row in rows]
+            for row in rows:
+                for index in money:
+                    if row[index] is not None:
+                        row[index] = f"{row[index]:.2f}"
+        writer.writerows(rows)
+
+    return write
+
+
+def _jsonl_writer(f, header: list) -> Callable[[list], None]:
+    def write(rows):
+        f.writelines(json.dumps(dict(zip(header, row)), ensure_ascii=False) + "\n"
+                     for row in rows)
+
+    return write
+
+
+def export_rows(db: Database, kind: str, path: str, start: Optional[str] = None,
+                end: Optional[str] = None, category: Optional[str] = None,
+                chunk_size: int = 5000,
+                progress: Optional[Callable[[int, int], None]] = None,
+                cancelled: Optional[Callable[[], bool]] = None) -> dict:
+    """Export ``kind`` rows matching the filters to ``path`` as CSV or JSON Lines.
+
+    The format comes from the extension (see FORMATS) and the filters work
+    like ``iter_rows``. Rows are written ``chunk_size`` at a time, after
+    which ``progress`` is called with (rows written, total rows) and the
+    export stops if ``cancelled`` returns True. The file is only put in
+    place once complete, so a cancelled or failed export leaves nothing
+    behind. Returns the number of rows written and whether it was cancelled.
+    """
+    fmt = detect_format(path)
+    rows = iter_rows(db, kind, start, end, category, chunk_size)
+    header = columns(db, kind)
+    total = db.count_rows(KINDS[kind], start, end, category)
+    counts = {"rows": 0, "cancelled": False}
+
+    partial = path + PARTIAL
+    try:
+        # utf-8-sig so spreadsheet apps don't garble the emoji categories
+        encoding = "utf-8-sig" if fmt == "csv" else "utf-8"
+        with open(partial, "w", encoding=encoding, newline="") as f:
+            if fmt == "csv":
+                money = [header.index(column) for column in MONEY_COLUMNS[KINDS[kind]]]
+                write = _csv_writer(f, header, money)
+            else:
+                write = _jsonl_writer(f, header)
+            while chunk := list(islice(rows, chunk_size)):
+                write(chunk)
+                counts["rows"] += len(chunk)
+                if progress:
+                    progress(counts["rows"], max(total, counts["rows"]))
+                if cancelled and cancelled():
+                    counts["cancelled"] = True
+                    break
+        if counts["cancelled"]:
+            os.remove(partial)
+        else:
+            os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    finally:
+        rows.close()
+    if progress and not counts["cancelled"]:
+        progress(counts["rows"], counts["rows"])
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export NekoBudget data to CSV or JSON Lines")
+    parser.add_argument("kind", choices=sorted(KINDS), help="what to export")
+    parser.add_argument("path", help="file to write; .csv or .jsonl")
+    parser.add_argument("--start", help="first date to include (YYYY-MM-DD)")
+    parser.add_argument("--end", help="first date to leave out (YYYY-MM-DD)")
+    parser.add_argument("--category", help="only rows in this category (purchases and bills)")
+    parser.add_argument("--config", default=CONFIG_PATH,
+                        help=f"settings file (default: {CONFIG_PATH})")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    db_config = config["database"]
+    db = Database(db_config["path"], db_config["pragmas"], cache_size=0)
+    started = time.perf_counter()
+    try:
+        counts = export_rows(db, args.kind, args.path, args.start, args.end, args.category)
+    except (ValueError, OSError) as e:
+        print(f"Export failed: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        db.close()
+    print(f"Exported {counts['rows']:,} {args.kind} rows to {args.path} "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
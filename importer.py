@@ -0,0 +1,308 @@
+"""Streaming bank statement importer for NekoBudget.
+
+Statements are read entry by entry and written to the database in chunks,
+so even multi-year exports are imported without loading the whole file
+into memory. CSV, OFX/QFX and QIF exports are supported.
+"""
+
+import csv
+import os
+from datetime import datetime
+from typing import Callable, Optional
+
+from database import Database
+
+
+# Header names banks commonly use for each field (compared lowercase)
+CSV_COLUMNS = {
+    "date": ["date", "transaction date", "posted date", "posting date", "trans. date"],
+    "name": ["description", "name", "payee", "merchant", "details"],
+    "amount": ["amount", "transaction amount"],
+    "debit": ["debit", "withdrawal", "withdrawals", "money out"],
+    "credit": ["credit", "deposit", "deposits", "money in"],
+    "category": ["category"],
+    "notes": ["memo", "notes", "reference"],
+}
+
+DATE_FORMATS = ["%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%d/%m/%Y", "%Y/%m/%d",
+                "%d.%m.%Y", "%Y%m%d", "%m-%d-%Y", "%b %d, %Y", "%d %b %Y"]
+
+FORMATS = {
+    ".csv": "csv",
+    ".ofx": "ofx",
+    ".qfx": "ofx",
+    ".qif": "qif",
+}
+
+
+class StatementError(ValueError):
+    """Raised when a statement cannot be parsed."""
+
+
+def detect_format(path: str) -> str:
+    """Guess the statement format from the file extension."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise StatementError(f"Unsupported statement format: {ext or path}")
+    return FORMATS[ext]
+
+
+class _DateParser:
+    """Parse statement dates, remembering the last format that worked.
+
+    Statements repeat the same few thousand dates over and over, so parsed
+    values are memoized to keep strptime off the hot path.
+    """
+
+    def __init__(self):
+        self.last_format = None
+        self.cache = {}
+
+    def __call__(self, text: str) -> Optional[str]:
+        try:
+            return self.cache[text]
+        except KeyError:
+            pass
+        parsed = self._parse(text.strip())
+        if len(self.cache) < 100_000:
+            self.cache[text] = parsed
+        return parsed
+
+    def _parse(self, text: str) -> Optional[str]:
+        if not text:
+            return None
+        if self.last_format:
+            try:
+                return datetime.strptime(text, self.last_format).strftime("%Y-%m-%d")
+            except ValueError:
+                pass
+        for fmt in DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+            self.last_format = fmt
+            return parsed.strftime("%Y-%m-%d")
+        return None
+
+
+def parse_amount(text: str) -> Optional[float]:
+    """Parse an amount like ``-1,234.50``, ``$12.00`` or ``(5.00)``."""
+    if not text:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    text = text.strip().replace(",", "").replace("$", "").replace(" ", "")
+    negative = text.startswith("(") and text.endswith(")")
+    if negative:
+        text = text[1:-1]
+    try:
+        amount = float(text)
+    except ValueError:
+        return None
+    return -amount if negative else amount
+
+
+def _find_column(header: list, field: str) -> Optional[int]:
+    lowered = [name.strip().lower() for name in header]
+    for candidate in CSV_COLUMNS[field]:
+        if candidate in lowered:
+            return lowered.index(candidate)
+    return None
+
+
+def iter_csv(f, mapping: Optional[dict] = None):
+    """Yield statement entries from a CSV export.
+
+    ``mapping`` maps entry fields (date, name, amount, debit, credit,
+    category, notes) to CSV header names; missing fields are detected from
+    common bank header names.
+    """
+    reader = csv.reader(f)
+    header = next(reader, [])
+    columns = {field: _find_column(header, field) for field in CSV_COLUMNS}
+    for field, name in (mapping or {}).items():
+        columns[field] = header.index(name) if name in header else None
+    if columns["date"] is None or (columns["amount"] is None and columns["debit"] is None
+                                   and columns["credit"] is None):
+        raise StatementError("Could not find date and amount columns in the CSV header")
+
+    def cell(row, field):
+        index = columns[field]
+        if index is None or index >= len(row):
+            return ""
+        return row[index].strip()
+
+    parse_date = _DateParser()
+    for row in reader:
+        if not row:
+            continue
+        if columns["amount"] is not None:
+            amount = parse_amount(cell(row, "amount"))
+        else:
+            debit = parse_amount(cell(row, "debit"))
+            credit = parse_amount(cell(row, "credit"))
+            if debit:
+                amount = -abs(debit)
+            elif credit:
+                amount = abs(credit)
+            else:
+                amount = None
+        yield {
+            "date": parse_date(cell(row, "date")),
+            "name": cell(row, "name"),
+            "amount": amount,
+            "category": cell(row, "category") or None,
+            "notes": cell(row, "notes") or None,
+        }
+
+
+def _iter_sgml_tags(f, chunk_size: int = 65536):
+    """Yield (tag, text) pairs from an OFX file, reading it in chunks.
+
+    Works for both SGML-style OFX 1.x (unclosed tags) and XML OFX 2.x.
+    """
+    buffer = ""
+    while True:
+        chunk = f.read(chunk_size)
+        buffer += chunk
+        parts = buffer.split("<")
+        # The last part may be cut off mid-tag unless the file is done
+        buffer = "" if not chunk else parts.pop()
+        for part in parts:
+            if ">" not in part:
+                continue
+            tag, _, text = part.partition(">")
+            yield tag.strip().upper(), text.strip()
+        if not chunk:
+            break
+
+
+def iter_ofx(f):
+    """Yield statement entries from an OFX/QFX export."""
+    parse_date = _DateParser()
+    entry = None
+    for tag, text in _iter_sgml_tags(f):
+        if tag == "STMTTRN":
+            entry = {"date": None, "name": "", "amount": None, "category": None, "notes": None}
+        elif tag == "/STMTTRN" and entry is not None:
+            yield entry
+            entry = None
+        elif entry is not None:
+            if tag == "DTPOSTED":
+                entry["date"] = parse_date(text[:8])
+            elif tag == "TRNAMT":
+                entry["amount"] = parse_amount(text)
+            elif tag == "NAME":
+                entry["name"] = text
+            elif tag == "MEMO":
+                entry["notes"] = text or None
+
+
+def iter_qif(f):
+    """Yield statement entries from a QIF export."""
+    parse_date = _DateParser()
+    entry = {"date": None, "name": "", "amount": None, "category": None, "notes": None}
+    for line in f:
+        line = line.rstrip("\r\n")
+        if not line or line.startswith("!"):
+            continue
+        code, value = line[0], line[1:].strip()
+        if code == "^":
+            yield entry
+            entry = {"date": None, "name": "", "amount": None, "category": None, "notes": None}
+        elif code == "D":
+            # QIF dates use an apostrophe for years after 1999, e.g. 1/31'24
+            entry["date"] = parse_date(value.replace("'", "/").replace(" ", ""))
+        elif code in ("T", "U"):
+            entry["amount"] = parse_amount(value)
+        elif code == "P":
+            entry["name"] = value
+        elif code == "M":
+            entry["notes"] = value or None
+        elif code == "L":
+            entry["category"] = value or None
+
+
+PARSERS = {
+    "csv": iter_csv,
+    "ofx": iter_ofx,
+    "qif": iter_qif,
+}
+
+
+def import_statement(db: Database, path: str, target: str = "auto",
+                     chunk_size: int = 5000,
+                     progress: Optional[Callable[[int, int], None]] = None,
+                     cancelled: Optional[Callable[[], bool]] = None,
+                     mapping: Optional[dict] = None) -> dict:
+    """Import a bank statement into purchases and paychecks.
+
+    With ``target="auto"`` debits become purchases and credits become
+    paychecks; ``"purchases"`` or ``"paychecks"`` imports every entry as
+    that kind. Rows are written in chunks of ``chunk_size``. ``progress`` is
+    called with (bytes read, total bytes) after each chunk, and the import
+    stops early when ``cancelled`` returns True. Entries dated in an
+    archived year are left out and counted as ``archived`` rather than
+    failing the import partway through. Returns counts of imported and
+    skipped entries.
+    """
+    if target not in ("auto", "purchases", "paychecks"):
+        raise ValueError(f"Unknown import target: {target}")
+
+    fmt = detect_format(path)
+    total_bytes = os.path.getsize(path)
+    counts = {"purchases": 0, "paychecks": 0, "skipped": 0, "archived": 0, "cancelled": False}
+    archived = {f"{year:04d}" for year in db.get_archived_years()}
+    purchases, paychecks = [], []
+
+    def flush():
+        if purchases:
+            counts["purchases"] += len(db.add_purchases_many(purchases))
+            purchases.clear()
+        if paychecks:
+            counts["paychecks"] += len(db.add_paychecks_many(paychecks))
+            paychecks.clear()
+
+    with open(path, "r", encoding="utf-8-sig", errors="replace", newline="") as f:
+        entries = PARSERS[fmt](f, mapping) if fmt == "csv" else PARSERS[fmt](f)
+        for entry in entries:
+            if not entry["date"] or not entry["amount"]:
+                counts["skipped"] += 1
+                continue
+            if entry["date"][:4] in archived:
+                counts["archived"] += 1
+                continue
+
+            is_credit = entry["amount"] > 0
+            if target == "paychecks" or (target == "auto" and is_credit):
+                paychecks.append({
+                    "amount": abs(entry["amount"]),
+                    "date": entry["date"],
+                    "source": entry["name"] or None,
+                    "notes": entry["notes"],
+                })
+            else:
+                purchases.append({
+                    "name": entry["name"] or "Imported purchase",
+                    "amount": abs(entry["amount"]),
+                    "date": entry["date"],
+                    "category": entry["category"],
+                    "notes": entry["notes"],
+                })
+
+            if len(purchases) + len(paychecks) >= chunk_size:
+                flush()
+                if progress:
+                    progress(f.buffer.tell(), total_bytes)
+                if cancelled and cancelled():
+                    counts["cancelled"] = True
+                    return counts
+
+        flush()
+        if progress:
+            progress(total_bytes, total_bytes)
+
+    return counts
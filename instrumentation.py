@@ -0,0 +1,326 @@
+"""Optional query timing for the NekoBudget database layer.
+
+A QueryProfiler passed to ``Database(profiler=...)`` times every public
+Database method and every SQL statement, and logs slow statements with
+their query plan. Without a profiler none of this code runs, so it costs
+nothing when disabled.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from functools import wraps
+from inspect import isgenerator
+from typing import Optional
+
+# Database methods that aren't worth timing: connection plumbing, and
+# transaction(), whose work happens in the caller's with block
+UNTIMED_METHODS = {"close", "connect", "transaction", "cache_stats", "clear_cache"}
+
+# Only these statements have a query plan worth logging
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+
+def percentile(samples, pct: float) -> float:
+    """Return the ``pct`` percentile of ``samples`` (nearest rank)."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class MethodStats:
+    """Call count, latency samples and rows returned for one method."""
+
+    __slots__ = ("calls", "total", "samples", "rows")
+
+    def __init__(self, max_samples: int):
+        self.calls = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=max_samples)
+        self.rows = 0
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports statement timings and fetched rows.
+
+    SQLite produces rows as they are fetched, so a statement's time runs
+    from execute() until its rows are used up (or the cursor is dropped
+    or reused), not just the execute() call.
+    """
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._statement = None
+        self._elapsed = 0.0
+
+    def _finish(self):
+        if self._statement is not None:
+            sql, parameters, method = self._statement
+            self._statement = None
+            self.connection.profiler.record_statement(
+                self.connection, sql, parameters, self._elapsed, method
+            )
+
+    def _fetched(self, start: float, count: int, done: bool):
+        self._elapsed += time.perf_counter() - start
+        self.connection.profiler.record_rows(count)
+        if done:
+            self._finish()
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        self._statement = (sql, parameters, self.connection.profiler.current_method())
+        start = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        finally:
+            self._elapsed = time.perf_counter() - start
+            if self.description is None:
+                self._finish()  # Nothing to fetch
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        # No parameters: there's no single statement to explain
+        self._statement = (sql, None, self.connection.profiler.current_method())
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._elapsed = time.perf_counter() - start
+            self._finish()
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        start = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._fetched(start, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows), True)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, 0, True)
+            raise
+        self._fetched(start, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except sqlite3.Error:
+            pass  # The connection is already closed
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors are InstrumentedCursors.
+
+    QueryProfiler makes a subclass with ``profiler`` set and passes it to
+    sqlite3.connect as the connection factory.
+    """
+
+    profiler = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+class QueryProfiler:
+    """Collect per-method and slow-statement timings for a Database.
+
+    Statements taking at least ``slow_query_ms`` are kept in
+    ``slow_queries`` (read it through recent_slow_queries) and, if ``slow_log_path`` is set, appended to that
+    file along with their EXPLAIN QUERY PLAN output.
+    """
+
+    def __init__(self, slow_query_ms: float = 50.0, slow_log_path: Optional[str] = None,
+                 max_samples: int = 10_000):
+        self.slow_query_ms = slow_query_ms
+        self.max_samples = max_samples
+        self.methods = {}
+        self.slow_queries = deque(maxlen=100)
+        self.statements = 0
+        self.connection_class = type("InstrumentedConnection", (InstrumentedConnection,),
+                                     {"profiler": self})
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        self.log = logging.getLogger(f"nekobudget.slow_queries.{id(self)}")
+        self.log.propagate = False
+        if slow_log_path:
+            handler = logging.FileHandler(slow_log_path, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self.log.addHandler(handler)
+            self.log.setLevel(logging.INFO)
+
+    def install(self, db):
+        """Time every public method of ``db`` (an open Database)."""
+        for name in dir(type(db)):
+            attr = getattr(type(db), name)
+            if (name.startswith("_") or name in UNTIMED_METHODS or not callable(attr)
+                    or isinstance(attr, type)):
+                continue
+            setattr(db, name, self.timed(name, getattr(db, name)))
+
+    def timed(self, name: str, method):
+        """Wrap ``method`` so its calls are recorded under ``name``."""
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            stack = self._stack()
+            stack.append(name)
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            except BaseException:
+                self._record_call(name, time.perf_counter() - start)
+                raise
+            finally:
+                stack.pop()
+            elapsed = time.perf_counter() - start
+            if isgenerator(result):
+                # iter_* methods do their work as they are consumed
+                return self._timed_generator(name, result, elapsed)
+            self._record_call(name, elapsed)
+            return result
+        return wrapper
+
+    def _timed_generator(self, name: str, generator, elapsed: float):
+        stack = self._stack()
+        try:
+            while True:
+                stack.append(name)
+                start = time.perf_counter()
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - start
+                    stack.pop()
+                yield item
+        finally:
+            generator.close()
+            self._record_call(name, elapsed)
+
+    def _record_call(self, name: str, elapsed: float):
+        with self._lock:
+            stats = self._stats(name)
+            stats.calls += 1
+            stats.total += elapsed
+            stats.samples.append(elapsed)
+
+    def current_method(self) -> Optional[str]:
+        """Name of the innermost timed method running on this thread."""
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _stats(self, name: str) -> MethodStats:
+        stats = self.methods.get(name)
+        if stats is None:
+            stats = self.methods[name] = MethodStats(self.max_samples)
+        return stats
+
+    def record_rows(self, count: int):
+        """Credit ``count`` fetched rows to the innermost timed method."""
+        stack = self._stack()
+        if count and stack:
+            with self._lock:
+                self._stats(stack[-1]).rows += count
+
+    def record_statement(self, conn: sqlite3.Connection, sql: str, parameters,
+                         elapsed: float, method: Optional[str] = None):
+        """Count a statement and log it if it was slow."""
+        with self._lock:
+            self.statements += 1
+        elapsed_ms = elapsed * 1000
+        if elapsed_ms < self.slow_query_ms:
+            return
+
+        sql = " ".join(sql.split())
+        plan = []
+        if parameters is not None and sql.upper().startswith(EXPLAINABLE):
+            try:
+                # A plain cursor, so explaining isn't itself recorded
+                cursor = sqlite3.Cursor(conn)
+                plan = [row[-1] for row in cursor.execute(f"EXPLAIN QUERY PLAN {sql}",
+                                                          parameters)]
+            except sqlite3.Error:
+                pass
+        entry = {
+            "method": method,
+            "sql": sql,
+            "ms": elapsed_ms,
+            "plan": plan,
+        }
+        with self._lock:
+            self.slow_queries.append(entry)
+        self.log.info("%.1f ms in %s: %s\n    %s", elapsed_ms, entry["method"] or "-",
+                      sql, "\n    ".join(plan) or "(no plan)")
+
+    def report(self) -> list:
+        """Per-method stats as dicts, slowest total time first."""
+        with self._lock:
+            snapshot = [(name, stats.calls, stats.total, list(stats.samples), stats.rows)
+                        for name, stats in self.methods.items()]
+        report = [
+            {
+                "method": name,
+                "calls": calls,
+                "total_ms": total * 1000,
+                "p50_ms": percentile(samples, 50) * 1000,
+                "p95_ms": percentile(samples, 95) * 1000,
+                "p99_ms": percentile(samples, 99) * 1000,
+                "rows": rows,
+            }
+            for name, calls, total, samples, rows in snapshot
+        ]
+        return sorted(report, key=lambda entry: entry["total_ms"], reverse=True)
+
+    def recent_slow_queries(self) -> list:
+        """The slow statements kept so far, oldest first.
+
+        A copy, so it can be iterated while other threads record more.
+        """
+        with self._lock:
+            return list(self.slow_queries)
+
+    def reset(self):
+        """Forget everything recorded so far."""
+        with self._lock:
+            self.methods.clear()
+            self.slow_queries.clear()
+            self.statements = 0
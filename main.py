@@ -2,20 +2,31 @@
 
 import sys
 import os
-import shutil
-from datetime import datetime
+import queue
+import sqlite3
+from itertools import count
+from datetime import datetime, timedelta
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QTabWidget, QLabel, QPushButton, QLineEdit, QDoubleSpinBox,
     QSpinBox, QTableWidget, QTableWidgetItem, QHeaderView, QComboBox,
     QDateEdit, QTextEdit, QFileDialog, QMessageBox, QGroupBox,
     QFormLayout, QFrame, QScrollArea, QDialog, QDialogButtonBox,
-    QProgressBar, QSplitter, QCheckBox
+    QProgressBar, QSplitter, QCheckBox, QInputDialog
+)
+from PyQt6.QtCore import Qt, QDate, QRunnable, QSize, QThread, QThreadPool, QTimer, QUrl, pyqtSignal
+from PyQt6.QtGui import (
+    QFont, QIcon, QPixmap, QPalette, QColor, QKeySequence, QShortcut, QDesktopServices
 )
-from PyQt6.QtCore import Qt, QDate
-from PyQt6.QtGui import QFont, QIcon, QPixmap, QPalette, QColor
 
+from backup import backup_from_config, is_due, list_backups
+from config import load_config
 from database import Database
+from export import CATEGORIZED, FORMATS, export_rows
+from importer import import_statement
+from instrumentation import QueryProfiler
+from receipts import ReceiptStore, store_from_config
+from thumbnails import ThumbnailCache, read_image
 
 
 # Cute color palette
@@ -209,13 +220,533 @@ MONEY_CAT = "💰🐱"
 PIGGY = "🐷"
 COIN = "🪙"
 
+# Rows fetched per page for long lists, and how close (in scroll steps) to
+# the bottom the next page is requested
+PAGE_SIZE = 200
+SCROLL_FETCH_MARGIN = 5
+
+# Purchase search runs once typing pauses for this long (ms), and shows at
+# most this many matches
+SEARCH_DELAY_MS = 250
+SEARCH_LIMIT = 200
+
+STATEMENT_FILTER = "Bank Statements (*.csv *.ofx *.qfx *.qif);;All Files (*)"
+
+# Export file types, by format, for the save dialog
+EXPORT_FILTERS = {"csv": "Spreadsheet CSV (*.csv)", "jsonl": "JSON Lines (*.jsonl)"}
+
+# What the export dialog offers, by export.py kind
+EXPORT_KINDS = {
+    "purchases": "🛍️ Purchases",
+    "paychecks": "💰 Paychecks",
+    "bills": "📄 Monthly Bills",
+    "savings": f"{PIGGY} Savings Transactions",
+    "bill_account": "🏦 Bill Account Transactions",
+}
+
+PURCHASE_CATEGORIES = [
+    "🛒 Groceries", "🍽️ Dining", "🚗 Transportation", "🎮 Entertainment",
+    "🛍️ Shopping", "💊 Healthcare", "💅 Personal Care", "📦 Other"
+]
+BILL_CATEGORIES = [
+    "🏠 Housing", "💡 Utilities", "🛡️ Insurance", "🚗 Transportation",
+    "📺 Subscriptions", "💳 Loans", "📦 Other"
+]
+
+# Size in pixels receipt previews are shown at in the purchases table
+PREVIEW_SIZE = 48
+
+# Most writes the background writer commits together in one transaction
+WRITE_BATCH_LIMIT = 100
+
+# How long after startup the app first checks whether a backup is due,
+# and how often it checks after that
+BACKUP_STARTUP_DELAY_MS = 60 * 1000
+BACKUP_CHECK_MS = 10 * 60 * 1000
+
+
+class DatabaseWriter(QThread):
+    """Apply database writes in order on a dedicated thread.
+
+    Writes queued with submit() run on this thread through the Database's
+    serialized write connection, so the UI never waits on a commit. Writes
+    that queue up while a commit is in progress are applied together and
+    committed once. Results come back on the UI thread through the
+    completed/failed signals.
+    """
+
+    completed = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+
+    def __init__(self, db: Database, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.queue = queue.Queue()
+        self.tickets = count(1)
+        self.callbacks = {}
+        # The writer object lives on the UI thread, so these run there
+        self.completed.connect(self.on_finished)
+        self.failed.connect(self.on_finished)
+
+    def submit(self, method: str, *args, on_done=None, **kwargs) -> int:
+        """Queue ``db.<method>(*args, **kwargs)`` and return its ticket.
+
+        ``on_done`` is called on the UI thread once the write has been
+        committed or has failed.
+        """
+        ticket = next(self.tickets)
+        if on_done:
+            self.callbacks[ticket] = on_done
+        self.queue.put((ticket, method, args, kwargs))
+        return ticket
+
+    def stop(self):
+        """Apply everything already queued, then end the thread."""
+        self.queue.put(None)
+        self.wait()
+
+    def on_finished(self, ticket: int, *_):
+        callback = self.callbacks.pop(ticket, None)
+        if callback:
+            callback()
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            while batch[-1] is not None and len(batch) < WRITE_BATCH_LIMIT:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = batch[-1] is None
+            if stopping:
+                batch.pop()
+            if batch:
+                self.apply(self.db, batch)
+            if stopping:
+                break
+
+    def apply(self, db: Database, batch: list):
+        operations = [
+            lambda target, method=method, args=args, kwargs=kwargs:
+                getattr(target, method)(*args, **kwargs)
+            for _, method, args, kwargs in batch
+        ]
+        try:
+            results = db.run_batch(operations)
+        except Exception as e:
+            # The whole transaction failed (e.g. the database stayed locked)
+            results = [(None, e)] * len(batch)
+        for (ticket, *_), (result, error) in zip(batch, results):
+            if error is None:
+                self.completed.emit(ticket, result)
+            else:
+                self.failed.emit(ticket, str(error))
+
+
+class StatementImportWorker(QThread):
+    """Import a bank statement on a background thread."""
+
+    progress = pyqtSignal(int)
+    completed = pyqtSignal(dict)
+    failed = pyqtSignal(str)
+
+    def __init__(self, db: Database, file_path: str, target: str = "auto", parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.file_path = file_path
+        self.target = target
+
+    def run(self):
+        # Chunks go through the shared Database's serialized writer, taking
+        # turns with the UI's writes
+        try:
+            counts = import_statement(
+                self.db, self.file_path, self.target,
+                progress=lambda done, total: self.progress.emit(int(done * 100 / max(total, 1))),
+                cancelled=self.isInterruptionRequested
+            )
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.completed.emit(counts)
+
+
+class ExportWorker(QThread):
+    """Export rows to a file on a background thread (see export.py)."""
+
+    progress = pyqtSignal(int)
+    completed = pyqtSignal(dict)
+    failed = pyqtSignal(str)
+
+    def __init__(self, db: Database, kind: str, path: str, filters: dict, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.kind = kind
+        self.path = path
+        self.filters = filters
+
+    def run(self):
+        # Reads go through this thread's own pool connection
+        try:
+            counts = export_rows(
+                self.db, self.kind, self.path, **self.filters,
+                progress=lambda done, total: self.progress.emit(int(done * 100 / max(total, 1))),
+                cancelled=self.isInterruptionRequested
+            )
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.completed.emit(counts)
+
+
+class ArchiveWorker(QThread):
+    """Archive or restore a year on a background thread (see Database.archive_year).
+
+    Both hold the write lock and rewrite whole tables (archiving also
+    vacuums), so they can take a while on a big database.
+    """
+
+    completed = pyqtSignal(dict)
+    failed = pyqtSignal(str)
+
+    def __init__(self, db: Database, action: str, year: int, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.action = action
+        self.year = year
+
+    def run(self):
+        method = self.db.archive_year if self.action == "archive" else self.db.restore_year
+        try:
+            counts = method(self.year)
+        except (ValueError, sqlite3.Error, OSError) as e:
+            self.failed.emit(str(e))
+        else:
+            self.completed.emit(counts)
+
+
+class BackupWorker(QThread):
+    """Back up the database on a background thread (see backup.py)."""
+
+    completed = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, config: dict, parent=None):
+        super().__init__(parent)
+        self.config = config
+
+    def run(self):
+        try:
+            path = backup_from_config(self.config, cancelled=self.isInterruptionRequested)
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            if path:
+                self.completed.emit(path)
+
+
+class ReceiptIngestWorker(QThread):
+    """Copy receipts into the receipt store on a background thread.
+
+    Files queued with submit() are stored one at a time. Every signal
+    carries the source file, so the UI can attach the result to the
+    purchases waiting on it (see Database.finish_pending_receipt).
+    completed carries the stored key, or "" if the copy was cancelled.
+    """
+
+    progress = pyqtSignal(str, int)
+    completed = pyqtSignal(str, str)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, receipts: ReceiptStore, db: Database, parent=None):
+        super().__init__(parent)
+        self.receipts = receipts
+        self.db = db
+        self.queue = queue.Queue()
+        self.cancelled = set()
+
+    def submit(self, source: str):
+        self.queue.put(source)
+
+    def cancel(self, source: str):
+        """Stop copying ``source``, or skip it if it hasn't started yet."""
+        self.cancelled.add(source)
+
+    def stop(self):
+        """Abandon any copy in progress and end the thread.
+
+        Purchases still waiting on a receipt keep waiting; the app picks
+        them up again next time it starts.
+        """
+        self.requestInterruption()
+        self.queue.put(None)
+        self.wait()
+
+    def run(self):
+        while True:
+            source = self.queue.get()
+            if source is None or self.isInterruptionRequested():
+                break
+            try:
+                key = self.receipts.add(
+                    self.db, source,
+                    progress=lambda done, total: self.progress.emit(
+                        source, int(done * 100 / max(total, 1))),
+                    cancelled=lambda: source in self.cancelled or self.isInterruptionRequested()
+                )
+            except Exception as e:
+                self.failed.emit(source, str(e))
+                continue
+            finally:
+                self.cancelled.discard(source)
+            if self.isInterruptionRequested():
+                break
+            self.completed.emit(source, key or "")
+
+
+class ReceiptMaintenanceTask(QRunnable):
+    """Tidy the receipt store on a QThreadPool thread (see receipts.py)."""
+
+    def __init__(self, receipts: ReceiptStore, db: Database):
+        super().__init__()
+        self.receipts = receipts
+        self.db = db
+
+    def run(self):
+        try:
+            self.receipts.migrate_legacy(self.db)
+            self.receipts.collect_garbage(self.db)
+        except Exception as e:
+            # Nothing is lost by skipping it; the next start tries again
+            print(f"Receipt cleanup failed: {e}", file=sys.stderr)
+
+
+class PrefetchTask(QRunnable):
+    """Run a database read on a QThreadPool thread to warm the query cache."""
+
+    def __init__(self, read, *args):
+        super().__init__()
+        self.read = read
+        self.args = args
+
+    def run(self):
+        try:
+            self.read(*self.args)
+        except Exception:
+            # Only a warm-up; the real read will surface any error
+            pass
+
+
+class StatementImportDialog(QDialog):
+    """Progress dialog shown while a bank statement imports."""
+
+    def __init__(self, db: Database, file_path: str, target: str = "auto", parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"📥 Importing Statement {CAT_HAPPY}")
+        self.setMinimumWidth(400)
+        self.setStyleSheet(CUTE_STYLESHEET)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(f"📄 {os.path.basename(file_path)}"))
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        layout.addWidget(self.progress_bar)
+
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.cancel_import)
+        layout.addWidget(self.cancel_btn)
+
+        self.worker = StatementImportWorker(db, file_path, target, self)
+        self.worker.progress.connect(self.progress_bar.setValue)
+        self.worker.completed.connect(self.on_completed)
+        self.worker.failed.connect(self.on_failed)
+        self.worker.start()
+
+    def cancel_import(self):
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.setText("Stopping...")
+        self.worker.requestInterruption()
+
+    def reject(self):
+        # Closing the dialog cancels the import rather than orphaning the worker
+        self.cancel_import()
+
+    def on_completed(self, counts: dict):
+        self.worker.wait()
+        message = (
+            f"Imported {counts['purchases']} purchases and {counts['paychecks']} paychecks!\n"
+            f"Skipped {counts['skipped']} unreadable entries."
+        )
+        if counts["archived"]:
+            message += (f"\nLeft out {counts['archived']} entries from archived years; "
+                        "restore those years to import them.")
+        if counts["cancelled"]:
+            message = f"Import stopped early~\n\n{message}"
+        QMessageBox.information(self, f"All done! {CAT_EXCITED}", message)
+        self.accept()
+
+    def on_failed(self, error: str):
+        self.worker.wait()
+        QMessageBox.warning(self, f"Oopsie! {CAT_SAD}", f"Couldn't import that statement, nya~\n\n{error}")
+        self.done(QDialog.DialogCode.Rejected.value)
+
+
+def choose_and_import_statement(parent: QWidget, db: Database) -> bool:
+    """Ask for a bank statement and import it. Returns True if anything ran."""
+    file_path, _ = QFileDialog.getOpenFileName(
+        parent, f"Select Bank Statement {CAT_HAPPY}", "", STATEMENT_FILTER
+    )
+    if not file_path:
+        return False
+    StatementImportDialog(db, file_path, "auto", parent).exec()
+    return True
+
+
+class ExportDialog(QDialog):
+    """Pick what to export, then show progress while it's written."""
+
+    def __init__(self, db: Database, kind: str = "purchases", parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.worker = None
+        self.setWindowTitle(f"📤 Export {CAT_HAPPY}")
+        self.setMinimumWidth(420)
+        self.setStyleSheet(CUTE_STYLESHEET)
+
+        layout = QVBoxLayout(self)
+        form_layout = QFormLayout()
+
+        self.kind_input = QComboBox()
+        for key, label in EXPORT_KINDS.items():
+            self.kind_input.addItem(label, key)
+        self.kind_input.setCurrentIndex(self.kind_input.findData(kind))
+        self.kind_input.currentIndexChanged.connect(self.on_kind_changed)
+        form_layout.addRow("📦 Export:", self.kind_input)
+
+        self.all_dates_input = QCheckBox("All dates")
+        self.all_dates_input.setChecked(True)
+        self.all_dates_input.toggled.connect(self.on_kind_changed)
+        form_layout.addRow("📅 Dates:", self.all_dates_input)
+        today = QDate.currentDate()
+        self.start_input = QDateEdit(QDate(today.year(), 1, 1))
+        self.start_input.setCalendarPopup(True)
+        form_layout.addRow("From:", self.start_input)
+        self.end_input = QDateEdit(today)
+        self.end_input.setCalendarPopup(True)
+        form_layout.addRow("Through:", self.end_input)
+
+        self.category_input = QComboBox()
+        form_layout.addRow("📂 Category:", self.category_input)
+
+        self.format_input = QComboBox()
+        self.format_input.addItem("📊 CSV (spreadsheets)", "csv")
+        self.format_input.addItem("🧾 JSON Lines", "jsonl")
+        form_layout.addRow("💾 Format:", self.format_input)
+        layout.addLayout(form_layout)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.hide()
+        layout.addWidget(self.progress_bar)
+
+        btn_layout = QHBoxLayout()
+        self.export_btn = QPushButton(f"Export {CAT_EXCITED}")
+        self.export_btn.clicked.connect(self.choose_file)
+        btn_layout.addWidget(self.export_btn)
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.reject)
+        btn_layout.addWidget(self.cancel_btn)
+        layout.addLayout(btn_layout)
+
+        self.on_kind_changed()
+
+    def on_kind_changed(self):
+        kind = self.kind_input.currentData()
+        # Bills are the same every month, so they have no dates to filter on
+        self.all_dates_input.setEnabled(kind != "bills")
+        dated = kind != "bills" and not self.all_dates_input.isChecked()
+        self.start_input.setEnabled(dated)
+        self.end_input.setEnabled(dated)
+
+        self.category_input.clear()
+        self.category_input.addItem("All categories", None)
+        categories = {"purchases": PURCHASE_CATEGORIES, "bills": BILL_CATEGORIES}.get(kind, [])
+        for category in categories:
+            self.category_input.addItem(category, category)
+        self.category_input.setEnabled(kind in CATEGORIZED)
+
+    def filters(self) -> dict:
+        filters = {"category": self.category_input.currentData()}
+        if self.start_input.isEnabled():
+            filters["start"] = self.start_input.date().toString("yyyy-MM-dd")
+            # "Through" includes the day picked; export.py's end doesn't
+            end = self.end_input.date().toPyDate() + timedelta(days=1)
+            filters["end"] = end.isoformat()
+        return filters
+
+    def choose_file(self):
+        kind, fmt = self.kind_input.currentData(), self.format_input.currentData()
+        extension = next(ext for ext, name in FORMATS.items() if name == fmt)
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, f"Save Export As {CAT_HAPPY}", f"nekobudget-{kind}{extension}",
+            EXPORT_FILTERS[fmt]
+        )
+        if file_path:
+            if not os.path.splitext(file_path)[1]:
+                file_path += extension
+            self.start_export(kind, file_path)
+
+    def start_export(self, kind: str, file_path: str):
+        filters = self.filters()  # Before the inputs are disabled, which filters() looks at
+        for widget in (self.kind_input, self.all_dates_input, self.start_input, self.end_input,
+                       self.category_input, self.format_input, self.export_btn):
+            widget.setEnabled(False)
+        self.progress_bar.show()
+        self.file_path = file_path
+
+        self.worker = ExportWorker(self.db, kind, file_path, filters, self)
+        self.worker.progress.connect(self.progress_bar.setValue)
+        self.worker.completed.connect(self.on_completed)
+        self.worker.failed.connect(self.on_failed)
+        self.worker.start()
+
+    def reject(self):
+        if self.worker and self.worker.isRunning():
+            # Closing the dialog cancels the export rather than orphaning the worker
+            self.cancel_btn.setEnabled(False)
+            self.cancel_btn.setText("Stopping...")
+            self.worker.requestInterruption()
+            return
+        super().reject()
+
+    def on_completed(self, counts: dict):
+        self.worker.wait()
+        if counts["cancelled"]:
+            QMessageBox.information(self, f"Export stopped {CAT_LOVE}",
+                                    "Export cancelled~ nothing was saved, nya~")
+            self.done(QDialog.DialogCode.Rejected.value)
+            return
+        QMessageBox.information(
+            self, f"All done! {CAT_EXCITED}",
+            f"Exported {counts['rows']:,} rows to {os.path.basename(self.file_path)}!"
+        )
+        self.accept()
+
+    def on_failed(self, error: str):
+        self.worker.wait()
+        QMessageBox.warning(self, f"Oopsie! {CAT_SAD}", f"Couldn't export that, nya~\n\n{error}")
+        self.done(QDialog.DialogCode.Rejected.value)
+
 
 class MonthlyBillsTab(QWidget):
     """Tab for managing monthly recurring bills."""
 
-    def __init__(self, db: Database, parent=None):
+    def __init__(self, db: Database, writer: DatabaseWriter, parent=None):
         super().__init__(parent)
         self.db = db
+        self.writer = writer
         self.setup_ui()
         self.load_bills()
 
@@ -244,10 +775,7 @@ class MonthlyBillsTab(QWidget):
 
         self.category_input = QComboBox()
         self.category_input.setEditable(True)
-        self.category_input.addItems([
-            "🏠 Housing", "💡 Utilities", "🛡️ Insurance", "🚗 Transportation",
-            "📺 Subscriptions", "💳 Loans", "📦 Other"
-        ])
+        self.category_input.addItems(BILL_CATEGORIES)
         form_layout.addRow("📂 Category:", self.category_input)
 
         self.add_btn = QPushButton(f"Add Bill {CAT_HAPPY}")
@@ -293,8 +821,8 @@ class MonthlyBillsTab(QWidget):
             QMessageBox.warning(self, f"Oopsie! {CAT_SAD}", "Please enter a valid amount, nya~")
             return
 
-        self.db.add_monthly_bill(name, amount, due_day, category)
-        self.load_bills()
+        self.writer.submit("add_monthly_bill", name, amount, due_day, category,
+                           on_done=self.load_bills)
 
         # Clear form
         self.name_input.clear()
@@ -331,16 +859,16 @@ class MonthlyBillsTab(QWidget):
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
         if reply == QMessageBox.StandardButton.Yes:
-            self.db.delete_monthly_bill(bill_id)
-            self.load_bills()
+            self.writer.submit("delete_monthly_bill", bill_id, on_done=self.load_bills)
 
 
 class PaycheckTab(QWidget):
     """Tab for managing paychecks."""
 
-    def __init__(self, db: Database, parent=None):
+    def __init__(self, db: Database, writer: DatabaseWriter, parent=None):
         super().__init__(parent)
         self.db = db
+        self.writer = writer
         self.setup_ui()
         self.load_paychecks()
 
@@ -373,7 +901,13 @@ class PaycheckTab(QWidget):
         self.add_btn = QPushButton(f"Add Paycheck {CAT_EXCITED}")
         self.add_btn.setStyleSheet(f"background-color: {COLORS['mint']}; color: {COLORS['text_dark']};")
         self.add_btn.clicked.connect(self.add_paycheck)
-        form_layout.addRow(self.add_btn)
+        self.split_btn = QPushButton(f"💸 Add & Split")
+        self.split_btn.setStyleSheet(f"background-color: {COLORS['lavender']};")
+        self.split_btn.clicked.connect(self.add_split_paycheck)
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addWidget(self.add_btn)
+        buttons_layout.addWidget(self.split_btn)
+        form_layout.addRow(buttons_layout)
 
         form_group.setLayout(form_layout)
         layout.addWidget(form_group)
@@ -396,6 +930,16 @@ class PaycheckTab(QWidget):
         self.month_filter.currentIndexChanged.connect(self.load_paychecks)
         filter_layout.addWidget(self.month_filter)
         filter_layout.addStretch()
+
+        import_btn = QPushButton("📥 Import Statement")
+        import_btn.setStyleSheet(f"background-color: {COLORS['lavender']};")
+        import_btn.clicked.connect(self.import_statement)
+        filter_layout.addWidget(import_btn)
+
+        export_btn = QPushButton("📤 Export")
+        export_btn.setStyleSheet(f"background-color: {COLORS['lavender']};")
+        export_btn.clicked.connect(self.export)
+        filter_layout.addWidget(export_btn)
         table_layout.addLayout(filter_layout)
 
         self.paychecks_table = QTableWidget()
@@ -425,14 +969,46 @@ class PaycheckTab(QWidget):
             QMessageBox.warning(self, f"Oopsie! {CAT_SAD}", "Please enter a valid amount, nya~")
             return
 
-        self.db.add_paycheck(amount, date, source or None, notes or None)
-        self.load_paychecks()
+        self.writer.submit("add_paycheck", amount, date, source or None, notes or None,
+                           on_done=self.load_paychecks)
 
         # Clear form
         self.amount_input.setValue(0)
         self.source_input.clear()
         self.notes_input.clear()
 
+    def add_split_paycheck(self):
+        amount = self.amount_input.value()
+        date = self.date_input.date().toString("yyyy-MM-dd")
+        source = self.source_input.text().strip()
+        notes = self.notes_input.text().strip()
+
+        if amount <= 0:
+            QMessageBox.warning(self, f"Oopsie! {CAT_SAD}", "Please enter a valid amount, nya~")
+            return
+
+        dialog = PaycheckSplitDialog(self.db, amount, self)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+
+        self.writer.submit(
+            "add_paycheck_with_split", amount, date, source or None, notes or None,
+            bill_account=dialog.bill_account, savings=dialog.savings,
+            on_done=self.load_paychecks
+        )
+
+        # Clear form
+        self.amount_input.setValue(0)
+        self.source_input.clear()
+        self.notes_input.clear()
+
+    def import_statement(self):
+        if choose_and_import_statement(self, self.db):
+            self.load_paychecks()
+
+    def export(self):
+        ExportDialog(self.db, "paychecks", self).exec()
+
     def load_paychecks(self):
         filter_data = self.month_filter.currentData()
         if filter_data:
@@ -466,20 +1042,103 @@ class PaycheckTab(QWidget):
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
         if reply == QMessageBox.StandardButton.Yes:
-            self.db.delete_paycheck(paycheck_id)
-            self.load_paychecks()
+            self.writer.submit("delete_paycheck", paycheck_id, on_done=self.load_paychecks)
+
+
+class PaycheckSplitDialog(QDialog):
+    """Dialog for splitting a paycheck between the bill account and savings."""
+
+    def __init__(self, db: Database, amount: float, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.amount = amount
+        self.setWindowTitle(f"💸 Split Paycheck {CAT_HAPPY}")
+        self.setMinimumWidth(350)
+        self.setStyleSheet(CUTE_STYLESHEET)
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QFormLayout(self)
+        layout.addRow(QLabel(f"{COIN} Paycheck: ${self.amount:.2f}"))
+
+        def amount_input(value=0.0):
+            spin_box = QDoubleSpinBox()
+            spin_box.setRange(0, self.amount)
+            spin_box.setPrefix("$")
+            spin_box.setDecimals(2)
+            spin_box.setValue(value)
+            spin_box.valueChanged.connect(self.update_remaining)
+            return spin_box
+
+        # Suggest the same per-paycheck share the dashboard shows
+        per_paycheck = self.db.get_total_monthly_bills() / 2
+        self.bill_account_input = amount_input(min(per_paycheck, self.amount))
+        layout.addRow("🏦 Bill Account:", self.bill_account_input)
+
+        self.savings_inputs = {}
+        for account in self.db.get_savings_accounts():
+            self.savings_inputs[account["id"]] = amount_input()
+            layout.addRow(f"{PIGGY} {account['name']}:", self.savings_inputs[account["id"]])
+
+        self.remaining_label = QLabel()
+        self.remaining_label.setFont(QFont("Segoe UI", 11, QFont.Weight.Bold))
+        layout.addRow(self.remaining_label)
+        self.update_remaining()
+
+        buttons = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel
+        )
+        buttons.accepted.connect(self.validate_and_accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+
+    def allocated(self) -> float:
+        return self.bill_account_input.value() + sum(
+            spin_box.value() for spin_box in self.savings_inputs.values()
+        )
+
+    def update_remaining(self):
+        remaining = self.amount - self.allocated()
+        color = COLORS["coral"] if remaining < 0 else COLORS["mint"]
+        self.remaining_label.setStyleSheet(f"color: {color};")
+        self.remaining_label.setText(f"{SPARKLE} Left to spend: ${remaining:.2f}")
+
+    def validate_and_accept(self):
+        if round(self.allocated(), 2) > round(self.amount, 2):
+            QMessageBox.warning(self, f"Oopsie! {CAT_SAD}",
+                                "That's more than the whole paycheck, nya~")
+            return
+
+        self.bill_account = self.bill_account_input.value()
+        self.savings = {savings_id: spin_box.value()
+                        for savings_id, spin_box in self.savings_inputs.items()}
+        self.accept()
 
 
 class PurchasesTab(QWidget):
     """Tab for tracking purchases with receipt upload."""
 
-    def __init__(self, db: Database, parent=None):
+    def __init__(self, db: Database, writer: DatabaseWriter, receipts: ReceiptStore,
+                 ingest: ReceiptIngestWorker, thumbnails: ThumbnailCache, parent=None):
         super().__init__(parent)
         self.db = db
+        self.writer = writer
+        self.receipts = receipts
+        self.ingest = ingest
+        self.thumbnails = thumbnails
+        self.thumbnails.ready.connect(self.on_thumbnail_ready)
+        # receipt_path -> table rows showing it, for previews that arrive later
+        self.receipt_rows = {}
+        self.ingest.progress.connect(self.on_ingest_progress)
+        self.ingest.completed.connect(self.on_ingest_completed)
+        self.ingest.failed.connect(self.on_ingest_failed)
+        self.ingesting = set()
+        self.pending_receipts = {}
         self.receipt_path = None
-        self.receipts_dir = "receipts"
-        os.makedirs(self.receipts_dir, exist_ok=True)
+        self.page_filter = (None, None)
+        self.page_token = None
         self.setup_ui()
+        self.resume_pending_receipts()
         self.load_purchases()
 
     def setup_ui(self):
@@ -506,10 +1165,7 @@ class PurchasesTab(QWidget):
 
         self.category_input = QComboBox()
         self.category_input.setEditable(True)
-        self.category_input.addItems([
-            "🛒 Groceries", "🍽️ Dining", "🚗 Transportation", "🎮 Entertainment",
-            "🛍️ Shopping", "💊 Healthcare", "💅 Personal Care", "📦 Other"
-        ])
+        self.category_input.addItems(PURCHASE_CATEGORIES)
         form_layout.addRow("📂 Category:", self.category_input)
 
         # Receipt upload
@@ -525,6 +1181,21 @@ class PurchasesTab(QWidget):
         receipt_layout.addWidget(self.clear_receipt_btn)
         form_layout.addRow("🧾 Receipt:", receipt_layout)
 
+        # Shown while receipts are being copied into the store
+        self.ingest_row = QWidget()
+        ingest_layout = QHBoxLayout(self.ingest_row)
+        ingest_layout.setContentsMargins(0, 0, 0, 0)
+        self.ingest_label = QLabel()
+        ingest_layout.addWidget(self.ingest_label)
+        self.ingest_bar = QProgressBar()
+        self.ingest_bar.setRange(0, 100)
+        ingest_layout.addWidget(self.ingest_bar)
+        self.ingest_cancel_btn = QPushButton("Cancel")
+        self.ingest_cancel_btn.clicked.connect(self.cancel_ingest)
+        ingest_layout.addWidget(self.ingest_cancel_btn)
+        self.ingest_row.hide()
+        form_layout.addRow(self.ingest_row)
+
         self.notes_input = QLineEdit()
         self.notes_input.setPlaceholderText("Any notes? (optional)")
         form_layout.addRow("📝 Notes:", self.notes_input)
@@ -554,7 +1225,28 @@ class PurchasesTab(QWidget):
                 self.month_filter.addItem(month_name, (year, month))
         self.month_filter.currentIndexChanged.connect(self.load_purchases)
         filter_layout.addWidget(self.month_filter)
-        filter_layout.addStretch()
+
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("🔎 Search name, notes or category~")
+        self.search_input.setClearButtonEnabled(True)
+        filter_layout.addWidget(self.search_input, 1)
+
+        # Debounce: restart the timer on every keystroke, search when it fires
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.load_purchases)
+        self.search_input.textChanged.connect(self.search_timer.start)
+
+        import_btn = QPushButton("📥 Import Statement")
+        import_btn.setStyleSheet(f"background-color: {COLORS['lavender']};")
+        import_btn.clicked.connect(self.import_statement)
+        filter_layout.addWidget(import_btn)
+
+        export_btn = QPushButton("📤 Export")
+        export_btn.setStyleSheet(f"background-color: {COLORS['lavender']};")
+        export_btn.clicked.connect(self.export)
+        filter_layout.addWidget(export_btn)
         table_layout.addLayout(filter_layout)
 
         self.purchases_table = QTableWidget()
@@ -564,6 +1256,9 @@ class PurchasesTab(QWidget):
         ])
         self.purchases_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.purchases_table.setAlternatingRowColors(True)
+        self.purchases_table.setIconSize(QSize(PREVIEW_SIZE, PREVIEW_SIZE))
+        self.purchases_table.verticalScrollBar().valueChanged.connect(self.on_purchases_scrolled)
+        self.purchases_table.cellClicked.connect(self.on_purchase_clicked)
         table_layout.addWidget(self.purchases_table)
 
         self.total_label = QLabel(f"Total: $0.00 {CAT_HAPPY}")
@@ -602,17 +1297,12 @@ class PurchasesTab(QWidget):
             QMessageBox.warning(self, f"Oopsie! {CAT_SAD}", "Please enter a valid amount, nya~")
             return
 
-        # Copy receipt to receipts directory
-        saved_receipt_path = None
+        # The purchase is saved right away; its receipt follows once it's
+        # been copied into the store in the background
+        self.writer.submit("add_purchase", name, amount, date, category, None, notes or None,
+                           receipt_pending=self.receipt_path, on_done=self.load_purchases)
         if self.receipt_path:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            ext = os.path.splitext(self.receipt_path)[1]
-            new_filename = f"receipt_{timestamp}{ext}"
-            saved_receipt_path = os.path.join(self.receipts_dir, new_filename)
-            shutil.copy2(self.receipt_path, saved_receipt_path)
-
-        self.db.add_purchase(name, amount, date, category, saved_receipt_path, notes or None)
-        self.load_purchases()
+            self.ingest_receipt(self.receipt_path)
 
         # Clear form
         self.name_input.clear()
@@ -620,30 +1310,114 @@ class PurchasesTab(QWidget):
         self.notes_input.clear()
         self.clear_receipt()
 
+    def ingest_receipt(self, source: str):
+        if source in self.ingesting:
+            return  # Every purchase waiting on it gets the one copy
+        self.ingesting.add(source)
+        self.ingest.submit(source)
+        self.ingest_label.setText(f"⏳ Saving {len(self.ingesting)} receipt(s)~")
+        self.ingest_bar.setValue(0)
+        self.ingest_cancel_btn.setEnabled(True)
+        self.ingest_row.show()
+
+    def resume_pending_receipts(self):
+        """Pick up receipts whose copy didn't finish before the app last closed."""
+        for source in set(self.db.get_pending_receipts().values()):
+            if os.path.isfile(source):
+                self.ingest_receipt(source)
+            else:
+                self.writer.submit("finish_pending_receipt", source, None,
+                                   on_done=self.load_purchases)
+
+    def cancel_ingest(self):
+        self.ingest_cancel_btn.setEnabled(False)
+        for source in self.ingesting:
+            self.ingest.cancel(source)
+
+    def on_ingest_progress(self, source: str, percent: int):
+        self.ingest_label.setText(f"⏳ Saving {os.path.basename(source)}~")
+        self.ingest_bar.setValue(percent)
+
+    def on_ingest_completed(self, source: str, key: str):
+        self.finish_ingest(source, key)
+
+    def on_ingest_failed(self, source: str, error: str):
+        self.finish_ingest(source, "")
+        QMessageBox.warning(self, f"Oopsie! {CAT_SAD}", f"Couldn't save that receipt, nya~\n\n{error}")
+
+    def finish_ingest(self, source: str, key: str):
+        # Through the writer, so it lands after the purchase it belongs to
+        self.writer.submit("finish_pending_receipt", source, key or None,
+                           on_done=self.load_purchases)
+        self.ingesting.discard(source)
+        if not self.ingesting:
+            self.ingest_row.hide()
+
+    def import_statement(self):
+        if choose_and_import_statement(self, self.db):
+            self.load_purchases()
+
+    def export(self):
+        ExportDialog(self.db, "purchases", self).exec()
+
     def load_purchases(self):
+        self.search_timer.stop()
+        self.pending_receipts = self.db.get_pending_receipts()
         filter_data = self.month_filter.currentData()
-        if filter_data:
-            year, month = filter_data
-            purchases = self.db.get_purchases(year, month)
-        else:
-            purchases = self.db.get_purchases()
+        year, month = filter_data if filter_data else (None, None)
+
+        self.page_filter = (year, month)
+        self.page_token = None
+        self.purchases_table.setRowCount(0)
+        self.receipt_rows = {}
+        self.thumbnails.cancel_pending()
+
+        query = self.search_input.text().strip()
+        if query:
+            # Search results come ranked in one go, so there's nothing to page
+            purchases = self.db.search_purchases(query, SEARCH_LIMIT, year, month)
+            self.add_purchase_rows(purchases)
+            total = sum(p["amount"] for p in purchases)
+            self.total_label.setText(
+                f"{SPARKLE} {len(purchases)} matches, ${total:.2f} {CAT_LOVE}"
+            )
+            return
 
-        self.purchases_table.setRowCount(len(purchases))
+        # Only the first page is loaded here; more are fetched on scroll
+        self.load_more_purchases()
 
-        total = 0
-        for row, purchase in enumerate(purchases):
+        total = self.db.get_purchases_total(year, month)
+        self.total_label.setText(f"{SPARKLE} Total Spent: ${total:.2f} {CAT_LOVE}")
+
+    def load_more_purchases(self):
+        year, month = self.page_filter
+        purchases, self.page_token = self.db.page_purchases(
+            after=self.page_token, limit=PAGE_SIZE, year=year, month=month
+        )
+        self.add_purchase_rows(purchases)
+
+    def add_purchase_rows(self, purchases):
+        start = self.purchases_table.rowCount()
+        self.purchases_table.setRowCount(start + len(purchases))
+
+        for row, purchase in enumerate(purchases, start):
             self.purchases_table.setItem(row, 0, QTableWidgetItem(purchase["date"]))
             self.purchases_table.setItem(row, 1, QTableWidgetItem(purchase["name"]))
             self.purchases_table.setItem(row, 2, QTableWidgetItem(f"${purchase['amount']:.2f}"))
             self.purchases_table.setItem(row, 3, QTableWidgetItem(purchase["category"] or ""))
             self.purchases_table.setItem(row, 4, QTableWidgetItem(purchase["notes"] or ""))
 
-            # Receipt view button
-            if purchase["receipt_path"]:
-                view_btn = QPushButton("👀 View")
-                view_btn.setStyleSheet(f"background-color: {COLORS['sky']}; color: white;")
-                view_btn.clicked.connect(lambda checked, p=purchase: self.view_receipt(p["receipt_path"]))
-                self.purchases_table.setCellWidget(row, 5, view_btn)
+            # Receipt preview; the thumbnail is filled in once it's loaded.
+            # A plain item rather than a widget keeps long lists cheap to scroll.
+            if purchase["id"] in self.pending_receipts:
+                self.purchases_table.setItem(row, 5, QTableWidgetItem("⏳ Saving~"))
+            elif purchase["receipt_path"]:
+                receipt_item = QTableWidgetItem("👀 View")
+                receipt_item.setData(Qt.ItemDataRole.UserRole, purchase["receipt_path"])
+                receipt_item.setToolTip("Click to see the receipt~")
+                self.purchases_table.setItem(row, 5, receipt_item)
+                self.purchases_table.setRowHeight(row, PREVIEW_SIZE + 4)
+                self.receipt_rows.setdefault(purchase["receipt_path"], []).append(row)
             else:
                 self.purchases_table.setItem(row, 5, QTableWidgetItem("~"))
 
@@ -652,13 +1426,56 @@ class PurchasesTab(QWidget):
             delete_btn.clicked.connect(lambda checked, p=purchase: self.delete_purchase(p["id"]))
             self.purchases_table.setCellWidget(row, 6, delete_btn)
 
-            total += purchase["amount"]
-
-        self.total_label.setText(f"{SPARKLE} Total Spent: ${total:.2f} {CAT_LOVE}")
+        # Once the new rows are laid out
+        QTimer.singleShot(0, self.show_visible_previews)
+
+    def on_purchases_scrolled(self, value):
+        scroll_bar = self.purchases_table.verticalScrollBar()
+        if self.page_token and value >= scroll_bar.maximum() - SCROLL_FETCH_MARGIN:
+            self.load_more_purchases()
+        # Rows scrolled past no longer need their previews first
+        self.thumbnails.cancel_pending()
+        self.show_visible_previews()
+
+    def show_visible_previews(self):
+        """Show (or start loading) the previews of the rows on screen."""
+        table = self.purchases_table
+        if not table.rowCount():
+            return
+        first = max(table.rowAt(0), 0)
+        last = table.rowAt(table.viewport().height() - 1)
+        if last < 0:
+            last = table.rowCount() - 1
+        for row in range(first, last + 1):
+            item = table.item(row, 5)
+            receipt_path = item.data(Qt.ItemDataRole.UserRole) if item else None
+            if receipt_path and item.icon().isNull():
+                self.set_preview(item, receipt_path)
+
+    def set_preview(self, item: QTableWidgetItem, receipt_path: str):
+        pixmap = self.thumbnails.get(receipt_path)
+        if pixmap is not None:
+            item.setIcon(QIcon(pixmap))
+            item.setText("")
+        elif self.thumbnails.is_unsupported(receipt_path):
+            item.setText("📄 View")
+
+    def on_thumbnail_ready(self, receipt_path: str):
+        for row in self.receipt_rows.get(receipt_path, ()):
+            item = self.purchases_table.item(row, 5)
+            if item is not None:
+                self.set_preview(item, receipt_path)
+
+    def on_purchase_clicked(self, row: int, column: int):
+        item = self.purchases_table.item(row, column)
+        receipt_path = item.data(Qt.ItemDataRole.UserRole) if item and column == 5 else None
+        if receipt_path:
+            self.view_receipt(receipt_path)
 
     def view_receipt(self, receipt_path):
+        receipt_path = self.receipts.resolve(receipt_path)
         if os.path.exists(receipt_path):
-            os.startfile(receipt_path)
+            ReceiptViewerDialog(receipt_path, self).exec()
         else:
             QMessageBox.warning(self, f"Oopsie! {CAT_SAD}", "Receipt file not found, nya~")
 
@@ -669,16 +1486,61 @@ class PurchasesTab(QWidget):
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
         if reply == QMessageBox.StandardButton.Yes:
-            self.db.delete_purchase(purchase_id)
-            self.load_purchases()
+            self.writer.submit("delete_purchase", purchase_id, on_done=self.load_purchases)
+
+
+class ReceiptViewerDialog(QDialog):
+    """Show a receipt picture, with a way out to the system viewer."""
+
+    def __init__(self, path: str, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.setWindowTitle(f"🧾 {os.path.basename(path)} {CAT_HAPPY}")
+        self.setStyleSheet(CUTE_STYLESHEET)
+
+        layout = QVBoxLayout(self)
+        screen = self.screen().availableGeometry()
+        bounds = QSize(int(screen.width() * 0.8), int(screen.height() * 0.75))
+        image = read_image(path, bounds)
+        if image.isNull():
+            # Most likely a PDF, which Qt can't draw by itself
+            message = QLabel(f"📄 This receipt can't be shown here, nya~\n\nOpen it in another app instead {CAT_LOVE}")
+            message.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            layout.addWidget(message)
+        else:
+            picture = QLabel()
+            picture.setPixmap(QPixmap.fromImage(image))
+            picture.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            scroll = QScrollArea()
+            scroll.setWidget(picture)
+            scroll.setWidgetResizable(True)
+            scroll.setMinimumSize(min(image.width() + 24, bounds.width()),
+                                  min(image.height() + 24, bounds.height()))
+            layout.addWidget(scroll)
+
+        btn_layout = QHBoxLayout()
+        open_btn = QPushButton("📂 Open in Another App")
+        open_btn.clicked.connect(self.open_externally)
+        btn_layout.addWidget(open_btn)
+        btn_layout.addStretch()
+        close_btn = QPushButton(f"Close {CAT_HAPPY}")
+        close_btn.clicked.connect(self.accept)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+
+    def open_externally(self):
+        url = QUrl.fromLocalFile(os.path.abspath(self.path))
+        if not QDesktopServices.openUrl(url):
+            QMessageBox.warning(self, f"Oopsie! {CAT_SAD}", "No app could open this receipt, nya~")
 
 
 class SavingsTab(QWidget):
     """Tab for managing savings accounts."""
 
-    def __init__(self, db: Database, parent=None):
+    def __init__(self, db: Database, writer: DatabaseWriter, parent=None):
         super().__init__(parent)
         self.db = db
+        self.writer = writer
         self.setup_ui()
         self.load_savings()
 
@@ -739,8 +1601,8 @@ class SavingsTab(QWidget):
             QMessageBox.warning(self, f"Oopsie! {CAT_SAD}", "Please enter an account name, nya~")
             return
 
-        self.db.add_savings_account(name, initial_amount, goal)
-        self.load_savings()
+        self.writer.submit("add_savings_account", name, initial_amount, goal,
+                           on_done=self.load_savings)
 
         # Clear form
         self.name_input.clear()
@@ -836,12 +1698,10 @@ class SavingsTab(QWidget):
             notes = dialog.notes
             date = dialog.date
 
-            self.db.add_savings_transaction(savings_id, amount, transaction_type, date, notes)
-            self.load_savings()
+            self.writer.submit("add_savings_transaction", savings_id, amount, transaction_type,
+                               date, notes, on_done=self.load_savings)
 
     def show_history(self, savings_id, name):
-        transactions = self.db.get_savings_transactions(savings_id)
-
         dialog = QDialog(self)
         dialog.setWindowTitle(f"{SPARKLE} Transaction History - {name} {SPARKLE}")
         dialog.setMinimumSize(500, 400)
@@ -853,22 +1713,36 @@ class SavingsTab(QWidget):
         table.setColumnCount(4)
         table.setHorizontalHeaderLabels(["📅 Date", "📋 Type", "💰 Amount", "📝 Notes"])
         table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        table.setRowCount(len(transactions))
         table.setAlternatingRowColors(True)
 
-        for row, trans in enumerate(transactions):
-            table.setItem(row, 0, QTableWidgetItem(trans["date"]))
-            type_emoji = "💰" if trans["transaction_type"] == "deposit" else "💸"
-            table.setItem(row, 1, QTableWidgetItem(f"{type_emoji} {trans['transaction_type'].title()}"))
-
-            amount_str = f"${trans['amount']:.2f}"
-            if trans["transaction_type"] == "deposit":
-                amount_str = "+" + amount_str
-            else:
-                amount_str = "-" + amount_str
-            table.setItem(row, 2, QTableWidgetItem(amount_str))
-            table.setItem(row, 3, QTableWidgetItem(trans["notes"] or ""))
+        page = {"token": None}
 
+        def load_more():
+            transactions, page["token"] = self.db.page_savings_transactions(
+                savings_id, after=page["token"], limit=PAGE_SIZE
+            )
+            start = table.rowCount()
+            table.setRowCount(start + len(transactions))
+
+            for row, trans in enumerate(transactions, start):
+                table.setItem(row, 0, QTableWidgetItem(trans["date"]))
+                type_emoji = "💰" if trans["transaction_type"] == "deposit" else "💸"
+                table.setItem(row, 1, QTableWidgetItem(f"{type_emoji} {trans['transaction_type'].title()}"))
+
+                amount_str = f"${trans['amount']:.2f}"
+                if trans["transaction_type"] == "deposit":
+                    amount_str = "+" + amount_str
+                else:
+                    amount_str = "-" + amount_str
+                table.setItem(row, 2, QTableWidgetItem(amount_str))
+                table.setItem(row, 3, QTableWidgetItem(trans["notes"] or ""))
+
+        def on_scrolled(value):
+            if page["token"] and value >= table.verticalScrollBar().maximum() - SCROLL_FETCH_MARGIN:
+                load_more()
+
+        load_more()
+        table.verticalScrollBar().valueChanged.connect(on_scrolled)
         layout.addWidget(table)
 
         close_btn = QPushButton(f"Close {CAT_HAPPY}")
@@ -884,8 +1758,7 @@ class SavingsTab(QWidget):
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
         if reply == QMessageBox.StandardButton.Yes:
-            self.db.delete_savings_account(savings_id)
-            self.load_savings()
+            self.writer.submit("delete_savings_account", savings_id, on_done=self.load_savings)
 
 
 class TransactionDialog(QDialog):
@@ -938,9 +1811,10 @@ class TransactionDialog(QDialog):
 class BillAccountTab(QWidget):
     """Tab for managing the bill account - money set aside for bills."""
 
-    def __init__(self, db: Database, parent=None):
+    def __init__(self, db: Database, writer: DatabaseWriter, parent=None):
         super().__init__(parent)
         self.db = db
+        self.writer = writer
         self.setup_ui()
         self.refresh()
 
@@ -1112,9 +1986,9 @@ class BillAccountTab(QWidget):
             return
 
         date = QDate.currentDate().toString("yyyy-MM-dd")
-        self.db.add_bill_account_transaction(amount, "deposit", date, "Quick deposit~")
+        self.writer.submit("add_bill_account_transaction", amount, "deposit", date,
+                           "Quick deposit~", on_done=self.refresh)
         self.deposit_amount.setValue(0)
-        self.refresh()
 
     def quick_withdraw(self):
         amount = self.deposit_amount.value()
@@ -1128,9 +2002,9 @@ class BillAccountTab(QWidget):
             return
 
         date = QDate.currentDate().toString("yyyy-MM-dd")
-        self.db.add_bill_account_transaction(amount, "withdraw", date, "Quick withdraw~")
+        self.writer.submit("add_bill_account_transaction", amount, "withdraw", date,
+                           "Quick withdraw~", on_done=self.refresh)
         self.deposit_amount.setValue(0)
-        self.refresh()
 
     def add_transaction(self):
         amount = self.amount_input.value()
@@ -1149,12 +2023,12 @@ class BillAccountTab(QWidget):
                 QMessageBox.warning(self, f"Oopsie! {CAT_SAD}", "Not enough funds, nya~")
                 return
 
-        self.db.add_bill_account_transaction(amount, trans_type, date, notes)
+        self.writer.submit("add_bill_account_transaction", amount, trans_type, date, notes,
+                           on_done=self.refresh)
 
         # Clear form
         self.amount_input.setValue(0)
         self.notes_input.clear()
-        self.refresh()
 
     def set_balance(self):
         new_balance = self.set_balance_input.value()
@@ -1164,17 +2038,17 @@ class BillAccountTab(QWidget):
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
         if reply == QMessageBox.StandardButton.Yes:
-            self.db.set_bill_account_balance(new_balance)
+            self.writer.submit("set_bill_account_balance", new_balance, on_done=self.refresh)
             self.set_balance_input.setValue(0)
-            self.refresh()
 
 
 class DashboardTab(QWidget):
     """Dashboard showing budget summary and paycheck breakdown."""
 
-    def __init__(self, db: Database, parent=None):
+    def __init__(self, db: Database, writer: DatabaseWriter, parent=None):
         super().__init__(parent)
         self.db = db
+        self.writer = writer
         self.current_year = datetime.now().year
         self.current_month = datetime.now().month
         self.setup_ui()
@@ -1313,17 +2187,17 @@ class DashboardTab(QWidget):
         self.current_month = month
 
         # Get data
-        bills = self.db.get_monthly_bills()
-        total_bills = sum(b["amount"] for b in bills)
-        paid_bill_ids = self.db.get_paid_bill_ids(year, month)
-        unpaid_total = self.db.get_unpaid_bills_total(year, month)
-
-        paychecks = self.db.get_paychecks(year, month)
-        total_income = sum(p["amount"] for p in paychecks)
-        purchases = self.db.get_purchases(year, month)
-        total_spending = sum(p["amount"] for p in purchases)
-        savings_accounts = self.db.get_savings_accounts()
-        total_savings = sum(s["current_amount"] for s in savings_accounts)
+        snapshot = self.db.get_dashboard_snapshot(year, month)
+        bills = snapshot["bills"]
+        total_bills = snapshot["total_bills"]
+        paid_bill_ids = {b["id"] for b in bills if b["paid"]}
+        unpaid_total = snapshot["unpaid_bills_total"]
+
+        paychecks = snapshot["paychecks"]
+        total_income = snapshot["total_income"]
+        total_spending = snapshot["total_spending"]
+        savings_accounts = snapshot["savings_accounts"]
+        total_savings = snapshot["total_savings"]
 
         # Update Bills Table with checkboxes
         self.bills_table.setRowCount(len(bills))
@@ -1370,7 +2244,7 @@ class DashboardTab(QWidget):
 
         # Update Income
         income_text = f"{SPARKLE} Total Income: ${total_income:.2f}\n"
-        income_text += f"💵 Paychecks Received: {len(paychecks)}\n"
+        income_text += f"💵 Paychecks Received: {snapshot['paycheck_count']}\n"
         if paychecks:
             income_text += "\n📋 Paychecks:\n"
             for p in paychecks:
@@ -1382,13 +2256,13 @@ class DashboardTab(QWidget):
 
         # Update Spending
         spending_text = f"{SPARKLE} Total Purchases: ${total_spending:.2f}\n"
-        spending_text += f"🛒 Number of Purchases: {len(purchases)}\n"
+        spending_text += f"🛒 Number of Purchases: {snapshot['purchase_count']}\n"
 
         # Category breakdown
         categories = {}
-        for p in purchases:
-            cat = p["category"] or "📦 Other"
-            categories[cat] = categories.get(cat, 0) + p["amount"]
+        for row in snapshot["spending_by_category"]:
+            cat = row["category"] or "📦 Other"
+            categories[cat] = categories.get(cat, 0) + row["total"]
 
         if categories:
             spending_text += "\n📊 By Category:\n"
@@ -1430,7 +2304,7 @@ class DashboardTab(QWidget):
             paycheck_text += f"  ${unpaid_per_paycheck:.2f} per paycheck\n\n"
 
         if total_income > 0:
-            avg_paycheck = total_income / max(len(paychecks), 1)
+            avg_paycheck = total_income / max(snapshot["paycheck_count"], 1)
             after_bills = avg_paycheck - amount_per_paycheck
             paycheck_text += f"📊 Average Paycheck: ${avg_paycheck:.2f}\n"
             paycheck_text += f"{CAT_HAPPY} After Bills Allocation: ${after_bills:.2f}\n"
@@ -1440,7 +2314,7 @@ class DashboardTab(QWidget):
         self.paycheck_breakdown_label.setText(paycheck_text)
 
         # Bill Account Overview
-        bill_account_balance = self.db.get_bill_account_balance()
+        bill_account_balance = snapshot["bill_account_balance"]
         bill_account_text = f"💰 Balance: ${bill_account_balance:.2f}\n"
 
         if unpaid_total > 0:
@@ -1474,25 +2348,233 @@ class DashboardTab(QWidget):
 
         self.savings_label.setText(savings_text)
 
+        # People usually step back a month next, so have it ready
+        prev_year, prev_month = (year, month - 1) if month > 1 else (year - 1, 12)
+        QThreadPool.globalInstance().start(
+            PrefetchTask(self.db.get_dashboard_snapshot, prev_year, prev_month)
+        )
+
     def on_bill_paid_changed(self, bill_id: int, state: int):
         """Handle when a bill's paid checkbox is toggled."""
         today = QDate.currentDate().toString("yyyy-MM-dd")
 
+        # Refresh to update totals once the write is committed
         if state == 2:  # Checked (Qt.CheckState.Checked = 2)
-            self.db.mark_bill_paid(bill_id, self.current_year, self.current_month, today)
+            self.writer.submit("mark_bill_paid", bill_id, self.current_year,
+                               self.current_month, today, on_done=self.refresh)
         else:  # Unchecked
-            self.db.mark_bill_unpaid(bill_id, self.current_year, self.current_month)
+            self.writer.submit("mark_bill_unpaid", bill_id, self.current_year,
+                               self.current_month, on_done=self.refresh)
+
+
+class DiagnosticsDialog(QDialog):
+    """Hidden dialog (Ctrl+Shift+D) showing query timings and cache stats."""
+
+    COLUMNS = ["method", "calls", "total_ms", "p50_ms", "p95_ms", "p99_ms", "rows"]
+
+    backup_requested = pyqtSignal()
+
+    def __init__(self, db: Database, backup_settings: dict, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.backup_settings = backup_settings
+        self.archive_worker = None
+        self.setWindowTitle(f"🔧 Diagnostics {CAT_SPARKLE}")
+        self.setMinimumSize(800, 600)
+        self.setStyleSheet(CUTE_STYLESHEET)
+        self.setup_ui()
+        self.refresh()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        self.methods_table = QTableWidget()
+        self.methods_table.setColumnCount(len(self.COLUMNS))
+        self.methods_table.setHorizontalHeaderLabels(
+            ["Method", "Calls", "Total ms", "p50 ms", "p95 ms", "p99 ms", "Rows"]
+        )
+        self.methods_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.methods_table.setAlternatingRowColors(True)
+        layout.addWidget(self.methods_table, 2)
+
+        layout.addWidget(QLabel("🐢 Slow queries:"))
+        self.slow_queries_text = QTextEdit()
+        self.slow_queries_text.setReadOnly(True)
+        self.slow_queries_text.setFont(QFont("Consolas", 9))
+        layout.addWidget(self.slow_queries_text, 1)
+
+        btn_layout = QHBoxLayout()
+        refresh_btn = QPushButton("🔄 Refresh")
+        refresh_btn.clicked.connect(self.refresh)
+        btn_layout.addWidget(refresh_btn)
+        reset_btn = QPushButton("🧹 Reset")
+        reset_btn.clicked.connect(self.reset)
+        btn_layout.addWidget(reset_btn)
+        self.archive_btn = QPushButton("🗄️ Archive Year...")
+        self.archive_btn.clicked.connect(self.archive_year)
+        btn_layout.addWidget(self.archive_btn)
+        self.restore_btn = QPushButton("📂 Restore Year...")
+        self.restore_btn.clicked.connect(self.restore_year)
+        btn_layout.addWidget(self.restore_btn)
+        backup_btn = QPushButton("💾 Back Up Now")
+        backup_btn.clicked.connect(self.backup_requested)
+        btn_layout.addWidget(backup_btn)
+        btn_layout.addStretch()
+        close_btn = QPushButton(f"Close {CAT_HAPPY}")
+        close_btn.clicked.connect(self.accept)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+
+    def refresh(self):
+        cache = self.db.cache_stats()
+        pool = self.db.pool.check()
+        receipts = self.db.get_receipt_stats()
+        summary = (
+            f"Query cache: {cache['size']}/{cache['max_size']} entries, "
+            f"{cache['hit_rate']:.0%} hit rate ({cache['hits']} hits, {cache['misses']} misses)\n"
+            f"Connections: {pool['healthy_readers']}/{pool['readers']} readers healthy, "
+            f"writer {'ok' if pool['writer_ok'] else 'BROKEN'}\n"
+            f"Archived years: {', '.join(map(str, self.db.get_archived_years())) or 'none'}\n"
+            f"Last backup: {self.last_backup()}\n"
+            f"Receipts: {receipts['receipts']} stored in {receipts['stored_bytes'] / 2**20:.1f} MiB "
+            f"({receipts['original_bytes'] / 2**20:.1f} MiB as attached, "
+            f"{receipts['referenced_bytes'] / 2**20:.1f} MiB before deduplication)"
+        )
 
-        # Refresh to update totals
+        profiler = self.db.profiler
+        if not profiler:
+            self.summary_label.setText(
+                f"{summary}\n\nQuery timing is off. Set \"diagnostics\": {{\"enabled\": true}} "
+                f"in nekobudget.json and restart to turn it on."
+            )
+            return
+
+        report = profiler.report()
+        self.summary_label.setText(f"{summary}\nStatements run: {profiler.statements}")
+        self.methods_table.setRowCount(len(report))
+        for row, entry in enumerate(report):
+            for column, key in enumerate(self.COLUMNS):
+                value = entry[key]
+                text = f"{value:.2f}" if isinstance(value, float) else str(value)
+                self.methods_table.setItem(row, column, QTableWidgetItem(text))
+
+        self.slow_queries_text.setPlainText("\n\n".join(
+            f"{query['ms']:.1f} ms in {query['method'] or '-'}\n{query['sql']}\n"
+            + "\n".join(f"  {step}" for step in query["plan"])
+            for query in reversed(profiler.recent_slow_queries())
+        ))
+
+    def last_backup(self) -> str:
+        backups = list_backups(self.db.db_path, self.backup_settings["directory"])
+        if not backups:
+            return "never"
+        when, path = backups[0]
+        return f"{when:%Y-%m-%d %H:%M} ({path})"
+
+    def reset(self):
+        if self.db.profiler:
+            self.db.profiler.reset()
+        self.refresh()
+
+    def archive_year(self):
+        last_year = datetime.now().year - 1
+        year, ok = QInputDialog.getInt(self, f"🗄️ Archive Year {CAT_SPARKLE}",
+                                       "Move which year to its own archive file?",
+                                       last_year, 1900, last_year)
+        if not ok:
+            return
+        reply = QMessageBox.question(
+            self, f"Confirm {CAT_LOVE}",
+            f"Archive {year}?\n\nIts purchases, paychecks and transactions stay visible "
+            f"but can't be changed until the year is restored.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+
+        self.start_archive_worker("archive", year)
+
+    def restore_year(self):
+        years = [str(year) for year in self.db.get_archived_years()]
+        if not years:
+            QMessageBox.information(self, f"Nothing to restore {CAT_HAPPY}", "No years are archived, nya~")
+            return
+        year, ok = QInputDialog.getItem(self, f"📂 Restore Year {CAT_SPARKLE}",
+                                        "Move which year back so it can be changed again?",
+                                        years, len(years) - 1, False)
+        if ok:
+            self.start_archive_worker("restore", int(year))
+
+    def start_archive_worker(self, action: str, year: int):
+        self.archive_btn.setEnabled(False)
+        self.restore_btn.setEnabled(False)
+        QApplication.setOverrideCursor(Qt.CursorShape.BusyCursor)
+        self.archive_worker = ArchiveWorker(self.db, action, year, self)
+        self.archive_worker.completed.connect(self.on_archive_completed)
+        self.archive_worker.failed.connect(self.on_archive_failed)
+        self.archive_worker.finished.connect(self.on_archive_finished)
+        self.archive_worker.start()
+
+    def on_archive_finished(self):
+        QApplication.restoreOverrideCursor()
+        self.archive_btn.setEnabled(True)
+        self.restore_btn.setEnabled(True)
         self.refresh()
 
+    def on_archive_completed(self, counts: dict):
+        worker = self.archive_worker
+        if worker.action == "archive":
+            message = f"Archived {worker.year} to {os.path.basename(self.db.archive_path(worker.year))}:"
+        else:
+            message = f"Restored {worker.year}, it can be changed again~"
+        QMessageBox.information(
+            self, f"All done! {CAT_HAPPY}",
+            f"{message}\n\n" + "\n".join(f"{table}: {rows}" for table, rows in counts.items())
+        )
+
+    def on_archive_failed(self, error: str):
+        worker = self.archive_worker
+        QMessageBox.warning(self, f"Oopsie! {CAT_SAD}",
+                            f"Couldn't {worker.action} {worker.year}, nya~\n\n{error}")
+
+    def done(self, result: int):
+        # The worker can't be stopped part way, so stay open until it's finished
+        if self.archive_worker and self.archive_worker.isRunning():
+            return
+        super().done(result)
+
 
 class MainWindow(QMainWindow):
     """Main application window."""
 
-    def __init__(self):
+    def __init__(self, config=None):
         super().__init__()
-        self.db = Database()
+        self.config = config or load_config()
+        db_config = self.config["database"]
+        diagnostics = self.config["diagnostics"]
+        profiler = None
+        if diagnostics["enabled"]:
+            profiler = QueryProfiler(diagnostics["slow_query_ms"], diagnostics["slow_query_log"])
+        self.db = Database(db_config["path"], db_config["pragmas"],
+                           db_config["query_cache_size"], db_config["read_connections"],
+                           profiler)
+        self.writer = DatabaseWriter(self.db, self)
+        self.writer.failed.connect(self.on_write_failed)
+        self.writer.start()
+        self.receipts = store_from_config(self.config)
+        QThreadPool.globalInstance().start(ReceiptMaintenanceTask(self.receipts, self.db))
+        self.ingest = ReceiptIngestWorker(self.receipts, self.db, self)
+        self.ingest.start()
+        self.thumbnails = ThumbnailCache(self.receipts, parent=self)
+        self.backup_worker = None
+        self.backup_timer = QTimer(self)
+        self.backup_timer.timeout.connect(self.backup_if_due)
+        if self.config["backup"]["enabled"]:
+            # Not right away, so a backup never competes with startup
+            self.backup_timer.start(BACKUP_STARTUP_DELAY_MS)
         self.setup_ui()
 
     def setup_ui(self):
@@ -1529,12 +2611,13 @@ class MainWindow(QMainWindow):
         self.tabs = QTabWidget()
 
         # Create tabs
-        self.dashboard_tab = DashboardTab(self.db)
-        self.bills_tab = MonthlyBillsTab(self.db)
-        self.bill_account_tab = BillAccountTab(self.db)
-        self.paycheck_tab = PaycheckTab(self.db)
-        self.purchases_tab = PurchasesTab(self.db)
-        self.savings_tab = SavingsTab(self.db)
+        self.dashboard_tab = DashboardTab(self.db, self.writer)
+        self.bills_tab = MonthlyBillsTab(self.db, self.writer)
+        self.bill_account_tab = BillAccountTab(self.db, self.writer)
+        self.paycheck_tab = PaycheckTab(self.db, self.writer)
+        self.purchases_tab = PurchasesTab(self.db, self.writer, self.receipts, self.ingest,
+                                          self.thumbnails)
+        self.savings_tab = SavingsTab(self.db, self.writer)
 
         self.tabs.addTab(self.dashboard_tab, f"🏠 Dashboard")
         self.tabs.addTab(self.bills_tab, f"📄 Monthly Bills")
@@ -1548,20 +2631,82 @@ class MainWindow(QMainWindow):
 
         layout.addWidget(self.tabs)
 
+        # Hidden diagnostics for when the app feels slow
+        diagnostics_shortcut = QShortcut(QKeySequence("Ctrl+Shift+D"), self)
+        diagnostics_shortcut.activated.connect(self.show_diagnostics)
+
+        export_shortcut = QShortcut(QKeySequence("Ctrl+E"), self)
+        export_shortcut.activated.connect(self.show_export)
+
     def on_tab_changed(self, index):
         if index == 0:  # Dashboard tab
             self.dashboard_tab.refresh()
         elif index == 2:  # Bill Account tab
             self.bill_account_tab.refresh()
 
+    def show_export(self):
+        # Start from whatever the current tab shows
+        tab_kinds = {
+            self.bills_tab: "bills",
+            self.bill_account_tab: "bill_account",
+            self.paycheck_tab: "paychecks",
+            self.savings_tab: "savings",
+        }
+        ExportDialog(self.db, tab_kinds.get(self.tabs.currentWidget(), "purchases"), self).exec()
+
+    def show_diagnostics(self):
+        dialog = DiagnosticsDialog(self.db, self.config["backup"], self)
+        dialog.backup_requested.connect(lambda: self.back_up_now(dialog))
+        dialog.exec()
+
+    def backup_if_due(self):
+        self.backup_timer.setInterval(BACKUP_CHECK_MS)
+        settings = self.config["backup"]
+        if is_due(self.db.db_path, settings["directory"], settings["interval_hours"]):
+            self.start_backup()
+
+    def start_backup(self) -> bool:
+        """Start a background backup unless one is already running."""
+        if self.backup_worker and self.backup_worker.isRunning():
+            return False
+        self.backup_worker = BackupWorker(self.config, self)
+        self.backup_worker.failed.connect(self.on_backup_failed)
+        self.backup_worker.start()
+        return True
+
+    def back_up_now(self, parent: QWidget):
+        if self.start_backup():
+            QMessageBox.information(parent, f"On it! {CAT_HAPPY}",
+                                    "Backing up in the background, nya~")
+        else:
+            QMessageBox.information(parent, f"Already on it! {CAT_HAPPY}",
+                                    "A backup is already running, nya~")
+
+    def on_backup_failed(self, error: str):
+        # Don't nag every few minutes; the next start tries again
+        self.backup_timer.stop()
+        QMessageBox.warning(self, f"Oopsie! {CAT_SAD}", f"Couldn't back up your budget, nya~\n\n{error}")
+
+    def on_write_failed(self, ticket: int, error: str):
+        QMessageBox.warning(self, f"Oopsie! {CAT_SAD}", f"Couldn't save that change, nya~\n\n{error}")
+
     def closeEvent(self, event):
+        # Let queued writes and pool reads finish before the connections go away.
+        # Receipts still copying are finished next time the app starts.
+        self.ingest.stop()
+        self.thumbnails.stop()
+        self.writer.stop()
+        if self.backup_worker:
+            # A half-done backup is thrown away; the next start makes a new one
+            self.backup_worker.requestInterruption()
+            self.backup_worker.wait()
+        QThreadPool.globalInstance().waitForDone()
         self.db.close()
         event.accept()
 
 
-def main():
-    app = QApplication(sys.argv)
-
+def apply_theme(app: QApplication):
+    """Give ``app`` NekoBudget's style, stylesheet and palette."""
     # Set application style
     app.setStyle("Fusion")
 
@@ -1583,6 +2728,11 @@ def main():
     palette.setColor(QPalette.ColorRole.HighlightedText, QColor("#FFFFFF"))
     app.setPalette(palette)
 
+
+def main():
+    app = QApplication(sys.argv)
+    apply_theme(app)
+
     window = MainWindow()
     window.show()
 
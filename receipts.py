@@ -0,0 +1,419 @@
+"""Content-addressed storage for receipt files.
+
+Each receipt is stored once, named after the sha256 of its contents, in
+two levels of sharded folders (``receipts/9f/86/9f86d0...08.jpg``), so
+attaching the same scan twice costs nothing and no folder grows past a
+few hundred entries however many receipts pile up. Purchases keep the
+file's key (its name) in ``receipt_path``; the receipts table counts the
+purchases using each key, and collect_garbage deletes receipts nothing
+uses any more::
+
+    python receipts.py                 # move old-style receipts into the store and collect garbage
+    python receipts.py --recompress    # also compress photos stored before compression was on
+
+With ``compress`` on in the receipts settings (and Pillow installed),
+photos are scaled down and re-encoded as they're attached. A receipt's
+key is still the hash of the file as attached, so attaching the same
+photo again finds the stored copy without compressing it a second time.
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Optional
+
+try:
+    from PIL import Image, ImageOps
+    HAS_PILLOW = True
+except ImportError:
+    HAS_PILLOW = False  # Receipts are stored as attached
+
+from config import CONFIG_PATH, load_config
+from database import Database
+
+# A key is a sha256 hex digest plus the original file's extension
+KEY_PATTERN = re.compile(r"[0-9a-f]{64}(\.[a-z0-9]{1,10})?")
+
+# Files are hashed and copied in chunks of this many bytes
+CHUNK_SIZE = 1024 * 1024
+
+# Unused receipts younger than this are kept, since the purchase they
+# were added for may still be on its way to the database
+GC_GRACE_SECONDS = 3600
+
+# Where files being added are written until their hash is known
+INCOMING = ".incoming"
+
+# Receipt thumbnails (see thumbnails.py), sharded like the receipts
+THUMBNAILS = ".thumbnails"
+
+# Extensions of images that can be compressed, with the format they're saved in
+COMPRESSIBLE = {".jpg": "JPEG", ".jpeg": "JPEG", ".png": "PNG", ".webp": "WEBP"}
+
+
+def is_key(receipt_path: Optional[str]) -> bool:
+    """Whether a purchase's ``receipt_path`` is a receipt store key."""
+    return bool(receipt_path) and KEY_PATTERN.fullmatch(receipt_path) is not None
+
+
+def can_compress(key: str) -> bool:
+    """Whether the receipt ``key`` is an image compress_image handles."""
+    return HAS_PILLOW and os.path.splitext(key)[1] in COMPRESSIBLE
+
+
+def compress_image(source: str, target: str, extension: str, max_dimension: int,
+                   quality: int) -> bool:
+    """Write a smaller copy of the image at ``source`` to ``target``.
+
+    The picture is turned upright by its EXIF orientation, scaled down to
+    fit ``max_dimension`` pixels on its longer side, and saved in the
+    format ``extension`` names (JPEG and WebP at ``quality``), with the
+    metadata dropped. Returns False, leaving no ``target``, if the file
+    can't be read as that kind of image or the copy wouldn't be smaller.
+    """
+    image_format = COMPRESSIBLE.get(extension)
+    if not HAS_PILLOW or image_format is None:
+        return False
+    try:
+        with Image.open(source) as original:
+            if original.format != image_format:
+                return False  # Misnamed; saving it in another format would be confusing
+            image = ImageOps.exif_transpose(original)
+            image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+            options = {"optimize": True}
+            if image_format != "PNG":
+                options["quality"] = quality
+            if image_format == "JPEG" and image.mode not in ("L", "RGB", "CMYK"):
+                image = image.convert("RGB")
+            image.save(target, image_format, **options)
+        if os.path.getsize(target) < os.path.getsize(source):
+            return True
+    except (OSError, ValueError, Image.DecompressionBombError):
+        pass
+    if os.path.exists(target):
+        os.remove(target)
+    return False
+
+
+def _fsync(path: str):
+    with open(path, "rb+") as f:
+        os.fsync(f.fileno())
+
+
+def _compress_stored(path: str, target: str, extension: str, max_dimension: int,
+                     quality: int) -> Optional[int]:
+    """Process pool job for recompress: the compressed size, or None if it didn't shrink."""
+    if not compress_image(path, target, extension, max_dimension, quality):
+        return None
+    _fsync(target)
+    return os.path.getsize(target)
+
+
+class ReceiptStore:
+    """Receipt files under ``root``, stored once each by content hash.
+
+    With ``compress`` on, images added are compressed (see compress_image)
+    with ``max_dimension`` and ``quality``.
+    """
+
+    def __init__(self, root: str = "receipts", compress: bool = False,
+                 max_dimension: int = 2400, quality: int = 82):
+        self.root = root
+        self.compress = compress
+        self.max_dimension = max_dimension
+        self.quality = quality
+        # Keeps collect_garbage from deleting a file add() is reusing
+        self._lock = threading.Lock()
+
+    def path(self, key: str) -> str:
+        """Where the receipt ``key`` is stored."""
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def thumbnail_path(self, key: str, size: int) -> str:
+        """Where the ``size`` pixel thumbnail of receipt ``key`` is cached."""
+        name = f"{key.split('.')[0]}-{size}.png"
+        return os.path.join(self.root, THUMBNAILS, key[:2], key[2:4], name)
+
+    def resolve(self, receipt_path: Optional[str]) -> Optional[str]:
+        """File path of a purchase's receipt, whether a store key or an old-style path."""
+        if not receipt_path:
+            return None
+        return self.path(receipt_path) if is_key(receipt_path) else receipt_path
+
+    def add(self, db: Database, source: str,
+            progress: Optional[Callable[[int, int], None]] = None,
+            cancelled: Optional[Callable[[], bool]] = None) -> Optional[str]:
+        """Store a copy of the file at ``source`` and return its key.
+
+        The file is read once, hashed while it's copied. If the store
+        already has the same contents, the copy is dropped and the existing
+        file is used, without compressing anything. The key is recorded in ``db`` before it's returned,
+        ready to be saved as a purchase's receipt_path. ``progress(done,
+        total)`` is called with byte counts after each chunk; if
+        ``cancelled()`` becomes true, the partial copy is deleted and None
+        is returned. The key is the hash of the file as given, even when
+        the stored copy is compressed.
+        """
+        extension = os.path.splitext(source)[1].lower()
+        if not KEY_PATTERN.fullmatch("0" * 64 + extension):
+            extension = ""
+        incoming = os.path.join(self.root, INCOMING)
+        os.makedirs(incoming, exist_ok=True)
+
+        digest = hashlib.sha256()
+        total = os.path.getsize(source)
+        done = 0
+        stopped = False
+        with open(source, "rb") as src, \
+                tempfile.NamedTemporaryFile(dir=incoming, delete=False) as temp:
+            try:
+                while chunk := src.read(CHUNK_SIZE):
+                    if cancelled and cancelled():
+                        stopped = True
+                        break
+                    digest.update(chunk)
+                    temp.write(chunk)
+                    done += len(chunk)
+                    if progress:
+                        progress(done, total)
+                if not stopped:
+                    # On disk before it's renamed into place, so a crash
+                    # can't leave a stored receipt with missing contents
+                    temp.flush()
+                    os.fsync(temp.fileno())
+            except BaseException:
+                temp.close()
+                os.remove(temp.name)
+                raise
+        if stopped:
+            os.remove(temp.name)
+            return None
+        key = digest.hexdigest() + extension
+        target = self.path(key)
+
+        with self._lock:
+            try:
+                if os.path.exists(target):
+                    # Already stored (and compressed, if it was going to be)
+                    os.remove(temp.name)
+                    db.add_receipt(key, os.path.getsize(target))
+                    return key
+            except BaseException:
+                if os.path.exists(temp.name):
+                    os.remove(temp.name)
+                raise
+
+        original_size = None
+        if self.compress and can_compress(key):
+            try:
+                smaller = temp.name + ".small"
+                if compress_image(temp.name, smaller, extension, self.max_dimension, self.quality):
+                    _fsync(smaller)
+                    os.replace(smaller, temp.name)
+                original_size = done  # Even if it didn't shrink, so recompress skips it
+            except BaseException:
+                os.remove(temp.name)
+                raise
+
+        with self._lock:
+            try:
+                if os.path.exists(target) and os.path.getsize(target) == os.path.getsize(temp.name):
+                    os.remove(temp.name)
+                else:
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    os.replace(temp.name, target)
+                db.add_receipt(key, os.path.getsize(target), original_size)
+            except BaseException:
+                if os.path.exists(temp.name):
+                    os.remove(temp.name)
+                raise
+        return key
+
+    def migrate_legacy(self, db: Database) -> dict:
+        """Move receipts saved before the store existed into it.
+
+        Purchases are pointed at the stored copy and the old file is
+        deleted, unless an archived year still uses it. Receipts whose
+        file is gone are left as they are. Returns counts of what happened.
+        """
+        counts = {"migrated": 0, "missing": 0, "purchases": 0}
+        for old_path, archived in db.get_legacy_receipt_paths().items():
+            if not os.path.isfile(old_path):
+                counts["missing"] += 1
+                continue
+            key = self.add(db, old_path)
+            counts["purchases"] += db.replace_receipt_path(old_path, key)
+            counts["migrated"] += 1
+            if not archived:
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass  # Open in a viewer; the copy in the store is what counts now
+        return counts
+
+    def recompress(self, db: Database, workers: Optional[int] = None,
+                   progress: Optional[Callable[[int, int], None]] = None) -> dict:
+        """Compress the images stored as attached, in parallel.
+
+        Images are compressed in ``workers`` processes (one per CPU by
+        default) and each smaller copy replaces the stored one. Images that
+        don't shrink are marked so they aren't tried again. Does nothing
+        without Pillow. ``progress(done, total)`` is called with receipt
+        counts. Returns the number compressed and unchanged and the bytes
+        saved.
+        """
+        sizes = {key: size for key, size in db.get_uncompressed_receipts().items()
+                 if can_compress(key)}
+        counts = {"compressed": 0, "unchanged": 0, "bytes": 0}
+        if not sizes:
+            return counts
+        incoming = os.path.join(self.root, INCOMING)
+        os.makedirs(incoming, exist_ok=True)
+
+        with ProcessPoolExecutor(workers) as pool:
+            jobs = {
+                pool.submit(_compress_stored, self.path(key), os.path.join(incoming, key),
+                            os.path.splitext(key)[1], self.max_dimension, self.quality): key
+                for key in sizes
+            }
+            for done, job in enumerate(as_completed(jobs), start=1):
+                key = jobs[job]
+                compressed = os.path.join(incoming, key)
+                size = job.result()
+                with self._lock:
+                    # collect_garbage may have deleted it in the meantime
+                    if not os.path.exists(self.path(key)):
+                        size = None
+                    elif size is None:
+                        db.set_receipt_compressed(key, sizes[key], sizes[key])
+                    else:
+                        os.replace(compressed, self.path(key))
+                        db.set_receipt_compressed(key, size, sizes[key])
+                if size is None:
+                    self._remove(compressed)
+                    counts["unchanged"] += 1
+                else:
+                    counts["compressed"] += 1
+                    counts["bytes"] += sizes[key] - size
+                if progress:
+                    progress(done, len(jobs))
+        return counts
+
+    def collect_garbage(self, db: Database, grace_seconds: float = GC_GRACE_SECONDS) -> dict:
+        """Delete receipts no purchase uses, and stray files the database doesn't know.
+
+        Stray files are left behind by adds that crashed part way, and
+        thumbnails by receipts deleted since. Returns the number of
+        receipts and stray files deleted and the bytes freed.
+        """
+        counts = {"receipts": 0, "stray_files": 0, "bytes": 0}
+        cutoff = time.time() - grace_seconds
+        with self._lock:
+            for key in db.collect_orphan_receipts(grace_seconds):
+                counts["bytes"] += self._remove(self.path(key))
+                counts["receipts"] += 1
+
+            known = db.get_receipt_keys()
+            hashes = {key.split(".")[0] for key in known}
+            for folder, names in self._walk():
+                for name in names:
+                    path = os.path.join(folder, name)
+                    if folder.startswith(self._thumbnails):
+                        kept = name.endswith(".png") and name.split("-")[0] in hashes
+                    else:
+                        kept = name in known
+                    if kept or self._mtime(path) > cutoff:
+                        continue
+                    counts["bytes"] += self._remove(path)
+                    counts["stray_files"] += 1
+        return counts
+
+    @property
+    def _thumbnails(self) -> str:
+        return os.path.join(self.root, THUMBNAILS)
+
+    def _walk(self):
+        """(folder, file names) for the incoming folder and the receipt and thumbnail shards."""
+        incoming = os.path.join(self.root, INCOMING)
+        if os.path.isdir(incoming):
+            yield incoming, os.listdir(incoming)
+        for base in (self.root, self._thumbnails):
+            for first in self._shards(base):
+                for second in self._shards(first):
+                    yield second, os.listdir(second)
+
+    @staticmethod
+    def _shards(folder: str) -> list:
+        if not os.path.isdir(folder):
+            return []
+        return [entry.path for entry in os.scandir(folder)
+                if entry.is_dir() and re.fullmatch(r"[0-9a-f]{2}", entry.name)]
+
+    @staticmethod
+    def _mtime(path: str) -> float:
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return time.time()
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        """Delete ``path`` and return its size, or 0 if it couldn't be deleted."""
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return 0
+        return size
+
+
+def store_from_config(config: dict) -> ReceiptStore:
+    """A ReceiptStore with the directory and compression settings in ``config``."""
+    settings = config["receipts"]
+    return ReceiptStore(settings["directory"], settings["compress"],
+                        settings["max_dimension"], settings["quality"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tidy up the NekoBudget receipt store")
+    parser.add_argument("--config", default=CONFIG_PATH,
+                        help=f"settings file (default: {CONFIG_PATH})")
+    parser.add_argument("--recompress", action="store_true",
+                        help="compress images stored before compression was turned on")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes compressing at once (default: one per CPU)")
+    args = parser.parse_args()
+    if args.recompress and not HAS_PILLOW:
+        parser.error("--recompress needs Pillow (pip install Pillow)")
+
+    config = load_config(args.config)
+    db_config = config["database"]
+    db = Database(db_config["path"], db_config["pragmas"], cache_size=0)
+    store = store_from_config(config)
+    try:
+        migrated = store.migrate_legacy(db)
+        if args.recompress:
+            recompressed = store.recompress(db, args.workers)
+        collected = store.collect_garbage(db)
+        stats = db.get_receipt_stats()
+    finally:
+        db.close()
+    print(f"Moved {migrated['migrated']} old receipts into the store "
+          f"({migrated['missing']} missing files left as they were)")
+    if args.recompress:
+        print(f"Compressed {recompressed['compressed']} receipts, saving "
+              f"{recompressed['bytes']:,} bytes ({recompressed['unchanged']} couldn't be shrunk)")
+    print(f"Deleted {collected['receipts']} unused receipts and "
+          f"{collected['stray_files']} stray files, freeing {collected['bytes']:,} bytes")
+    print(f"{stats['receipts']} receipts stored in {stats['stored_bytes']:,} bytes "
+          f"({stats['original_bytes']:,} bytes as attached, "
+          f"{stats['referenced_bytes']:,} bytes without deduplication)")
+
+
+if __name__ == "__main__":
+    main()
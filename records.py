@@ -0,0 +1,91 @@
+"""Compact record types for rows returned by the NekoBudget database.
+
+Records are slotted dataclasses, so a row costs a fraction of the memory of
+a dict and builds faster. They also support ``record["field"]``,
+``record.get()`` and ``dict(record)`` so code written against the old
+dict rows keeps working. They are frozen, so the query cache can hand the
+same records to every caller.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+
+class RecordMixin:
+    """Dict-style access for slotted dataclass records."""
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def keys(self) -> tuple:
+        return self.__slots__
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+@dataclass(slots=True, frozen=True)
+class Purchase(RecordMixin):
+    id: int
+    name: str
+    amount: float
+    date: str
+    category: Optional[str] = None
+    receipt_path: Optional[str] = None
+    notes: Optional[str] = None
+    created_at: Optional[str] = None
+
+
+@dataclass(slots=True, frozen=True)
+class Paycheck(RecordMixin):
+    id: int
+    amount: float
+    date: str
+    source: Optional[str] = None
+    notes: Optional[str] = None
+    created_at: Optional[str] = None
+
+
+@dataclass(slots=True, frozen=True)
+class Bill(RecordMixin):
+    id: int
+    name: str
+    amount: float
+    due_day: Optional[int] = None
+    category: Optional[str] = None
+    is_active: int = 1
+    created_at: Optional[str] = None
+    # Only filled in by queries that join paid_bills for a month
+    paid: Optional[int] = None
+
+
+@dataclass(slots=True, frozen=True)
+class SavingsAccount(RecordMixin):
+    id: int
+    name: str
+    current_amount: float = 0.0
+    goal_amount: Optional[float] = None
+    created_at: Optional[str] = None
+
+
+@dataclass(slots=True, frozen=True)
+class Transaction(RecordMixin):
+    """A savings account or bill account transaction."""
+
+    id: int
+    amount: float
+    transaction_type: str
+    date: str
+    notes: Optional[str] = None
+    savings_id: Optional[int] = None
+    created_at: Optional[str] = None
@@ -0,0 +1,225 @@
+"""Upgrading a database made by the first NekoBudget release.
+
+The money columns of those databases are REAL dollars; migration 1
+rewrites them as INTEGER cents a batch at a time, and must pick up where
+it left off if the app stops partway through.
+"""
+
+import os
+import sqlite3
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+from database import MIGRATIONS, MONEY_COLUMNS, Database  # noqa: E402
+
+# The tables as the first release created them
+BASELINE_SCHEMA = """
+    CREATE TABLE monthly_bills (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        amount REAL NOT NULL,
+        due_day INTEGER,
+        category TEXT,
+        is_active INTEGER DEFAULT 1,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE paychecks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        amount REAL NOT NULL,
+        date TEXT NOT NULL,
+        source TEXT,
+        notes TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE purchases (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        amount REAL NOT NULL,
+        date TEXT NOT NULL,
+        category TEXT,
+        receipt_path TEXT,
+        notes TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE savings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        current_amount REAL DEFAULT 0,
+        goal_amount REAL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE savings_transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        savings_id INTEGER NOT NULL,
+        amount REAL NOT NULL,
+        transaction_type TEXT NOT NULL,
+        date TEXT NOT NULL,
+        notes TEXT,
+        FOREIGN KEY (savings_id) REFERENCES savings(id)
+    );
+    CREATE TABLE monthly_pages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        year INTEGER NOT NULL,
+        month INTEGER NOT NULL,
+        notes TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(year, month)
+    );
+    CREATE TABLE paid_bills (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        bill_id INTEGER NOT NULL,
+        year INTEGER NOT NULL,
+        month INTEGER NOT NULL,
+        paid_date TEXT NOT NULL,
+        FOREIGN KEY (bill_id) REFERENCES monthly_bills(id),
+        UNIQUE(bill_id, year, month)
+    );
+    CREATE TABLE bill_account (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        balance REAL DEFAULT 0,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE bill_account_transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        amount REAL NOT NULL,
+        transaction_type TEXT NOT NULL,
+        date TEXT NOT NULL,
+        notes TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+# Dollar amounts that aren't exact in binary floating point
+AMOUNTS = [19.99, 0.1 + 0.2, 1234.56, 0.07, 100.0, 2.675, 59.95]
+
+ROWS = 25
+BATCH_SIZE = 10
+
+
+class PowerCut(Exception):
+    pass
+
+
+class CutAfterFirstBatch:
+    """A connection that dies right after the first batch copied into ``table``__new commits."""
+
+    def __init__(self, conn: sqlite3.Connection, table: str):
+        self.conn = conn
+        self.new_table = f"{table}__new"
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+    def commit(self):
+        self.conn.commit()
+        exists = self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?",
+                                   (self.new_table,)).fetchone()
+        if exists and self.conn.execute(f"SELECT COUNT(*) FROM {self.new_table}").fetchone()[0]:
+            raise PowerCut
+
+
+def amount(i: int) -> float:
+    return AMOUNTS[i % len(AMOUNTS)] + i
+
+
+@pytest.fixture
+def baseline(tmp_path):
+    """Path of a first-release database with REAL dollar amounts in every table."""
+    path = str(tmp_path / "nekobudget.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    for i in range(ROWS):
+        day = f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}"
+        conn.execute("INSERT INTO monthly_bills (name, amount, due_day, category) "
+                     "VALUES (?, ?, ?, ?)", (f"Bill {i}", amount(i), i % 28 + 1, "🏠 Housing"))
+        conn.execute("INSERT INTO paychecks (amount, date, source) VALUES (?, ?, ?)",
+                     (amount(i), day, "Work"))
+        conn.execute("INSERT INTO purchases (name, amount, date, category) VALUES (?, ?, ?, ?)",
+                     (f"Purchase {i}", amount(i), day, "🐱 Pet Care"))
+        conn.execute("INSERT INTO bill_account_transactions (amount, transaction_type, date) "
+                     "VALUES (?, 'deposit', ?)", (amount(i), day))
+        conn.execute("INSERT INTO paid_bills (bill_id, year, month, paid_date) "
+                     "VALUES (?, 2024, ?, ?)", (i + 1, i % 12 + 1, day))
+    conn.execute("INSERT INTO savings (name, current_amount, goal_amount) "
+                 "VALUES ('Trip', 0.1 + 0.2, NULL), ('Laptop', 1234.56, 1999.99)")
+    conn.execute("INSERT INTO savings_transactions (savings_id, amount, transaction_type, date) "
+                 "VALUES (2, 19.99, 'deposit', '2024-03-01')")
+    conn.execute("INSERT INTO bill_account (balance) VALUES (59.95)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def dollars(path: str) -> dict:
+    """Every money value by table, column and id, read straight from SQLite."""
+    conn = sqlite3.connect(path)
+    values = {}
+    for table, columns in MONEY_COLUMNS.items():
+        for column in columns:
+            values[table, column] = dict(conn.execute(f"SELECT id, {column} FROM {table}"))
+    conn.close()
+    return values
+
+
+def assert_migrated(path: str, before: dict):
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS)
+    assert conn.execute("PRAGMA integrity_check").fetchall() == [("ok",)]
+    assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name LIKE '%__new'").fetchall() == []
+    for table, columns in MONEY_COLUMNS.items():
+        types = {row[1]: row[2] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for column in columns:
+            assert types[column] == "INTEGER"
+            assert conn.execute(f"SELECT COUNT(*) FROM {table} WHERE typeof({column}) = 'real'"
+                                ).fetchone()[0] == 0
+    conn.close()
+
+    after = dollars(path)
+    assert after.keys() == before.keys()
+    for key, values in before.items():
+        expected = {row_id: None if value is None else round(value * 100)
+                    for row_id, value in values.items()}
+        assert after[key] == expected, key
+
+
+def test_money_migrates_to_cents(baseline):
+    before = dollars(baseline)
+    db = Database(baseline)
+    try:
+        assert db.get_bill_account_balance() == 59.95
+        totals = {account.name: (account.current_amount, account.goal_amount)
+                  for account in db.get_savings_accounts()}
+        assert totals == {"Trip": (0.3, None), "Laptop": (1234.56, 1999.99)}
+    finally:
+        db.close()
+    assert_migrated(baseline, before)
+
+
+def test_interrupted_migration_resumes(baseline, monkeypatch):
+    monkeypatch.setattr(database, "MIGRATION_BATCH_SIZE", BATCH_SIZE)
+    before = dollars(baseline)
+
+    conn = sqlite3.connect(baseline)
+    conn.row_factory = sqlite3.Row
+    with pytest.raises(PowerCut):
+        database._migrate_money_to_cents(SimpleNamespace(conn=CutAfterFirstBatch(conn,
+                                                                                "purchases")))
+    conn.close()
+
+    conn = sqlite3.connect(baseline)
+    assert conn.execute("SELECT COUNT(*) FROM purchases__new").fetchone()[0] == BATCH_SIZE
+    conn.close()
+
+    Database(baseline).close()
+    assert_migrated(baseline, before)
+
+    conn = sqlite3.connect(baseline)
+    ids = [row[0] for row in conn.execute("SELECT id FROM purchases ORDER BY id")]
+    conn.close()
+    assert ids == list(range(1, ROWS + 1))
@@ -0,0 +1,59 @@
+"""The query cache must never hand back rows a committed write has changed."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / "nekobudget.db"))
+    db.add_purchase("Cat food", 12.5, "2025-03-04")
+    yield db
+    db.close()
+
+
+def read_before_commit(db, monkeypatch, read):
+    """Make the next write method run ``read`` after its _touch, before it commits."""
+    commit = db._commit
+
+    def late_commit():
+        read()
+        monkeypatch.setattr(db, "_commit", commit)
+        commit()
+
+    monkeypatch.setattr(db, "_commit", late_commit)
+
+
+def test_read_between_touch_and_commit_isnt_cached_as_current(db, monkeypatch):
+    seen = []
+    read_before_commit(db, monkeypatch, lambda: seen.append(db.page_purchases()[0]))
+    db.add_purchase("Yarn", 3.0, "2025-03-05")
+
+    # The read ran on a pool connection, which can't see the write yet
+    assert [purchase.name for purchase in seen[0]] == ["Cat food"]
+    purchases, _ = db.page_purchases()
+    assert [purchase.name for purchase in purchases] == ["Yarn", "Cat food"]
+
+
+def test_read_between_touch_and_commit_of_a_batch(db, monkeypatch):
+    read_before_commit(db, monkeypatch, db.page_purchases)
+    db.add_purchases_many([{"name": "Yarn", "amount": 3.0, "date": "2025-03-05"},
+                           {"name": "Bell", "amount": 1.0, "date": "2025-03-06"}])
+    purchases, _ = db.page_purchases()
+    assert len(purchases) == 3
+
+
+def test_rolled_back_write_leaves_cache_current(db):
+    assert len(db.page_purchases()[0]) == 1
+    with pytest.raises(ValueError):
+        with db.transaction():
+            db.add_purchase("Yarn", 3.0, "2025-03-05")
+            assert len(db.page_purchases()[0]) == 2
+            raise ValueError("changed my mind")
+    assert len(db.page_purchases()[0]) == 1
@@ -0,0 +1,94 @@
+"""The hot list and history queries must be answered from their indexes.
+
+Each test runs the real Database method, records the SELECTs it sends to
+SQLite, and checks their EXPLAIN QUERY PLAN: the table has to be read
+through the expected index, and the index order has to satisfy the
+ORDER BY so no temporary sort is needed.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    # No query cache, so every call reaches SQLite
+    db = Database(str(tmp_path / "nekobudget.db"), cache_size=0)
+    savings_id = db.add_savings_account("Rainy day", 10.0)
+    db.add_purchase("Cat food", 12.5, "2025-03-04", "🐱 Pet Care")
+    db.add_paycheck(1000.0, "2025-03-07", "Work")
+    db.add_savings_transaction(savings_id, 25.0, "deposit", "2025-03-08")
+    db.add_bill_account_transaction(50.0, "deposit", "2025-03-09")
+    bill_id = db.add_monthly_bill("Rent", 800.0, 1, "🏠 Housing")
+    db.mark_bill_paid(bill_id, 2025, 3, "2025-03-01")
+    yield db
+    db.close()
+
+
+def query_plans(db, call):
+    """Run ``call`` and return the query plan of every table SELECT it made."""
+    conn = db.read_conn
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        call()
+    finally:
+        conn.set_trace_callback(None)
+
+    plans = []
+    for sql in statements:
+        if sql.lstrip().upper().startswith("SELECT") and "archived_years" not in sql:
+            steps = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+            plans.append((sql, steps))
+    assert plans, "no SELECT was run"
+    return plans
+
+
+def assert_uses_index(plans, index):
+    for sql, steps in plans:
+        plan = "\n".join(steps)
+        assert (f"USING INDEX {index}" in plan
+                or f"USING COVERING INDEX {index}" in plan), f"{sql}\n{plan}"
+        assert "TEMP B-TREE" not in plan, f"{sql}\n{plan}"
+
+
+def test_purchases_month_filter_uses_date_index(db):
+    plans = query_plans(db, lambda: db.get_purchases(2025, 3))
+    assert_uses_index(plans, "idx_purchases_date")
+
+
+def test_paychecks_month_filter_uses_date_index(db):
+    plans = query_plans(db, lambda: db.get_paychecks(2025, 3))
+    assert_uses_index(plans, "idx_paychecks_date")
+
+
+def savings_id(db):
+    return db.get_savings_accounts()[0]["id"]
+
+
+def test_savings_history_uses_account_date_index(db):
+    account = savings_id(db)
+    plans = query_plans(db, lambda: db.page_savings_transactions(account, limit=50))
+    assert_uses_index(plans, "idx_savings_transactions_savings_date")
+
+
+def test_savings_history_next_page_uses_account_date_index(db):
+    account, token = savings_id(db), ("2025-03-08", 1)
+    plans = query_plans(db, lambda: db.page_savings_transactions(account, token, 50))
+    assert_uses_index(plans, "idx_savings_transactions_savings_date")
+
+
+def test_bill_account_history_uses_date_id_index(db):
+    plans = query_plans(db, db.get_bill_account_transactions)
+    assert_uses_index(plans, "idx_bill_account_transactions_date_id")
+
+
+def test_paid_bills_month_lookup_uses_year_month_index(db):
+    plans = query_plans(db, lambda: db.get_paid_bill_ids(2025, 3))
+    assert_uses_index(plans, "idx_paid_bills_year_month")
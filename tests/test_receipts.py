@@ -0,0 +1,149 @@
+"""Receipt store reference counting and garbage collection."""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import receipts  # noqa: E402
+from database import Database  # noqa: E402
+from receipts import INCOMING, ReceiptStore  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / "nekobudget.db"))
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ReceiptStore(str(tmp_path / "receipts"))
+
+
+def scan(tmp_path, name: str, contents: bytes) -> str:
+    path = tmp_path / name
+    path.write_bytes(contents)
+    return str(path)
+
+
+def refs(db, key: str) -> int:
+    row = db.conn.execute("SELECT refs FROM receipts WHERE key = ?", (key,)).fetchone()
+    return None if row is None else row[0]
+
+
+def age_receipts(db):
+    """Make every receipt older than the GC grace period."""
+    db.conn.execute("UPDATE receipts SET added_at = datetime('now', '-2 hours')")
+    db.conn.commit()
+
+
+def test_same_contents_are_stored_once(tmp_path, db, store):
+    first = store.add(db, scan(tmp_path, "a.pdf", b"receipt"))
+    second = store.add(db, scan(tmp_path, "b.pdf", b"receipt"))
+
+    assert first == second
+    assert os.path.isfile(store.path(first))
+    assert db.get_receipt_stats()["receipts"] == 1
+
+
+def test_stored_photo_isnt_compressed_again(tmp_path, db, monkeypatch):
+    image = pytest.importorskip("PIL.Image")
+    photo = str(tmp_path / "photo.jpg")
+    image.new("RGB", (1200, 800), "orange").save(photo, quality=100)
+    store = ReceiptStore(str(tmp_path / "receipts"), compress=True, max_dimension=600)
+
+    compressed = []
+    compress_image = receipts.compress_image
+
+    def counted(*args):
+        compressed.append(args)
+        return compress_image(*args)
+
+    monkeypatch.setattr(receipts, "compress_image", counted)
+    first = store.add(db, photo)
+    second = store.add(db, photo)
+
+    assert first == second
+    assert len(compressed) == 1
+    stats = db.get_receipt_stats()
+    assert stats["original_bytes"] == os.path.getsize(photo)
+    assert stats["stored_bytes"] == os.path.getsize(store.path(first))
+    assert db.get_uncompressed_receipts() == {}
+
+
+def test_refs_follow_purchases(tmp_path, db, store):
+    key = store.add(db, scan(tmp_path, "scan.pdf", b"receipt"))
+    other = store.add(db, scan(tmp_path, "other.pdf", b"another receipt"))
+    assert refs(db, key) == 0
+
+    first = db.add_purchase("Cat food", 12.5, "2025-03-04", receipt_path=key)
+    second = db.add_purchase("Yarn", 3.0, "2025-03-05", receipt_path=key)
+    assert refs(db, key) == 2
+
+    db.delete_purchase(first)
+    assert refs(db, key) == 1
+
+    db.add_purchase("Bell", 1.0, "2025-03-06", receipt_pending="bell.pdf")
+    db.finish_pending_receipt("bell.pdf", other)
+    assert refs(db, other) == 1
+
+    db.delete_purchase(second)
+    assert refs(db, key) == 0
+    assert refs(db, other) == 1
+
+
+def test_archived_purchases_keep_their_receipts(tmp_path, db, store):
+    key = store.add(db, scan(tmp_path, "scan.pdf", b"receipt"))
+    db.add_purchase("Cat food", 12.5, "2023-03-04", receipt_path=key)
+
+    db.archive_year(2023, vacuum=False)
+    assert refs(db, key) == 1
+    age_receipts(db)
+    assert store.collect_garbage(db)["receipts"] == 0
+
+    db.restore_year(2023)
+    assert refs(db, key) == 1
+
+
+def test_garbage_collection_deletes_only_unused_receipts(tmp_path, db, store):
+    used = store.add(db, scan(tmp_path, "used.pdf", b"used"))
+    unused = store.add(db, scan(tmp_path, "unused.pdf", b"unused"))
+    db.add_purchase("Cat food", 12.5, "2025-03-04", receipt_path=used)
+
+    # Too new: its purchase may still be on the way
+    assert store.collect_garbage(db)["receipts"] == 0
+    assert os.path.isfile(store.path(unused))
+
+    age_receipts(db)
+    counts = store.collect_garbage(db)
+    assert counts["receipts"] == 1
+    assert counts["bytes"] == len(b"unused")
+    assert not os.path.exists(store.path(unused))
+    assert os.path.isfile(store.path(used))
+    assert db.get_receipt_keys() == {used}
+
+
+def test_garbage_collection_deletes_old_stray_files(tmp_path, db, store):
+    key = store.add(db, scan(tmp_path, "scan.pdf", b"receipt"))
+    db.add_purchase("Cat food", 12.5, "2025-03-04", receipt_path=key)
+    stray = os.path.join(os.path.dirname(store.path(key)), "f" * 64 + ".pdf")
+    leftover = os.path.join(store.root, INCOMING, "tmpcrash")
+    fresh = os.path.join(store.root, INCOMING, "tmpbusy")
+    for path in (stray, leftover, fresh):
+        with open(path, "wb") as f:
+            f.write(b"partial")
+    old = time.time() - 7200
+    os.utime(stray, (old, old))
+    os.utime(leftover, (old, old))
+
+    counts = store.collect_garbage(db)
+    assert counts["stray_files"] == 2
+    assert not os.path.exists(stray)
+    assert not os.path.exists(leftover)
+    assert os.path.exists(fresh)
+    assert os.path.isfile(store.path(key))
@@ -0,0 +1,67 @@
+"""Database.transaction(): one commit for the outer block, savepoints inside."""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / "nekobudget.db"))
+    yield db
+    db.close()
+
+
+def committed_purchases(db) -> list:
+    """Purchase names as another connection sees them, i.e. what's committed."""
+    conn = sqlite3.connect(db.db_path)
+    try:
+        return [row[0] for row in conn.execute("SELECT name FROM purchases ORDER BY id")]
+    finally:
+        conn.close()
+
+
+def test_failed_inner_block_rolls_back_and_outer_commits(db):
+    with db.transaction():
+        db.add_purchase("Cat food", 12.5, "2025-03-04")
+        with pytest.raises(ValueError):
+            with db.transaction():
+                db.add_purchase("Yarn", 3.0, "2025-03-05")
+                db.add_paycheck(100.0, "2025-03-05")
+                raise ValueError("changed my mind")
+        db.add_purchase("Bell", 1.0, "2025-03-06")
+        # Nothing is committed until the outer block exits
+        assert committed_purchases(db) == []
+
+    assert committed_purchases(db) == ["Cat food", "Bell"]
+    assert db.get_paychecks() == []
+    assert db.get_purchases_total(2025, 3) == 13.5
+
+
+def test_failed_outer_block_rolls_back_everything(db):
+    with pytest.raises(ValueError):
+        with db.transaction():
+            db.add_purchase("Cat food", 12.5, "2025-03-04")
+            with db.transaction():
+                db.add_purchase("Yarn", 3.0, "2025-03-05")
+            raise ValueError("changed my mind")
+
+    assert committed_purchases(db) == []
+    assert db.get_purchases_total() == 0.0
+
+
+def test_run_batch_keeps_the_writes_that_succeed(db):
+    results = db.run_batch([
+        lambda target: target.add_purchase("Cat food", 12.5, "2025-03-04"),
+        lambda target: target.add_purchase("Yarn", None, "2025-03-05"),
+        lambda target: target.add_purchase("Bell", 1.0, "2025-03-06"),
+    ])
+
+    assert [error is None for _, error in results] == [True, False, True]
+    assert committed_purchases(db) == ["Cat food", "Bell"]
@@ -0,0 +1,141 @@
+"""Receipt thumbnails for the purchases table.
+
+Thumbnails are cached at two levels: an in-memory LRU of QPixmaps, and
+PNG files in the receipt store's thumbnail folder named after the
+receipt's content hash (see ReceiptStore.thumbnail_path), so each one is
+only ever decoded once. Missing thumbnails are made on a small thread
+pool; ThumbnailCache.ready fires when one can be shown.
+"""
+
+import os
+from collections import OrderedDict
+from typing import Optional
+
+from PyQt6.QtCore import QObject, QRunnable, QSize, QThreadPool, Qt, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader, QPixmap
+
+from receipts import ReceiptStore, is_key
+
+# Edge length in pixels of the square a thumbnail is scaled to fit
+THUMBNAIL_SIZE = 96
+
+# Thumbnails kept in memory
+MEMORY_CAPACITY = 300
+
+# Thumbnails decoded at once; more would compete with the UI for CPU
+THUMBNAIL_THREADS = 2
+
+
+def read_image(path: str, bounds: QSize) -> QImage:
+    """Decode the image at ``path`` scaled down to fit ``bounds``.
+
+    Only as much of the image is decoded as the scaled size needs (for
+    JPEGs that's a fraction of the full picture), and the EXIF
+    orientation is applied. Returns a null QImage if it isn't an image
+    Qt can read, such as a PDF.
+    """
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    size = reader.size()
+    if size.isValid() and (size.width() > bounds.width() or size.height() > bounds.height()):
+        reader.setScaledSize(size.scaled(bounds, Qt.AspectRatioMode.KeepAspectRatio))
+    return reader.read()
+
+
+class _Signals(QObject):
+    """Carries a finished thumbnail from a pool thread back to the UI thread."""
+
+    loaded = pyqtSignal(str, QImage)
+
+
+class ThumbnailTask(QRunnable):
+    """Load one receipt's thumbnail from disk, making it first if needed."""
+
+    def __init__(self, receipts: ReceiptStore, receipt_path: str, size: int, signals: _Signals):
+        super().__init__()
+        self.receipts = receipts
+        self.receipt_path = receipt_path
+        self.size = size
+        self.signals = signals
+
+    def run(self):
+        cached = None
+        if is_key(self.receipt_path):
+            cached = self.receipts.thumbnail_path(self.receipt_path, self.size)
+            if os.path.exists(cached):
+                image = QImage(cached)
+                if not image.isNull():
+                    self.signals.loaded.emit(self.receipt_path, image)
+                    return
+
+        source = self.receipts.resolve(self.receipt_path)
+        image = read_image(source, QSize(self.size, self.size)) if os.path.exists(source) else QImage()
+        if cached and not image.isNull():
+            # Written under another name first so a reader never sees half a PNG
+            os.makedirs(os.path.dirname(cached), exist_ok=True)
+            partial = f"{cached}.{os.getpid()}.tmp"
+            if image.save(partial, "PNG"):
+                os.replace(partial, cached)
+        self.signals.loaded.emit(self.receipt_path, image)
+
+
+class ThumbnailCache(QObject):
+    """Receipt thumbnails by receipt_path, made in the background on demand.
+
+    get() returns a cached thumbnail or schedules one and returns None;
+    ``ready`` is emitted with the receipt_path once it's available.
+    Receipts that aren't images get no thumbnail, which is remembered so
+    they aren't tried again.
+    """
+
+    ready = pyqtSignal(str)
+
+    def __init__(self, receipts: ReceiptStore, size: int = THUMBNAIL_SIZE,
+                 capacity: int = MEMORY_CAPACITY, parent=None):
+        super().__init__(parent)
+        self.receipts = receipts
+        self.size = size
+        self.capacity = capacity
+        self._pixmaps = OrderedDict()
+        self._unsupported = set()
+        self._loading = set()
+        self._signals = _Signals(self)
+        self._signals.loaded.connect(self._on_loaded)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(THUMBNAIL_THREADS)
+
+    def get(self, receipt_path: str) -> Optional[QPixmap]:
+        """The thumbnail of ``receipt_path`` if it's ready, else None."""
+        pixmap = self._pixmaps.get(receipt_path)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(receipt_path)
+            return pixmap
+        if receipt_path not in self._unsupported and receipt_path not in self._loading:
+            self._loading.add(receipt_path)
+            self.pool.start(ThumbnailTask(self.receipts, receipt_path, self.size, self._signals))
+        return None
+
+    def is_unsupported(self, receipt_path: str) -> bool:
+        """Whether ``receipt_path`` turned out not to be a readable image."""
+        return receipt_path in self._unsupported
+
+    def cancel_pending(self):
+        """Drop thumbnails that were requested but haven't started yet."""
+        self.pool.clear()
+        self._loading.clear()
+
+    def stop(self):
+        """Drop pending thumbnails and wait for the ones being made."""
+        self.cancel_pending()
+        self.pool.waitForDone()
+
+    def _on_loaded(self, receipt_path: str, image: QImage):
+        self._loading.discard(receipt_path)
+        if image.isNull():
+            self._unsupported.add(receipt_path)
+        else:
+            # QPixmaps can only be made on the UI thread, which this runs on
+            self._pixmaps[receipt_path] = QPixmap.fromImage(image)
+            while len(self._pixmaps) > self.capacity:
+                self._pixmaps.popitem(last=False)
+        self.ready.emit(receipt_path)